@@ -16,3 +16,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==========================================================================
+
+from .api import run, RunResult, apply_operating_point
+from .sweep import run_sweep, order_operating_points, SweepResult
@@ -18,4 +18,5 @@
 # ==========================================================================
 
 from .base_analysis import Analysis
-from .simulation_setup import Simulation
\ No newline at end of file
+from .simulation_setup import Simulation
+from .pipeline import Pipeline, STAGES
\ No newline at end of file
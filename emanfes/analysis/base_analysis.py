@@ -17,18 +17,32 @@
 # limitations under the License.
 # ==========================================================================
 
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 
 class Analysis:
 
-    def __init__(self, analysis_settings, rotating_machine):
+    def __init__(self, analysis_settings, rotating_machine, workdir='.', verbose=True):
         from emanfes.analysis import Simulation
-        sim = Simulation( analysis_settings )
+        sim = Simulation( analysis_settings, workdir, verbose )
+        self.simulation = sim
+        self.rotating_machine = rotating_machine
         if sim.solver == 'elmer':
             from emanfes.elmer import ElmerSolver
             self.solver_instance = ElmerSolver(sim, rotating_machine)
         elif sim.solver == 'getdp':
             from emanfes.getdp import GetDPSolver
             self.solver_instance = GetDPSolver(sim, rotating_machine)
+        elif sim.solver == 'native':
+            from emanfes.native import NativeSolver
+            self.solver_instance = NativeSolver(sim, rotating_machine)
+        elif sim.solver == 'subdomain':
+            from emanfes.analytical import SubdomainSolver
+            self.solver_instance = SubdomainSolver(sim, rotating_machine)
         else:
             from emanfes.elmer import ElmerSolver
             self.solver_instance = ElmerSolver(sim, rotating_machine)
@@ -37,15 +51,128 @@ class Analysis:
     def create_model(self):
         return self.solver_instance.create()
 
+    def morph_model(self, previous):
+        # Reuses the mesh of a previous analysis when the geometry change is
+        # small enough, otherwise builds it again
+        morph = getattr(self.solver_instance, 'morph', None)
+        if morph is not None and morph(previous.solver_instance):
+            return True
+        return self.create_model()
+
+    def reuse_mesh(self, source):
+        # Takes the mesh generated in another working directory instead of
+        # creating one, for operating points of the same machine
+        reuse = getattr(self.solver_instance, 'reuse_mesh', None)
+        return reuse(source) if reuse is not None else self.create_model()
+
     def mesh_model(self):
         return self.solver_instance.mesh()
 
+    def get_mesh_statistics(self):
+        return self.solver_instance.get_mesh_statistics()
+
     def solve_model(self):
         return self.solver_instance.solve()
 
     def post_processing(self):
-        return self.solver_instance.post_processing()
+        res = self.solver_instance.post_processing()
+        if res is not None:
+            self._set_emf_results(res)
+            self._set_winding_results(res)
+            self._set_pressure_results(res)
+        return res
+
+    def _set_emf_results(self, res):
+        # Back emf and magnet flux at no load, dq inductances under load,
+        # from the phase flux linkages of the solve
+        sim = self.simulation
+        solver = self.solver_instance
+        time_step = getattr(solver, 'time_step', None)
+        step_angle = getattr(solver, 'step_angle', None)
+        if time_step is None or step_angle is None:
+            return
+        from emanfes.postprocessing import get_back_emf, get_dq_inductances, get_magnet_flux
+        if getattr(solver, 'load_current', 0) == 0:
+            if len(res.nl_flux_linkage_y) == 0:
+                return
+            theta_e = res.nl_flux_linkage_x
+            flux_linkage = np.asarray(res.nl_flux_linkage_y)
+            if sim.solve_bemf and len(res.bemf_y) == 0:
+                res.bemf_x = theta_e
+                res.bemf_y = get_back_emf(flux_linkage, time_step, step_angle)
+            if flux_linkage.shape[0] >= 3 and len(res.fp_magnet_flux_linkage_y) == 0:
+                res.magnet_flux = get_magnet_flux(flux_linkage, theta_e)
+        elif len(res.fp_magnet_flux_linkage_y) > 0:
+            # Separated by the frozen permeability solves of the solver
+            return
+        elif len(res.ol_flux_linkage_y) > 0 and len(res.phase_current_y) > 0:
+            flux_linkage = np.asarray(res.ol_flux_linkage_y)
+            if flux_linkage.shape[0] < 3:
+                return
+            Ld, Lq = get_dq_inductances(flux_linkage, res.phase_current_y, res.ol_flux_linkage_x,
+                                        sim.magnet_flux)
+            if Ld is not None:
+                res.Lmd = Ld
+            if Lq is not None:
+                res.Lmq = Lq
+            if sim.magnet_flux is not None:
+                res.magnet_flux = sim.magnet_flux
+
+    def _set_winding_results(self, res):
+        # Winding analysis straight from the connection matrix, per coil side
+        sim = self.simulation
+        if not (sim.solve_winding_function or sim.solve_winding_harmonics or sim.solve_winding_factors):
+            return
+        from emanfes.analytical import (get_phase_count, get_slot_conductors, get_winding_factors,
+                                        get_winding_function, get_winding_harmonics)
+        winding = self.rotating_machine.stator.winding
+        layer_type = winding.conductors.get_type()
+        conductors = get_slot_conductors(winding.conn_matrix, layer_type,
+                                         get_phase_count(winding.conn_matrix, layer_type))
+        if sim.solve_winding_function:
+            res.wf = get_winding_function(conductors)
+        if sim.solve_winding_harmonics:
+            res.wh = get_winding_harmonics(conductors, sim.winding_max_harmonic)
+        if sim.solve_winding_factors:
+            res.kw_v = get_winding_factors(conductors, sim.winding_max_harmonic)
 
+    def _set_pressure_results(self, res):
+        # Radial pressure harmonics from the air gap field of the solve
+        sim = self.simulation
+        loaded = getattr(self.solver_instance, 'load_current', 0) != 0
+        time_step = getattr(self.solver_instance, 'time_step', None)
+        if not (sim.solve_load_pressure if loaded else sim.solve_noload_pressure):
+            return
+        if time_step is None or len(res.nl_Bg_r) < 2:
+            return
+        from emanfes.misc.spectral import is_periodic
+        from emanfes.postprocessing import get_pressure_harmonics, get_radial_pressure
+        pressure = get_radial_pressure(res.nl_Bg_r, res.nl_Bg_t)
+        if loaded:
+            res.pressure_radial_ol = pressure
+        else:
+            res.pressure_radial_nl = pressure
+        # Frequencies of the table only hold over whole electrical periods
+        steps = len(res.nl_Bg_r)
+        step_angle = getattr(self.solver_instance, 'step_angle', None)
+        if step_angle is None or not is_periodic(steps, step_angle):
+            logger.warning("Pressure harmonics skipped: %d steps of %s deg do not cover whole electrical periods",
+                           steps, step_angle)
+            return
+        harmonics = get_pressure_harmonics(pressure, res.nl_Bg_theta, time_step, sim.pressure_harmonics)
+        if loaded:
+            res.pressure_harmonics_ol = harmonics
+        else:
+            res.pressure_harmonics_nl = harmonics
 
+    def get_nonlinear_iterations(self):
+        return getattr(self.solver_instance, 'nonlinear_iterations', None)
 
+    def get_restart_file(self):
+        restart = getattr(self.solver_instance, 'get_restart_file', None)
+        return restart() if restart is not None else None
 
+    def get_stage_outputs(self, stage):
+        # Files written by a stage, checked when resuming a pipeline
+        outputs = getattr(self.solver_instance, 'get_stage_outputs', None)
+        return outputs(stage) if outputs is not None else []
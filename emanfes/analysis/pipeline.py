@@ -0,0 +1,169 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Resumable analysis stages with content hash manifests.
+"""
+
+# ==========================================================================
+# Program:   pipeline.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Stage manifests and resume
+#
+# ==========================================================================
+
+import hashlib
+import json
+import logging
+import os
+
+from emanfes.misc.constants import *
+from emanfes.misc.serialization import to_json
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('create', 'mesh', 'solve', 'post_process')
+MANIFEST_DIR = '.emanfes'
+RESULT_FILE = 'result.json'
+
+
+def hash_settings(settings):
+    # Key order and formatting of the JSON files do not change the hash
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def hash_file(filename, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Pipeline:
+    """
+        Runs the analysis stages recording, for each one, a manifest with
+        the hash of its inputs and of the files it wrote. The inputs of a
+        stage are the machine and analysis settings, the emanfes version
+        and the outputs of the previous stage, so a stage is skipped only
+        when nothing upstream changed and its files are intact.
+    """
+
+    def __init__(self, analysis, machine_settings, analysis_settings, workdir='.'):
+        self.analysis = analysis
+        self.workdir = workdir
+        self.settings_hash = hash_settings({'machine': machine_settings, 'analysis': analysis_settings,
+                                            'version': EMANFES_VERSION__})
+        self.skipped = []
+        self.executed = []
+
+    def _manifest_path(self, stage):
+        return os.path.join(self.workdir, MANIFEST_DIR, stage + '.json')
+
+    def _read_manifest(self, stage):
+        try:
+            with open(self._manifest_path(stage), 'rt') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _hash_outputs(self, files):
+        return {f: hash_file(os.path.join(self.workdir, f)) for f in files}
+
+    def _is_valid(self, manifest, inputs):
+        if manifest is None or manifest.get('inputs') != inputs:
+            return False
+        if len(manifest['outputs']) == 0:
+            # Solvers working in memory leave nothing to resume from
+            return False
+        for f, digest in manifest['outputs'].items():
+            path = os.path.join(self.workdir, f)
+            if not os.path.isfile(path) or hash_file(path) != digest:
+                return False
+        return True
+
+    def _write_manifest(self, stage, inputs, outputs):
+        os.makedirs(os.path.join(self.workdir, MANIFEST_DIR), exist_ok=True)
+        tmp = self._manifest_path(stage) + '.tmp'
+        with open(tmp, 'wt') as f:
+            json.dump({'stage': stage, 'inputs': inputs, 'outputs': outputs}, f, indent=2)
+        os.replace(tmp, self._manifest_path(stage))
+
+    def invalidate(self, stage):
+        # Removes the manifests of stage and every later one
+        for s in STAGES[STAGES.index(stage):]:
+            if os.path.isfile(self._manifest_path(s)):
+                os.remove(self._manifest_path(s))
+
+    def _run_stage(self, stage):
+        if stage == 'create':
+            return self.analysis.create_model()
+        elif stage == 'mesh':
+            return self.analysis.mesh_model()
+        elif stage == 'solve':
+            return self.analysis.solve_model()
+        res = self.analysis.post_processing()
+        with open(os.path.join(self.workdir, RESULT_FILE), 'wt') as f:
+            json.dump(to_json(res.to_dict()), f)
+        return res
+
+    def run(self, stages=STAGES, resume=True):
+        """
+            Runs the given stages in order. Returns the Result when
+            post_process is among them, True when every stage succeeded
+            and False at the first failed stage.
+        """
+        from emanfes.results import Result
+        self.skipped = []
+        self.executed = []
+        upstream = ''
+        value = True
+        for stage in STAGES:
+            inputs = hashlib.sha256((self.settings_hash + upstream + stage).encode()).hexdigest()
+            manifest = self._read_manifest(stage)
+            if stage not in stages:
+                # Stages run by hand earlier still feed the later ones
+                if manifest is not None:
+                    upstream = hashlib.sha256(json.dumps(manifest['outputs'], sort_keys=True).encode()).hexdigest()
+                continue
+            if resume and self._is_valid(manifest, inputs):
+                logger.info("Skipping stage %s, outputs are up to date", stage)
+                self.skipped.append(stage)
+                if stage == 'post_process':
+                    with open(os.path.join(self.workdir, RESULT_FILE), 'rt') as f:
+                        value = Result.from_dict(json.load(f))
+            else:
+                self.invalidate(stage)
+                value = self._run_stage(stage)
+                if value is False or value is None:
+                    logger.error("Stage %s failed", stage)
+                    return False
+                files = self.analysis.get_stage_outputs(stage)
+                if stage == 'post_process':
+                    files = [RESULT_FILE]
+                manifest = {'inputs': inputs, 'outputs': self._hash_outputs(files)}
+                self._write_manifest(stage, inputs, manifest['outputs'])
+                self.executed.append(stage)
+            upstream = hashlib.sha256(json.dumps(manifest['outputs'], sort_keys=True).encode()).hexdigest()
+        return value
@@ -17,11 +17,14 @@
 # limitations under the License.
 # ==========================================================================
 
+from emanfes.misc.constants import *
 
 
 class Simulation:
 
-    def __init__(self, analysis_settings):
+    def __init__(self, analysis_settings, workdir='.', verbose=True):
+        self.workdir = workdir
+        self.verbose = verbose
         self.solver = analysis_settings['solver']
         self.solve_bemf = analysis_settings['noload'].get('bemf', False)
         self.noload_speed = analysis_settings['noload'].get('speed', 1000)
@@ -32,8 +35,20 @@ class Simulation:
         self.load_current = analysis_settings['load'].get('current', 100)
         self.load_voltage = analysis_settings['load'].get('voltage', None)
         self.load_gamma = analysis_settings['load'].get('gamma', 0)
+        self.magnet_flux = analysis_settings['load'].get('magnet_flux', None)
         self.solve_load_losses = analysis_settings['load'].get('losses', False)
         self.solve_load_pressure = analysis_settings['load'].get('pressure', False)
+        # Stator currents flow only in operating points and load analyses,
+        # the default current is the one of the load analyses
+        self.solve_load = ('current' in analysis_settings['load'] or self.solve_ripple or
+                           self.solve_load_losses or self.solve_load_pressure)
+        self.pressure_harmonics = analysis_settings.get('pressure', {}).get('harmonics', 10)
+        self.stator_loss_coefficients = dict(IRON_LOSS_COEFFICIENTS,
+                                             **analysis_settings.get('losses', {}).get('stator', {}))
+        self.rotor_loss_coefficients = dict(IRON_LOSS_COEFFICIENTS,
+                                            **analysis_settings.get('losses', {}).get('rotor', {}))
+        self.losses_chunk = analysis_settings.get('losses', {}).get('chunk', 10000)
+        self.magnet_conductivity = analysis_settings.get('losses', {}).get('magnet_conductivity', MAGNET_CONDUCTIVITY)
         self.inductance_max_current = analysis_settings['inductance'].get('max_current', 10)
         self.inductance_steps = analysis_settings['inductance'].get('steps', 5)
         self.torque_vs_load_max_current = analysis_settings['torque_vs_load'].get('max_current', 100)
@@ -47,9 +62,44 @@ class Simulation:
         self.torque_vs_speed_init_gamma = analysis_settings['torque_vs_speed'].get('init_gamma', 0.0)
         self.torque_vs_speed_with_FW = analysis_settings['torque_vs_speed'].get('flux_weakening', False)
         self.solve_efficiency_map = analysis_settings['torque_vs_speed'].get('efficiency_map', False)
+        self.torque_vs_speed_steps = analysis_settings['torque_vs_speed'].get('steps', 20)
+        self.torque_vs_speed_gamma_steps = analysis_settings['torque_vs_speed'].get('gamma_steps', 10)
         self.solve_winding_function = analysis_settings['winding'].get('winding_function', False)
         self.solve_winding_harmonics = analysis_settings['winding'].get('winding_harmonics', False)
         self.solve_winding_factors = analysis_settings['winding'].get('winding_factors', False)
+        self.winding_max_harmonic = analysis_settings['winding'].get('max_harmonic', 100)
+        self.efficiency_map_grid = analysis_settings.get('efficiency_map', {}).get('grid', 9)
+        self.efficiency_map_positions = analysis_settings.get('efficiency_map', {}).get('positions', 4)
+        self.efficiency_map_speeds = analysis_settings.get('efficiency_map', {}).get('speeds', 50)
+        self.efficiency_map_torques = analysis_settings.get('efficiency_map', {}).get('torques', 50)
+        self.efficiency_map_dense = analysis_settings.get('efficiency_map', {}).get('dense', 201)
+        self.efficiency_map_file = analysis_settings.get('efficiency_map', {}).get('flux_map_file', None)
+        self.phase_resistance = analysis_settings.get('efficiency_map', {}).get('phase_resistance', 0.0)
+        self.mtpa_levels = analysis_settings.get('mtpa', {}).get('levels', 5)
+        self.mtpa_tolerance = analysis_settings.get('mtpa', {}).get('tolerance', 0.5)
+        self.mtpa_gamma_bounds = tuple(analysis_settings.get('mtpa', {}).get('gamma_bounds', (-90.0, 0.0)))
+        self.mtpa_positions = analysis_settings.get('mtpa', {}).get('positions', 4)
+        self.mesh_algorithm = analysis_settings.get('mesh', {}).get('algorithm', 5)
+        self.mesh_recombine = analysis_settings.get('mesh', {}).get('recombine', False)
+        self.mesh_order = analysis_settings.get('mesh', {}).get('order', 1)
+        self.mesh_size_factor = analysis_settings.get('mesh', {}).get('size_factor', 1.0)
+        self.mesh_threads = analysis_settings.get('mesh', {}).get('threads', 1)
+        self.mesh_morph_quality = analysis_settings.get('mesh', {}).get('morph_min_quality', MORPH_MIN_QUALITY)
+        self.mesh_write = analysis_settings.get('mesh', {}).get('write', True)
+        self.native_nonlinear = analysis_settings.get('native', {}).get('nonlinear', True)
+        self.native_tolerance = analysis_settings.get('native', {}).get('tolerance', 1e-6)
+        self.native_max_iterations = analysis_settings.get('native', {}).get('max_iterations', 50)
+        self.native_frozen_permeability = analysis_settings.get('native', {}).get('frozen_permeability', False)
+        self.native_workers = analysis_settings.get('native', {}).get('workers', None)
+        self.subdomain_harmonics = analysis_settings.get('subdomain', {}).get('harmonics', 100)
+        self.subdomain_slot_harmonics = analysis_settings.get('subdomain', {}).get('slot_harmonics', 10)
+        self.mpi_ranks = analysis_settings.get('parallel', {}).get('ranks', 1)
+        self.mpi_launcher = analysis_settings.get('parallel', {}).get('launcher', 'mpirun')
+        self.time_steps = analysis_settings.get('time', {}).get('steps', 10)
+        self.step_angle = analysis_settings.get('time', {}).get('step_angle', 2.0)
+        self.save_restart = analysis_settings.get('restart', {}).get('save', False)
+        self.restart_file = analysis_settings.get('restart', {}).get('file', None)
+        self.restart_position = analysis_settings.get('restart', {}).get('position', 1)
 
 
 
@@ -0,0 +1,23 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+from .subdomain import SubdomainModel
+from .subdomain_solver import SubdomainSolver
+from .winding import (get_phase_count, get_slot_conductors, get_slot_spectrum, get_winding_factors,
+                      get_winding_function, get_winding_harmonics)
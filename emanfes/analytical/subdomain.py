@@ -0,0 +1,203 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Fourier series subdomain model of the slotted air gap of surface
+    mounted magnet machines.
+"""
+
+# ==========================================================================
+# Program:   subdomain.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              No load subdomain model
+#
+# ==========================================================================
+
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+from emanfes.misc.constants import MU0, PI
+
+
+def _get_slot_integrals(n, E, start, width):
+    # Integral of exp(i*n*theta) * cos(E*(theta - start)) over every slot,
+    # (N, slots, M) complex, real part for cos(n*theta) and imaginary for sin
+    def g(k):
+        small = np.abs(k) < 1e-12
+        k = np.where(small, 1.0, k)
+        return np.where(small, width, (np.exp(1j * k * width) - 1.0) / (1j * k))
+    n = n[:, None, None]
+    return np.exp(1j * n * start[None, :, None]) * 0.5 * (g(n + E) + g(n - E))
+
+
+class SubdomainModel:
+    """
+        Magnetostatic field of a magnet ring facing a slotted stator, as
+        the Fourier series solution of the magnet, air gap and slot
+        subdomains. Iron is infinitely permeable, every slot is a polar
+        rectangle as wide as its opening, and the magnets are described by
+        the harmonics of their remanence in the rotor frame.
+
+        The matrix of the interface conditions does not depend on the rotor
+        position: it is factorised once and every position is one more
+        right hand side.
+    """
+
+    def __init__(self, r_iron, r_magnet, r_stator, r_slot, slot_centres, slot_width, mur,
+                 harmonics, slot_harmonics=10, period=1):
+        self.r_iron = r_iron
+        self.r_magnet = r_magnet
+        self.r_stator = r_stator
+        self.r_slot = r_slot
+        self.mur = mur
+        self.n = period * np.arange(1, harmonics + 1)
+        self.slots = slot_centres.shape[0]
+        self.width = slot_width
+        self.start = slot_centres - slot_width / 2.0
+        self.E = np.arange(0, slot_harmonics + 1) * PI / slot_width
+        self._factorise()
+
+    def _get_basis(self, r, lo, hi):
+        # Radial solutions (r/hi)^n and (lo/r)^n and their derivatives,
+        # bounded by one inside [lo, hi]
+        u = (r / hi) ** self.n
+        v = (lo / r) ** self.n
+        return u, v, self.n * u / r, -self.n * v / r
+
+    def _get_particular(self, r):
+        # Magnet particular solution per unit source and its derivative
+        n = self.n.astype(float)
+        one = n == 1
+        p = np.where(one, -0.5 * r * np.log(r), r / np.where(one, 2.0, n * n - 1.0))
+        dp = np.where(one, -0.5 * (np.log(r) + 1.0), 1.0 / np.where(one, 2.0, n * n - 1.0))
+        return p, dp
+
+    def _factorise(self):
+        Ri, Rm, Rs = self.r_iron, self.r_magnet, self.r_stator
+        N = self.n.shape[0]
+        M = self.E.shape[0]
+        lo1, hi1 = min(Ri, Rm), max(Ri, Rm)
+        self.lo, self.hi = min(Rm, Rs), max(Rm, Rs)
+        u1_i, v1_i, du1_i, dv1_i = self._get_basis(Ri, lo1, hi1)
+        u1_m, v1_m, du1_m, dv1_m = self._get_basis(Rm, lo1, hi1)
+        u2_m, v2_m, du2_m, dv2_m = self._get_basis(Rm, self.lo, self.hi)
+        u2_s, v2_s, du2_s, dv2_s = self._get_basis(Rs, self.lo, self.hi)
+        p_i, dp_i = self._get_particular(Ri)
+        p_m, dp_m = self._get_particular(Rm)
+
+        # Iron surface, continuity of A and H_theta at the magnet surface:
+        # magnet coefficients and the inner air gap one in terms of the
+        # outer air gap one c, one unit source S and one unit M_theta
+        Q = np.zeros((N, 3, 3))
+        Q[:, 0, 0], Q[:, 0, 1] = du1_i, dv1_i
+        Q[:, 1, 0], Q[:, 1, 1], Q[:, 1, 2] = u1_m, v1_m, -v2_m
+        Q[:, 2, 0], Q[:, 2, 1], Q[:, 2, 2] = du1_m / self.mur, dv1_m / self.mur, -dv2_m
+        rhs = np.zeros((N, 3, 3))
+        rhs[:, :, 0] = np.stack((np.zeros(N), u2_m, du2_m), axis=-1)
+        rhs[:, :, 1] = np.stack((-dp_i, -p_m, -dp_m / self.mur), axis=-1)
+        rhs[:, :, 2] = np.stack((-np.ones(N), np.zeros(N), -np.ones(N) / self.mur), axis=-1)
+        x = np.linalg.solve(Q, rhs)
+        self.kappa = x[:, 2, 0]
+        self.delta = x[:, 2, 1:]
+        self.v2_s = v2_s
+        self.dv2_s = dv2_s
+
+        # Air gap and slot unknowns: c cos, c sin and the slot coefficients
+        I = _get_slot_integrals(self.n, self.E, self.start, self.width)
+        Ic = I.real.reshape(N, -1)
+        Is = I.imag.reshape(N, -1)
+        slope = np.zeros(M)
+        ratio = np.log(Rs / self.r_slot)
+        slope[1:] = self.E[1:] / Rs * np.tanh(self.E[1:] * ratio)
+        F = np.tile(slope, self.slots)
+        w = np.tile(np.where(np.arange(0, M) == 0, 1.0, 2.0), self.slots) / self.width
+        g = du2_s + self.kappa * dv2_s
+        h = u2_s + self.kappa * v2_s
+        size = 2 * N + self.slots * M
+        A = np.zeros((size, size))
+        A[:N, :N] = np.diag(g)
+        A[N:2 * N, N:2 * N] = np.diag(g)
+        A[:N, 2 * N:] = -(F * Ic) / PI
+        A[N:2 * N, 2 * N:] = -(F * Is) / PI
+        A[2 * N:, :N] = -w[:, None] * (h[:, None] * Ic).T
+        A[2 * N:, N:2 * N] = -w[:, None] * (h[:, None] * Is).T
+        A[2 * N:, 2 * N:] = np.eye(self.slots * M)
+        self.Ic = Ic
+        self.Is = Is
+        self.w = w
+        self.lu = lu_factor(A)
+
+    def get_sources(self, mr, mt, rotation):
+        """
+            Source S and M_theta (N, positions) complex, in the stator
+            frame, of the remanence harmonics mr, mt of the rotor frame
+            turned by every rotation [rad].
+        """
+        turn = np.exp(-1j * self.n[:, None] * np.atleast_1d(rotation)[None, :])
+        mr = mr[:, None] * turn
+        mt = mt[:, None] * turn
+        return mt - 1j * self.n[:, None] * mr, mt
+
+    def solve(self, mr, mt, rotation):
+        """
+            Air gap coefficients of every rotor position. mr and mt are the
+            complex harmonics n of the radial and tangential remanence [T],
+            Br = Re(sum(mr * exp(i*n*theta))).
+        """
+        N = self.n.shape[0]
+        S, T = self.get_sources(mr, mt, rotation)
+        delta = self.delta[:, 0, None] * S + self.delta[:, 1, None] * T
+        rhs = np.zeros((2 * N + self.Ic.shape[1], delta.shape[1]))
+        rhs[:N] = -self.dv2_s[:, None] * delta.real
+        rhs[N:2 * N] = -self.dv2_s[:, None] * (-delta.imag)
+        rhs[2 * N:] = self.w[:, None] * (self.Ic.T @ (self.v2_s[:, None] * delta.real) +
+                                         self.Is.T @ (self.v2_s[:, None] * (-delta.imag)))
+        x = lu_solve(self.lu, rhs)
+        # Air gap A = sum(c u + d v), cos and sin parts
+        c = x[:N] + 1j * x[N:2 * N]
+        d = self.kappa[:, None] * c + (delta.real - 1j * delta.imag)
+        slots = x[2 * N:].reshape(self.slots, self.E.shape[0], -1)
+        return c, d, slots
+
+    def get_airgap_field(self, c, d, r, theta):
+        """
+            Br and Btheta (positions, angles) at radius r of the air gap.
+        """
+        u, v, du, dv = self._get_basis(r, self.lo, self.hi)
+        a = (c * u[:, None] + d * v[:, None]).T
+        da = (c * du[:, None] + d * dv[:, None]).T
+        # Coefficients x are of cos(n theta) - i sin(n theta) in conj form
+        e = np.exp(-1j * self.n[:, None] * theta[None, :])
+        Br = (1.0 / r) * np.real(-1j * (a * self.n) @ e)
+        Bt = -np.real(da @ e)
+        return Br, Bt
+
+    def get_torque(self, c, d, r, length):
+        # Maxwell stress torque of the whole ring from the harmonic products
+        u, v, du, dv = self._get_basis(r, self.lo, self.hi)
+        a = c * u[:, None] + d * v[:, None]
+        da = c * du[:, None] + d * dv[:, None]
+        br = -1j * self.n[:, None] * a / r
+        bt = -da
+        return (length * r * r * PI / MU0) * np.sum(np.real(br * np.conj(bt)), axis=0)
@@ -0,0 +1,214 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Creates the analytical no load solver of SPM machines.
+"""
+
+# ==========================================================================
+# Program:   subdomain_solver.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Subdomain model for SPM screening
+#
+# ==========================================================================
+
+import logging
+
+import numpy as np
+
+from emanfes.analytical.subdomain import SubdomainModel
+from emanfes.analytical.winding import get_phase_count, get_slot_conductors
+from emanfes.misc.constants import *
+from emanfes.postprocessing import get_back_emf
+
+logger = logging.getLogger(__name__)
+
+
+def get_max_angle(points):
+    # Largest angle from the x axis of a geometry drawn around it
+    p = np.array([points[k][:2] for k in points], dtype=float)
+    return np.max(np.abs(np.arctan2(p[:, 1], p[:, 0])))
+
+
+def get_radii(points):
+    p = np.array([points[k][:2] for k in points], dtype=float)
+    return np.linalg.norm(p, axis=1)
+
+
+class SubdomainSolver:
+    """
+        No load air gap field, cogging torque and back emf of SPM machines
+        from the subdomain model, without meshing. Meant to screen designs
+        before any FE run; stator currents are not modelled.
+    """
+
+    def __init__(self, simulation, rotating_machine):
+        self.machine = rotating_machine
+        self.pp = rotating_machine.rotor.pp
+        self.wm = simulation.load_speed
+        self.br_pm = rotating_machine.rotor.magnets[0].material.Br
+        self.mur_pm = rotating_machine.rotor.magnets[0].material.mur
+        self.Ns = rotating_machine.stator.slots_number
+        self.stack_length = (rotating_machine.rotor.stack_length + rotating_machine.stator.stack_length) / 2.0
+        self.stator_axis = rotating_machine.stator.winding.get_armature_a_axis()
+        self.conductors_per_coil = 20
+        self.parallel_paths = 3
+
+        Fe = (self.wm * self.pp) / 60.0
+        T = 1.0 / Fe
+        self.step_angle = simulation.step_angle
+        self.time_step = T * self.step_angle / 360.0
+        self.steps = simulation.time_steps
+        self.fractions = GCD(self.Ns, 2 * self.pp)
+        self.magnets_per_pole = rotating_machine.rotor.magnets[0].magnets_per_pole
+        self.magnets_magnetisation = rotating_machine.rotor.magnets[0].magnetisation
+        self.magnetisation_angle = rotating_machine.rotor.magnets[0].mag_angle
+        self.harmonics = simulation.subdomain_harmonics
+        self.slot_harmonics = simulation.subdomain_slot_harmonics
+        self.model = None
+        self.mesh_statistics = {}
+        self.error = None
+
+    def create(self):
+        machine = self.machine
+        if machine.get_machine_type() != "SPM":
+            self.error = "Subdomain model only available for SPM machines"
+            logger.error(self.error)
+            return False
+        length = machine.rotor.magnets[0].length
+        if machine.rotor.mode == 'inner':
+            self.r_iron = machine.rotor.outer_radius
+            self.r_magnet = self.r_iron + length
+            self.r_stator = machine.stator.inner_radius
+        else:
+            self.r_iron = machine.rotor.inner_radius
+            self.r_magnet = self.r_iron - length
+            self.r_stator = machine.stator.outer_radius
+        self.r_middle_ag = (self.r_magnet + self.r_stator) / 2.0
+
+        # Slots as wide as their openings, down to the bottom of the coils
+        opening_points, opening_lines = machine.stator.get_slot_opening_geometry()
+        coil_points, coil_lines = machine.stator.get_coil_area_geometry()
+        radii = get_radii(coil_points)
+        self.r_slot = np.max(radii) if machine.rotor.mode == 'inner' else np.min(radii)
+        self.slot_width = 2.0 * get_max_angle(opening_points)
+        magnet_points, magnet_lines = machine.rotor.get_magnet_geometry()
+        self.magnet_arc = 2.0 * get_max_angle(magnet_points)
+
+        try:
+            self.model = SubdomainModel(self.r_iron, self.r_magnet, self.r_stator, self.r_slot,
+                                        2.0 * PI * np.arange(0, self.Ns) / self.Ns, self.slot_width,
+                                        self.mur_pm, self.harmonics, self.slot_harmonics,
+                                        period=GCD(self.Ns, self.pp))
+        except (ValueError, np.linalg.LinAlgError) as err:
+            self.error = "Subdomain model failed: {0}".format(err)
+            logger.error(self.error)
+            return False
+        return True
+
+    def mesh(self):
+        return self.model is not None
+
+    def get_mesh_statistics(self):
+        return {}
+
+    def get_stage_outputs(self, stage):
+        return []
+
+    def get_remanence(self, samples=None):
+        """
+            Complex harmonics of the radial and tangential remanence in the
+            rotor frame, pole k centred at k*pi/pp as drawn in the meshes.
+        """
+        n = self.model.n
+        if samples is None:
+            samples = int(2 ** np.ceil(np.log2(8 * n[-1])))
+        theta = 2.0 * PI * np.arange(0, samples) / samples
+        pole_pitch = PI / self.pp
+        k = np.floor(np.mod(theta + pole_pitch / 2.0, 2.0 * PI) / pole_pitch)
+        offset = np.mod(theta + pole_pitch / 2.0, 2.0 * PI) - k * pole_pitch - pole_pitch / 2.0
+        inside = np.abs(offset) <= self.magnet_arc / 2.0
+        segment = np.clip(np.floor((offset + self.magnet_arc / 2.0) / self.magnet_arc * self.magnets_per_pole),
+                          0, self.magnets_per_pole - 1).astype(int)
+        if self.magnets_magnetisation in ("parallel", "perpendicular"):
+            angle = np.array(self.magnetisation_angle, dtype=float)[segment] * DEG2RAD
+            direction = k * pole_pitch + k * PI + angle
+        elif self.magnets_magnetisation == "radial":
+            direction = theta + (k * self.magnets_per_pole + segment) * PI
+        else:
+            direction = theta
+            inside[:] = False
+        br = np.where(inside, self.br_pm * np.cos(direction - theta), 0.0)
+        bt = np.where(inside, self.br_pm * np.sin(direction - theta), 0.0)
+        scale = 2.0 / samples
+        return scale * np.fft.fft(br)[n], scale * np.fft.fft(bt)[n]
+
+    def get_rotor_angle(self, step):
+        # Rotor position of a time step [rad], as moved by RigidMeshMapper
+        return (self.stator_axis + np.asarray(step) * self.step_angle / self.pp) * DEG2RAD
+
+    def solve(self):
+        try:
+            mr, mt = self.get_remanence()
+            self.rotation = self.get_rotor_angle(np.arange(0, self.steps))
+            self.c, self.d, self.slots = self.model.solve(mr, mt, self.rotation)
+        except (ValueError, np.linalg.LinAlgError) as err:
+            self.error = "Subdomain model failed: {0}".format(err)
+            logger.error(self.error)
+            return False
+        return True
+
+    def post_processing(self):
+        from emanfes.results import Result
+        res = Result()
+        res.mesh_statistics = self.mesh_statistics
+
+        x_axis = np.linspace(0, self.time_step * self.steps, self.steps)
+        res.cogging_torque_x = x_axis
+        res.cogging_torque_y = self.model.get_torque(self.c, self.d, self.r_middle_ag, self.stack_length)
+
+        # A is uniform along the radius of a slot on average over its width
+        winding = self.machine.stator.winding
+        layer_type = winding.conductors.get_type()
+        conductors = get_slot_conductors(winding.conn_matrix, layer_type,
+                                         get_phase_count(winding.conn_matrix, layer_type))
+        turns = self.conductors_per_coil / self.parallel_paths
+        flux_linkage = turns * self.stack_length * (conductors @ self.slots[:, 0, :])
+        theta_e = np.arange(0, self.steps) * self.step_angle
+        res.nl_flux_linkage_x = theta_e
+        res.nl_flux_linkage_y = flux_linkage
+        res.bemf_x = theta_e
+        res.bemf_y = get_back_emf(flux_linkage, self.time_step, self.step_angle)
+
+        theta = np.linspace(0, 2.0 * PI / self.fractions, num=int(720 / self.fractions))
+        Br, Bt = self.model.get_airgap_field(self.c, self.d, self.r_middle_ag, theta)
+        d_theta = theta[1] - theta[0]
+        f = Br * Bt
+        res.cogging_torque_mst_x = x_axis
+        res.cogging_torque_mst_y = ((self.stack_length * (self.r_middle_ag ** 2) / MU0) * self.fractions *
+                                    d_theta * (np.sum(f, axis=1) - 0.5 * (f[:, 0] + f[:, -1])))
+        res.nl_Bg_r = Br
+        res.nl_Bg_t = Bt
+        res.nl_Bg_theta = theta
+        return res
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Winding function, harmonics and winding factors from the connection
+    matrix of the stator winding.
+"""
+
+# ==========================================================================
+# Program:   winding.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Winding analysis on the slot conductors
+#
+# ==========================================================================
+
+import numpy as np
+
+from emanfes.misc.constants import PI
+
+
+def get_phase_count(conn_matrix, layer_type='OneLayer'):
+    # Phases of a connection matrix, one block of rows per layer and two
+    # layers for every type but OneLayer
+    rows = np.asarray(conn_matrix).shape[0]
+    layers = 1 if layer_type == 'OneLayer' or rows % 2 != 0 else 2
+    return rows // layers
+
+
+def get_slot_conductors(conn_matrix, layer_type='OneLayer', phases=None):
+    """
+        Coil sides of every phase in every slot (phases, slots), positive
+        going in and negative coming out, summed over the layers. The
+        connection matrix stacks one block of phases per layer; the phases
+        are counted from it unless given.
+    """
+    conn = np.sign(np.asarray(conn_matrix, dtype=float))
+    if phases is None:
+        phases = get_phase_count(conn, layer_type)
+    layers = 1 if layer_type == 'OneLayer' else max(conn.shape[0] // phases, 1)
+    return conn[:layers * phases].reshape(layers, phases, -1).sum(axis=0)
+
+
+def get_winding_function(conductors, samples_per_slot=1, turns=1.0):
+    """
+        Winding function of every phase (phases, slots * samples_per_slot)
+        over one mechanical revolution starting at the centre of slot 1,
+        with the conductors concentrated at the slot centres and no mean.
+    """
+    conductors = np.atleast_2d(conductors)
+    wf = turns * np.repeat(np.cumsum(conductors, axis=-1), samples_per_slot, axis=-1)
+    return wf - np.mean(wf, axis=-1, keepdims=True)
+
+
+def get_slot_spectrum(conductors, harmonics):
+    # sum(n_j * exp(-i*v*theta_j)) of every phase for orders v = 1..harmonics,
+    # one FFT over the slots repeated with the slot number period
+    conductors = np.atleast_2d(conductors)
+    slots = conductors.shape[-1]
+    spectrum = np.fft.fft(conductors, axis=-1)
+    return spectrum[..., np.arange(1, harmonics + 1) % slots]
+
+
+def get_winding_harmonics(conductors, harmonics, turns=1.0):
+    """
+        Amplitude of the mechanical harmonics 1..harmonics of the winding
+        function of every phase, (phases, harmonics).
+    """
+    v = np.arange(1, harmonics + 1)
+    return turns * np.abs(get_slot_spectrum(conductors, harmonics)) / (PI * v)
+
+
+def get_winding_factors(conductors, harmonics):
+    """
+        Winding factor of every phase for the mechanical harmonics
+        1..harmonics, (phases, harmonics): the phasor sum of the coil sides
+        over their arithmetic sum.
+    """
+    conductors = np.atleast_2d(conductors)
+    total = np.sum(np.abs(conductors), axis=-1, keepdims=True)
+    return np.abs(get_slot_spectrum(conductors, harmonics)) / np.where(total > 0, total, 1.0)
@@ -0,0 +1,184 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Library entry point for in-process analyses.
+"""
+
+# ==========================================================================
+# Program:   api.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              run() without cwd or logging side effects
+#  - 10/19/26:  0.1.1              Operating point overrides
+#  - 10/19/26:  0.1.1              Result cache
+#  - 10/19/26:  0.1.1              Shared meshes
+#
+# ==========================================================================
+
+import copy
+import os
+import shutil
+import tempfile
+import time
+
+STAGES = ('mesh', 'solve', 'post_process')
+
+
+class RunResult:
+
+    def __init__(self, workdir):
+        self.success = False
+        self.result = None
+        self.stage = None
+        self.error = None
+        self.timings = {}
+        self.workdir = workdir
+        self.iterations = None
+        self.restart_file = None
+
+    def to_dict(self):
+        return {'success': self.success, 'stage': self.stage, 'error': self.error,
+                'timings': self.timings, 'workdir': self.workdir, 'iterations': self.iterations,
+                'result': self.result.to_dict() if self.result is not None else None}
+
+
+def _unwrap(settings, key):
+    # Accepts either the content of the JSON files or the inner dictionary
+    if key in settings and isinstance(settings[key], dict):
+        return settings[key]
+    return settings
+
+
+def apply_operating_point(analysis_settings, operating_point):
+    """
+        Returns a copy of the analysis settings with the operating point
+        applied. Plain values override the 'load' section, e.g.
+        {'speed': 3000, 'current': 50, 'gamma': 30}, and dictionaries
+        override the section with the same name.
+    """
+    settings = copy.deepcopy(_unwrap(analysis_settings, 'analysis'))
+    for key, value in (operating_point or {}).items():
+        if isinstance(value, dict):
+            settings.setdefault(key, {}).update(value)
+        else:
+            settings.setdefault('load', {})[key] = value
+    return settings
+
+
+def run(machine_settings, analysis_settings, workdir=None, stages=STAGES, keep_files=None,
+        operating_point=None, cache=None, mesh_from=None):
+    """
+        Runs an analysis in-process. All files are written under workdir
+        (a temporary directory removed afterwards when not given). Errors
+        are returned in the RunResult instead of being raised or printed.
+        With a ResultCache, results of operating points already solved are
+        returned without running any stage; solves started from a restart
+        file are not stored, their first steps depend on the restart
+        field. mesh_from is the workdir of a previous run of the same
+        machine whose mesh is reused.
+    """
+    from emanfes.analysis import Analysis, Simulation
+
+    if operating_point is not None:
+        analysis_settings = apply_operating_point(analysis_settings, operating_point)
+
+    key = None
+    if cache is not None and 'post_process' in stages:
+        start = time.time()
+        simulation = Simulation(_unwrap(analysis_settings, 'analysis'))
+        key = cache.get_key(_unwrap(machine_settings, 'machine'), simulation)
+        cached = cache.get(key)
+        if cached is not None:
+            outcome = RunResult(None)
+            outcome.result = cached
+            outcome.success = True
+            outcome.timings['cache'] = time.time() - start
+            return outcome
+
+    temporary = workdir is None
+    if temporary:
+        workdir = tempfile.mkdtemp(prefix='emanfes_')
+    else:
+        os.makedirs(workdir, exist_ok=True)
+    if keep_files is None:
+        keep_files = not temporary
+    outcome = RunResult(workdir)
+
+    def stage(name, function):
+        outcome.stage = name
+        start = time.time()
+        try:
+            value = function()
+        except Exception as err:
+            outcome.error = "{0}: {1}".format(type(err).__name__, err)
+            return None
+        finally:
+            outcome.timings[name] = time.time() - start
+        if value is False:
+            outcome.error = getattr(analysis.solver_instance, 'error', None) or "{0} failed".format(name)
+            return None
+        return value
+
+    try:
+        analysis = None
+        machine = stage('setup', lambda: _create_machine(_unwrap(machine_settings, 'machine')))
+        if machine is None:
+            return outcome
+        analysis = stage('setup', lambda: Analysis(_unwrap(analysis_settings, 'analysis'), machine,
+                                                   workdir=workdir, verbose=False))
+        if analysis is None:
+            return outcome
+        if 'mesh' in stages:
+            if mesh_from is not None:
+                create = lambda: analysis.reuse_mesh(mesh_from)
+            else:
+                create = analysis.create_model
+            if stage('create', create) is None or stage('mesh', analysis.mesh_model) is None:
+                return outcome
+        if 'solve' in stages:
+            if stage('solve', analysis.solve_model) is None:
+                return outcome
+            outcome.iterations = analysis.get_nonlinear_iterations()
+            if keep_files:
+                outcome.restart_file = analysis.get_restart_file()
+        if 'post_process' in stages:
+            outcome.result = stage('post_process', analysis.post_processing)
+            if outcome.result is None:
+                return outcome
+            # The transient solve carries the eddy currents of its initial
+            # field, a restarted solve depends on the point solved before
+            if key is not None and simulation.restart_file is None:
+                cache.put(key, outcome.result)
+        outcome.stage = None
+        outcome.success = True
+        return outcome
+    finally:
+        if not keep_files:
+            shutil.rmtree(workdir, ignore_errors=True)
+            outcome.workdir = None
+
+
+def _create_machine(machine_settings):
+    from uffema.machines import RotatingMachine
+    return RotatingMachine.create(machine_settings)
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Partitioning and output merging for parallel Elmer runs.
+"""
+
+# ==========================================================================
+# Program:   elmer_parallel.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              MPI partitioning and output merging
+#
+# ==========================================================================
+
+import glob
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Boundaries coupled by mortar projectors. Both sides of every pair must be
+# kept whole inside the partitioning so that the projectors can be built.
+MORTAR_BOUNDARIES = ('STATOR_MASTER_BOUNDARY', 'STATOR_SLAVE_BOUNDARY',
+                     'ROTOR_MASTER_BOUNDARY', 'ROTOR_SLAVE_BOUNDARY',
+                     'STATOR_SLIDING_BOUNDARY', 'ROTOR_SLIDING_BOUNDARY')
+
+
+def get_partition_command(mesh_dir, ranks, boundaries):
+    """
+        ElmerGrid command partitioning mesh_dir into ranks parts with Metis.
+        The dual graph keeps whole elements in each part and the mortar and
+        sliding boundaries are passed to -connect so their elements end in
+        the same partition as their counterparts.
+    """
+    connect = [str(boundaries[k]) for k in MORTAR_BOUNDARIES if k in boundaries]
+    cmd = ['ElmerGrid', '2', '2', mesh_dir, '-metiskway', str(ranks), '-partdual']
+    if len(connect) > 0:
+        cmd += ['-connect'] + connect
+    return cmd
+
+
+def write_startinfo(workdir, sif_file):
+    # ElmerSolver_mpi takes the case file from ELMERSOLVER_STARTINFO
+    with open(os.path.join(workdir, 'ELMERSOLVER_STARTINFO'), 'wt') as f:
+        f.write("{0}\n1\n".format(sif_file))
+
+
+def _partition_files(filename):
+    # SaveData writes one file per partition with the part number appended
+    return sorted(f for f in glob.glob(filename + '.*') if re.match(r'.*\.\d+$', f))
+
+
+def merge_scalars(filename):
+    """
+        Sums the per partition scalars (energies, powers, torques and
+        inertias are all additive over the partitions) into filename.
+        Nothing is done if the solver already reduced them.
+    """
+    parts = _partition_files(filename)
+    if len(parts) == 0:
+        return os.path.isfile(filename)
+    data = [np.loadtxt(f, ndmin=2) for f in parts]
+    rows = min(d.shape[0] for d in data)
+    np.savetxt(filename, np.sum([d[:rows] for d in data], axis=0))
+    return True
+
+
+def merge_lines(filename, step_column=0, coordinate_columns=(4, 5)):
+    """
+        Concatenates the per partition line data into filename, dropping the
+        nodes on partition interfaces that are saved by more than one part.
+    """
+    parts = _partition_files(filename)
+    if len(parts) == 0:
+        return os.path.isfile(filename)
+    data = np.concatenate([np.loadtxt(f, ndmin=2) for f in parts if os.path.getsize(f) > 0])
+    key = np.round(data[:, [step_column] + list(coordinate_columns)], 12)
+    _, index = np.unique(key, axis=0, return_index=True)
+    np.savetxt(filename, data[np.sort(index)])
+    return True
+
+
+def get_vtu_pieces(workdir, name='step'):
+    """
+        Per partition VTU files of every output step, {step: [files]}.
+        ResultOutputSolver writes <name>_t<step>.pvtu listing the pieces
+        <name>_<part>par<step>.vtu; readers load all the pieces of a step.
+    """
+    pieces = {}
+    for f in glob.glob(os.path.join(workdir, '{0}_*par*.vtu'.format(name))):
+        match = re.match(r'.*_(\d+)par(\d+)\.vtu$', f)
+        if match:
+            pieces.setdefault(int(match.group(2)), []).append((int(match.group(1)), f))
+    return {step: [f for _, f in sorted(files)] for step, files in sorted(pieces.items())}
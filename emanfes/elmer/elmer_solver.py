@@ -33,12 +33,27 @@
 #
 # ==========================================================================
 
+import glob
+import json
+import logging
+import os
+import re
+import shutil
 import subprocess
 import numpy as np
 
+from emanfes.elmer.elmer_parallel import (get_partition_command, get_vtu_pieces, merge_lines, merge_scalars,
+                                           write_startinfo)
 from emanfes.geogmsh import GeometryGmsh
 from emanfes.misc.constants import *
 
+logger = logging.getLogger(__name__)
+
+# Restart files written for, and read from, neighbouring operating points
+RESTART_OUTPUT = 'restart.result'
+RESTART_INPUT = 'previous.result'
+
+
 class ElmerSolver:
     def __init__(self, simulation, rotating_machine):
         self.gmsh_model = GeometryGmsh(simulation, rotating_machine)
@@ -67,11 +82,19 @@ class ElmerSolver:
         # TODO: It's not working
         #self.conductor_area = rotating_machine.stator.winding.get_coilside_conductor_area()
         self.conductor_area = 1.0
+        self.conductors_per_coil = 20
+        self.parallel_paths = 3
 
+        self.load_current = simulation.load_current if simulation.solve_load else 0.0
+        self.load_gamma = simulation.load_gamma
+
+        # Every time step moves the rotor step_angle electrical degrees
         Fe = (self.wm * self.pp) / 60.0
         T = 1.0 / Fe
-        self.time_step = T / 180.0
-        self.steps = 10
+        self.frequency = Fe
+        self.step_angle = simulation.step_angle
+        self.time_step = T * self.step_angle / 360.0
+        self.steps = simulation.time_steps
         self.fractions = self.gmsh_model.get_fractions_drawn()
         self.magnets_per_pole = rotating_machine.rotor.magnets[0].magnets_per_pole
         self.magnets_drawn = self.magnets_per_pole * int(2 * self.pp / self.fractions)
@@ -90,49 +113,128 @@ class ElmerSolver:
         self.stator_steel_BH = np.array(rotating_machine.stator.material.BH)
         self.rotor_steel_name = rotating_machine.rotor.material.name
         self.rotor_steel_BH = np.array(rotating_machine.rotor.material.BH)
-
-
+        self.element_order = simulation.mesh_order
+        self.solve_losses = simulation.solve_load_losses
+        self.stator_loss_coefficients = simulation.stator_loss_coefficients
+        self.rotor_loss_coefficients = simulation.rotor_loss_coefficients
+        self.losses_chunk = simulation.losses_chunk
+        self.magnet_conductivity = simulation.magnet_conductivity
+        self.morphed = False
+        self.mesh_reused = False
+        self.workdir = simulation.workdir
+        self.mpi_ranks = simulation.mpi_ranks
+        self.mpi_launcher = simulation.mpi_launcher
+        self.save_restart = simulation.save_restart
+        self.restart_file = simulation.restart_file
+        self.restart_position = simulation.restart_position
+        self.nonlinear_iterations = None
+        self.coils = []
+        self.error = None
+
+
+
+    def _path(self, filename):
+        return os.path.join(self.workdir, filename)
+
+    def _set_error(self, program, stdout, stderr):
+        self.error = "{0} failed: {1}".format(program, stderr.decode(errors='replace').strip() or
+                                              stdout.decode(errors='replace').strip())
+        logger.error(self.error)
+        return False
 
     def create(self):
         return self.gmsh_model.create()
 
-    def mesh(self):
+    def _run_elmergrid(self):
         cmd_stator = ['ElmerGrid', '14', '2', 'stator.msh2', '-2d', '-autoclean', '-names']
         cmd_rotor = ['ElmerGrid', '14', '2', 'rotor.msh2', '-2d', '-autoclean', '-names']
         cmd_unite = ['ElmerGrid', '2', '2', 'stator', '-in', 'rotor', '-unite', '-autoclean', '-names', '-out', 'machine']
-        process_stator = subprocess.Popen(cmd_stator, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process_stator = subprocess.Popen(cmd_stator, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                          cwd=self.workdir)
         (stdout, stderr) = process_stator.communicate()
-        with open('machine.log', 'wt') as wlog:
+        with open(self._path('machine.log'), 'wt') as wlog:
             wlog.write("! File Generated by emanfes v{0}\n".format(EMANFES_VERSION__))
             wlog.write("ElmerGrid: {}".format(stdout))
         process_stator.wait()
         if process_stator.returncode != 0:
-            print(stdout)
-            print(stderr)
+            return self._set_error('ElmerGrid', stdout, stderr)
 
-        process_rotor = subprocess.Popen(cmd_rotor, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process_rotor = subprocess.Popen(cmd_rotor, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                         cwd=self.workdir)
         (stdout, stderr) = process_rotor.communicate()
-        with open('machine.log', 'at') as wlog:
+        with open(self._path('machine.log'), 'at') as wlog:
             wlog.write("! File Generated by emanfes v{0}\n".format(EMANFES_VERSION__))
             wlog.write("ElmerGrid: {}".format(stdout))
         process_rotor.wait()
         if process_rotor.returncode != 0:
-            print(stdout)
-            print(stderr)
+            return self._set_error('ElmerGrid', stdout, stderr)
 
-        process_unite = subprocess.Popen(cmd_unite, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process_unite = subprocess.Popen(cmd_unite, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                          cwd=self.workdir)
         (stdout, stderr) = process_unite.communicate()
-        with open('machine.log', 'at') as wlog:
+        with open(self._path('machine.log'), 'at') as wlog:
             wlog.write("! File Generated by emanfes v{0}\n".format(EMANFES_VERSION__))
             wlog.write("ElmerGrid: {}".format(stdout))
         process_unite.wait()
         if process_unite.returncode != 0:
-            print(stdout)
-            print(stderr)
+            return self._set_error('ElmerGrid', stdout, stderr)
+        return True
+
+    def _partition(self, boundaries):
+        cmd = get_partition_command('machine', self.mpi_ranks, boundaries)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   cwd=self.workdir)
+        (stdout, stderr) = process.communicate()
+        with open(self._path('machine.log'), 'at') as wlog:
+            wlog.write("! File Generated by emanfes v{0}\n".format(EMANFES_VERSION__))
+            wlog.write("ElmerGrid: {}".format(stdout))
+        if process.returncode != 0:
+            return self._set_error('ElmerGrid', stdout, stderr)
+        return True
+
+    def _morph_elmer_nodes(self):
+        # Applies the morphing displacements to the united Elmer mesh so that
+        # the ElmerGrid conversion can be skipped
+        from scipy.spatial import cKDTree
+        if not os.path.isfile(self._path('machine/mesh.nodes')):
+            return False
+        data = np.loadtxt(self._path('machine/mesh.nodes'), ndmin=2)
+        old_nodes = np.concatenate([d[0] for d in self.gmsh_model.displacements])
+        displacement = np.concatenate([d[1] for d in self.gmsh_model.displacements])
+        distance, index = cKDTree(old_nodes[:, :2]).query(data[:, 2:4])
+        if np.any(distance > 1e-9 * np.max(np.abs(old_nodes))):
+            return False
+        data[:, 2:5] += displacement[index]
+        with open(self._path('machine/mesh.nodes'), 'wt') as f:
+            for row in data:
+                f.write("{0:d} {1:d} {2:.16g} {3:.16g} {4:.16g}\n".format(int(row[0]), int(row[1]),
+                                                                         row[2], row[3], row[4]))
+        return True
+
+    def morph(self, previous):
+        self.morphed = False
+        if not self.gmsh_model.morph(previous.gmsh_model):
+            return False
+        self.morphed = self._morph_elmer_nodes()
+        return True
+
+    def get_mesh_statistics(self):
+        return self.gmsh_model.get_mesh_statistics()
+
+    def reuse_mesh(self, source):
+        # Copies the Gmsh and Elmer meshes of another working directory so
+        # that only the case file is written by mesh()
+        os.makedirs(self._path('machine'), exist_ok=True)
+        for filename in ['stator.msh2', 'rotor.msh2'] + ['machine/' + os.path.basename(f) for f in
+                                                         glob.glob(os.path.join(source, 'machine', 'mesh.*'))]:
+            shutil.copyfile(os.path.join(source, filename), self._path(filename))
+        self.mesh_reused = True
+        return True
 
+    def _read_mesh_names(self):
         boundaries = {}
         bodies = {}
-        with open('machine/mesh.names', 'rt') as f:
+        with open(self._path('machine/mesh.names'), 'rt') as f:
             for line in f:
                 fields = line.strip().split()
                 if fields[0] == '$':
@@ -142,8 +244,63 @@ class ElmerSolver:
                         boundaries[field_name] = field_value
                     else:
                         bodies[field_name] = field_value
+        return boundaries, bodies
+
+    def _set_coils(self, bodies):
+        self.coils = [k for k in COIL_REGIONS if k in bodies]
+        # Coil side area measured on the mesh while the winding cannot give it
+        coil_side_area = self.gmsh_model.get_coil_side_area()
+        if coil_side_area:
+            self.conductor_area = coil_side_area
+
+    def get_restart_file(self):
+        # Elmer writes it in the results directory, or the mesh one in older versions
+        for filename in (RESTART_OUTPUT, os.path.join('machine', RESTART_OUTPUT)):
+            if os.path.isfile(self._path(filename)):
+                return self._path(filename)
+        return None
+
+    def get_stage_outputs(self, stage):
+        # Paths relative to the working directory
+        if stage == 'create':
+            files = ['stator.msh2', 'rotor.msh2']
+        elif stage == 'mesh':
+            files = ['machine/mesh.header', 'machine/mesh.nodes', 'machine/mesh.elements',
+                     'machine/mesh.boundary', 'machine/mesh.names', 'emanfes_elmer.sif',
+                     'stator_material.emf', 'rotor_material.emf', 'mesh_statistics.json']
+            if self.mpi_ranks > 1:
+                files += sorted(glob.glob(self._path('machine/partitioning.{0}/*'.format(self.mpi_ranks))))
+        elif stage == 'solve':
+            files = ['machine/scalars.dat', 'machine/lines.dat']
+            files += sorted(glob.glob(self._path('step*.vtu')) + glob.glob(self._path('step*.pvtu')))
+        else:
+            files = []
+        return [os.path.relpath(self._path(f), self.workdir) for f in files]
+
+    def mesh(self):
+        if not (self.morphed or self.mesh_reused) and not self._run_elmergrid():
+            return False
+
+        self.mesh_statistics = {k: v.to_dict() for k, v in self.get_mesh_statistics().items()}
+        with open(self._path('mesh_statistics.json'), 'wt') as f:
+            json.dump(self.mesh_statistics, f, indent=2)
+
+        boundaries, bodies = self._read_mesh_names()
+
+        # Partitions are rebuilt every time since morphing moves the nodes
+        if self.mpi_ranks > 1 and not self._partition(boundaries):
+            return False
+
+        self._set_coils(bodies)
+        coils = self.coils
+
+        restart = self.restart_file is not None and os.path.isfile(self.restart_file)
+        if restart:
+            shutil.copyfile(self.restart_file, self._path(RESTART_INPUT))
+        elif self.restart_file is not None:
+            logger.warning("Restart file %s not found, starting from zero", self.restart_file)
 
-        with open('rotor_material.emf', 'wt') as ro:
+        with open(self._path('rotor_material.emf'), 'wt') as ro:
             ro.write("! File Generated by emanfes v{0}\n".format( EMANFES_VERSION__ ) )
             ro.write("! Material Name: {0}\n"
                         "! B-H Curve Rotor Material\n"
@@ -154,7 +311,7 @@ class ElmerSolver:
                 ro.write("   {0}\t\t{1}\n".format( self.rotor_steel_BH[0,i], self.rotor_steel_BH[1,i] ))
             ro.write("End\n")
 
-        with open('stator_material.emf', 'wt') as ro:
+        with open(self._path('stator_material.emf'), 'wt') as ro:
             ro.write("! File Generated by emanfes v{0}\n".format( EMANFES_VERSION__ ) )
             ro.write("! Material Name: {0}\n"
                         "! B-H Curve Stator Material\n"
@@ -165,17 +322,17 @@ class ElmerSolver:
                 ro.write("   {0}\t\t{1}\n".format( self.stator_steel_BH[0,i], self.stator_steel_BH[1,i] ))
             ro.write("End\n")
 
-        with open('emanfes_elmer.sif', 'wt') as fo:
+        with open(self._path('emanfes_elmer.sif'), 'wt') as fo:
             fo.write("! File Generated by emanfes v{0}\n".format( EMANFES_VERSION__ ) )
             fo.write("$ WM = 2*pi*{0}/60        ! Mechanical Frequency [rad/s]\n".format( self.wm ) )
             fo.write("$ PP = {0}                ! Pole pairs\n".format( self.pp ) )
             fo.write("$ WE = PP*WM              ! Electrical Frequency [Hz]\n" )
             fo.write("$ H_PM = {0}/(pi*4d-7)    ! Magnetisation Magnets [A/m]\n".format( self.h_pm ) )
             fo.write("$ Shift = 2*pi/3          ! Three-phase machine [rad]\n")
-            fo.write("$ Gamma = 0               ! Current Angle [rad]\n")
-            fo.write("$ Ncond = 20              ! Conductors per coil\n")
-            fo.write("$ Cp = 3                  ! Parallel paths\n")
-            fo.write("$ Is = 0.0                ! Stator current [A]\n")
+            fo.write("$ Gamma = {0}*pi/180      ! Current Angle [rad]\n".format(self.load_gamma))
+            fo.write("$ Ncond = {0}              ! Conductors per coil\n".format(self.conductors_per_coil))
+            fo.write("$ Cp = {0}                  ! Parallel paths\n".format(self.parallel_paths))
+            fo.write("$ Is = {0}                ! Stator current [A]\n".format(self.load_current))
             fo.write("$ Aaxis = {0}             ! Axis Coil A [deg]\n".format(self.stator_axis))
             fo.write("$ Carea = {0}             ! Coil Side Conductor Area [m2]\n".format(self.conductor_area))
             fo.write("\nHeader\n"
@@ -199,8 +356,15 @@ class ElmerSolver:
                         "\tTimestep Sizes = $ {0}  ! sampling time\n"
                         "\tTimestep Intervals = {1}              ! steps\n"
                         "\tOutput Intervals = 1\n"
-                        "\tUse Mesh Names = Logical True\n"
-                    "End\n".format( self.time_step, self.steps ))
+                        "\tUse Mesh Names = Logical True\n".format( self.time_step, self.steps ))
+            if self.save_restart:
+                fo.write("\tOutput File = \"{0}\"\n".format(RESTART_OUTPUT))
+            if restart:
+                # Initial guess from a neighbouring operating point solved on the same mesh
+                fo.write("\tRestart File = \"{0}\"\n"
+                        "\tRestart Position = {1}\n"
+                        "\tRestart Time = Real 0\n".format(RESTART_INPUT, self.restart_position))
+            fo.write("End\n")
 
             fo.write("\n!--- MATERIALS ---\n")
 
@@ -364,6 +528,8 @@ class ElmerSolver:
                                     "\tMaterial = {3}\n".format(v, k, eq, mat))
                         if bf != '0':
                             fo.write("\tBody Force = {0}\n".format(bf))
+                        if k in coils:
+                            fo.write("\tflux_{0} = Logical True\n".format(k.lower()))
                         if tg != '0':
                             fo.write("\tTorque Groups = Integer {0}\n".format(tg))
                         if k == "ROTOR_AIRGAPS":
@@ -406,8 +572,10 @@ class ElmerSolver:
                     "\tLinear System Max Iterations = 1500\n"
                     "\tLinear System Residual Output = Integer 20\n"
                     "\tLinear System Convergence Tolerance = 1e-7\n"
-                    "\tMortar BCs Additive = Logical True\n"
-                    "End\n")
+                    "\tMortar BCs Additive = Logical True\n")
+            if self.element_order > 1:
+                fo.write("\tElement = \"p:{0}\"\n".format(self.element_order))
+            fo.write("End\n")
 
             fo.write("\nSolver 3\n"
                     "\tExec Solver = Always\n"
@@ -420,8 +588,10 @@ class ElmerSolver:
                     "\tCalculate Current Density = Logical True\n"
                     "\tCalculate Maxwell Stress = Logical True\n"
                     "\tCalculate JxB = Logical True\n"
-                    "\tCalculate Magnetic Field Strength = Logical True\n"
-                    "End\n")
+                    "\tCalculate Magnetic Field Strength = Logical True\n")
+            if self.element_order > 1:
+                fo.write("\tElement = \"p:{0}\"\n".format(self.element_order))
+            fo.write("End\n")
 
             fo.write("\nSolver 4\n"
                     "\tExec Solver = After Timestep\n"
@@ -451,8 +621,15 @@ class ElmerSolver:
                     "\tExec Solver = After Timestep\n"
                     "\tFilename = \"machine/scalars.dat\"\n"
                     "\tProcedure = \"SaveData\" \"SaveScalars\"\n"
-                    "\tShow Norm Index = 1\n"
-                    "End\n")
+                    "\tShow Norm Index = 1\n")
+            # Integral of A over every phase band, for the flux linkages
+            for i, k in enumerate(coils):
+                fo.write("\tVariable {0} = A\n"
+                         "\tOperator {0} = body int\n"
+                         "\tMask Name {0} = flux_{1}\n".format(i + 1, k.lower()))
+            if self.mpi_ranks > 1:
+                fo.write("\tParallel Reduce = Logical True\n")
+            fo.write("End\n")
 
             fo.write("\n!--- BOUNDARIES ---\n")
             for k, v in boundaries.items():
@@ -542,39 +719,136 @@ class ElmerSolver:
 
 
     def solve(self):
-        cmd = ['ElmerSolver', 'emanfes_elmer.sif']
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if self.mpi_ranks > 1:
+            write_startinfo(self.workdir, 'emanfes_elmer.sif')
+            cmd = [self.mpi_launcher, '-np', str(self.mpi_ranks), 'ElmerSolver_mpi']
+        else:
+            cmd = ['ElmerSolver', 'emanfes_elmer.sif']
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   cwd=self.workdir)
         (stdout, stderr) = process.communicate()
-        with open('machine.log', 'at') as wlog:
+        with open(self._path('machine.log'), 'at') as wlog:
             wlog.write("! File Generated by emanfes v{0}\n".format(EMANFES_VERSION__))
             wlog.write("ElmerSolver: {}".format(stdout))
         process.wait()
         if process.returncode != 0:
-            print(stdout)
-            print(stderr)
+            return self._set_error('ElmerSolver', stdout, stderr)
+        # Nonlinear iterations of the magnetic solver over all the time steps
+        self.nonlinear_iterations = len(re.findall(r'ComputeChange: NS \(ITER=\d+\).*::\s*mgdyn2d',
+                                                   stdout.decode(errors='replace'), re.IGNORECASE))
+        if self.mpi_ranks > 1:
+            return self._merge_partitions()
+        return True
+
+    def _merge_partitions(self):
+        if not merge_scalars(self._path('machine/scalars.dat')):
+            self.error = "ElmerSolver_mpi wrote no scalars"
             return False
+        if not merge_lines(self._path('machine/lines.dat')):
+            self.error = "ElmerSolver_mpi wrote no line data"
+            return False
+        # Index of the VTU pieces of every step for the field readers
+        with open(self._path('vtu_pieces.json'), 'wt') as f:
+            json.dump(get_vtu_pieces(self.workdir), f, indent=2)
         return True
 
+    def _read_scalar_names(self):
+        # Column names in scalars.dat order, lower case
+        names = []
+        filename = self._path('machine/scalars.dat.names')
+        if not os.path.isfile(filename):
+            return names
+        with open(filename, 'rt') as f:
+            for line in f:
+                match = re.match(r'\s*(\d+):\s*(.*)$', line)
+                if match:
+                    names.append(match.group(2).strip().lower())
+        return names
+
+    def _scalar_column(self, names, name, default):
+        for i, n in enumerate(names):
+            if name in n:
+                return i
+        return default
+
+    def _get_flux_linkage(self, scalars, names):
+        # Phase flux linkages (phases, steps) from the integral of A over the
+        # plus and minus bands of every phase
+        if len(self.coils) == 0:
+            # Mesh stage skipped when resuming
+            self._set_coils(self._read_mesh_names()[1])
+        from emanfes.postprocessing import get_phase_flux_linkage
+        columns = [self._scalar_column(names, 'flux_' + k.lower(), None) for k in self.coils]
+        if len(self.coils) == 0 or None in columns:
+            return self._get_vtu_flux_linkage()
+        return get_phase_flux_linkage(scalars[:, columns].T, self.coils, self._get_flux_scale())
+
+    def _get_flux_scale(self):
+        turns = self.conductors_per_coil / self.parallel_paths
+        return turns * self.stack_length * self.fractions / self.conductor_area
+
+    def _get_vtu_flux_linkage(self):
+        # Integral of A over the coil regions of every VTU step, for runs
+        # without the flux columns in scalars.dat
+        from emanfes.elmer.elmer_vtu import get_vtu_steps, read_cell_series
+        from emanfes.postprocessing import get_phase_flux_linkage
+        steps = get_vtu_steps(self.workdir)
+        bodies = {k: int(v) for k, v in self._read_mesh_names()[1].items()}
+        coils = [k for k in self.coils if k in bodies]
+        if len(steps) == 0 or len(coils) == 0:
+            return None
+        regions = np.array([bodies[k] for k in coils])
+        try:
+            series, area, ids = read_cell_series(steps, {'a': ('a',)}, select=lambda cells: np.isin(cells, regions))
+        except (ValueError, KeyError) as err:
+            logger.warning("Flux linkage not computed: %s", err)
+            return None
+        weights = area[:, None] * (ids[:, None] == regions[None, :])
+        return get_phase_flux_linkage((series['a'][:, :, 0] @ weights).T, coils, self._get_flux_scale())
+
     def post_processing(self):
         from emanfes.results import Result
         res = Result()
+        if os.path.isfile(self._path('mesh_statistics.json')):
+            with open(self._path('mesh_statistics.json'), 'rt') as f:
+                res.mesh_statistics = json.load(f)
 
         import numpy as np
 
         from scipy.interpolate import CubicSpline
-        # This order must match scalars.dat.names
+        # Columns are looked up in scalars.dat.names, default order:
         #   1: res: eddy current power
         #   2: res: magnetic field energy
         #   3: res: air gap torque
         #   4: res: inertial volume
         #   5: res: inertial moment
         #   6: res: group 1 torque
-        ecp, mfe, agt, iv, im, tq = np.loadtxt('machine/scalars.dat', unpack=True, usecols=(0,1,2,3,4,5))
+        scalars = np.loadtxt(self._path('machine/scalars.dat'), ndmin=2)
+        names = self._read_scalar_names()
+        agt = scalars[:, self._scalar_column(names, 'air gap torque', 2)]
+        tq = scalars[:, self._scalar_column(names, 'group 1 torque', 5)]
         x_axis = np.linspace(0, self.time_step*self.steps, self.steps)
         res.cogging_torque_2_x = x_axis
         res.cogging_torque_2_y = agt * self.stack_length
         res.cogging_torque_x = x_axis
         res.cogging_torque_y = tq * self.fractions * self.stack_length
+        if self.load_current != 0:
+            res.torque_ripple_x = x_axis
+            res.torque_ripple_y = res.cogging_torque_y
+
+        flux_linkage = self._get_flux_linkage(scalars, names)
+        if flux_linkage is not None:
+            theta_e = np.arange(0, flux_linkage.shape[1]) * self.step_angle
+            if self.load_current == 0:
+                res.nl_flux_linkage_x = theta_e
+                res.nl_flux_linkage_y = flux_linkage
+            else:
+                res.ol_flux_linkage_x = theta_e
+                res.ol_flux_linkage_y = flux_linkage
+                shift = np.arange(0, flux_linkage.shape[0])[:, None] * 2.0 * PI / 3.0
+                res.phase_current_x = theta_e
+                res.phase_current_y = self.load_current * np.sin(theta_e * DEG2RAD - shift +
+                                                                 self.load_gamma * DEG2RAD)
 
 
         # This order must match lines.dat.names
@@ -592,7 +866,7 @@ class ElmerSolver:
         #   12: magnetic flux density e 2
         #   13: magnetic flux density e 3
 
-        data = np.loadtxt('machine/lines.dat', usecols=(0,4,5,7,8,10,11))
+        data = np.loadtxt(self._path('machine/lines.dat'), usecols=(0,4,5,7,8,10,11))
         Br_list = []
         Bt_list = []
 
@@ -631,5 +905,88 @@ class ElmerSolver:
         res.nl_Bg_t = Bt
         res.nl_Bg_theta = theta_fine
 
-
-        return res
\ No newline at end of file
+        if self.solve_losses:
+            self._set_losses(res)
+
+        return res
+
+    def _set_losses(self, res):
+        # Iron and magnet losses from the element fields of every VTU step.
+        # Every file is read once, keeping only the steel and magnet
+        # elements. Iron losses come from the harmonics of B, which need
+        # the steps to cover whole electrical periods.
+        from emanfes.elmer.elmer_vtu import get_vtu_steps, read_cell_series
+        from emanfes.losses import ROTOR_IRON_REGIONS, STATOR_IRON_REGIONS
+        from emanfes.misc.spectral import is_periodic
+        steps = get_vtu_steps(self.workdir)
+        if len(steps) < 2:
+            logger.warning("Losses need the VTU fields of at least two steps")
+            return
+        periods = len(steps) * self.step_angle / 360.0
+        bodies = {k: int(v) for k, v in self._read_mesh_names()[1].items()}
+        regions = {k: bodies[k] for k in STATOR_IRON_REGIONS + ROTOR_IRON_REGIONS if k in bodies}
+        if not is_periodic(len(steps), self.step_angle):
+            logger.warning("Iron losses skipped: %d steps of %g deg cover %.3g electrical periods, "
+                           "not whole ones", len(steps), self.step_angle, periods)
+            regions = {}
+        magnets = {k: bodies[k] for k in sorted(bodies, key=lambda k: int(k[7:]) if k[7:].isdigit() else 0)
+                   if k.startswith('MAGNETS')}
+        selected = list(regions.values()) + list(magnets.values())
+        fields = {'a': ('a',)}
+        if len(regions) > 0:
+            fields['b'] = ('magnetic flux density e', 'magnetic flux density')
+        try:
+            series, area, ids = read_cell_series(steps, fields, select=lambda cells: np.isin(cells, selected))
+        except (ValueError, KeyError) as err:
+            logger.warning("Losses not computed: %s", err)
+            return
+        if len(regions) > 0:
+            self._set_iron_losses(res, series['b'][:, :, :2], area, ids, regions, int(round(periods)))
+        self._set_magnet_losses(res, series['a'][:, :, 0], area, ids, magnets)
+
+    def _set_iron_losses(self, res, b, area, ids, regions, periods):
+        from emanfes.losses import (IRON_LOSS_COMPONENTS, ROTOR_IRON_REGIONS, STATOR_IRON_REGIONS,
+                                    get_loss_density, get_region_losses)
+        # Rotor steel follows the rotor, its field is taken in the rotor frame
+        rotor = np.isin(ids, [regions[k] for k in ROTOR_IRON_REGIONS if k in regions])
+        angle = np.arange(0, b.shape[0]) * self.step_angle / self.pp * DEG2RAD
+        c = np.cos(angle)[:, None].astype(np.float32)
+        s = np.sin(angle)[:, None].astype(np.float32)
+        bx = b[:, rotor, 0].copy()
+        b[:, rotor, 0] = c * bx + s * b[:, rotor, 1]
+        b[:, rotor, 1] = -s * bx + c * b[:, rotor, 1]
+
+        depth = self.stack_length * self.fractions
+        res.iron_loss = {}
+        res.iron_loss_components = dict.fromkeys(IRON_LOSS_COMPONENTS, 0.0)
+        res.iron_loss_frequency = self.frequency
+        for names, coefficients in ((STATOR_IRON_REGIONS, self.stator_loss_coefficients),
+                                    (ROTOR_IRON_REGIONS, self.rotor_loss_coefficients)):
+            masks = {k: ids == regions[k] for k in names if k in regions}
+            selected = np.any(list(masks.values()), axis=0) if len(masks) > 0 else np.zeros(ids.shape[0], dtype=bool)
+            if not np.any(selected):
+                continue
+            density = np.zeros((len(IRON_LOSS_COMPONENTS), ids.shape[0]))
+            density[:, selected] = get_loss_density(b, self.frequency, coefficients, self.losses_chunk,
+                                                    np.flatnonzero(selected), periods, components=True)
+            res.iron_loss.update(get_region_losses(np.sum(density, axis=0), area, masks, depth, coefficients))
+            for k, d in zip(IRON_LOSS_COMPONENTS, density):
+                res.iron_loss_components[k] += sum(get_region_losses(d, area, masks, depth, coefficients).values())
+        res.iron_loss_total = sum(res.iron_loss.values())
+
+    def _set_magnet_losses(self, res, a, area, ids, magnets):
+        # The magnets move with the rotor mesh, so their potentials already
+        # follow the material. Losses of every magnet drawn, and of all the
+        # magnets of the machine.
+        from emanfes.losses import get_magnet_losses
+        if len(magnets) == 0:
+            return
+        names = list(magnets.keys())
+        index = np.full(ids.shape[0], -1)
+        for i, k in enumerate(names):
+            index[ids == magnets[k]] = i
+        inside = index >= 0
+        loss = get_magnet_losses(a[:, inside].astype(float), area[inside], index[inside], len(names),
+                                 self.time_step, self.step_angle, self.magnet_conductivity, self.stack_length)
+        res.magnet_loss = dict(zip(names, loss.tolist()))
+        res.magnet_loss_total = float(np.sum(loss) * self.fractions)
\ No newline at end of file
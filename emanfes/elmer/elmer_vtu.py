@@ -0,0 +1,201 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Reads the VTU fields written by ResultOutputSolver.
+"""
+
+# ==========================================================================
+# Program:   elmer_vtu.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Element fields over the time steps
+#
+# ==========================================================================
+
+import base64
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+from emanfes.elmer.elmer_parallel import get_vtu_pieces
+
+VTK_TYPES = {'Int8': np.int8, 'UInt8': np.uint8, 'Int16': np.int16, 'UInt16': np.uint16,
+             'Int32': np.int32, 'UInt32': np.uint32, 'Int64': np.int64, 'UInt64': np.uint64,
+             'Float32': np.float32, 'Float64': np.float64}
+# Corner nodes of the 2D cells, linear and quadratic triangles and quads
+VTK_CORNERS = {5: 3, 9: 4, 22: 3, 23: 4, 28: 4}
+
+
+def _get_attributes(tag):
+    return dict(re.findall(r'(\w+)="([^"]*)"', tag))
+
+
+def read_vtu(filename):
+    """
+        Points, cells and fields of a VTU file written in ascii, inline
+        binary or raw appended format, without compression.
+        Returns {'points', 'connectivity', 'offsets', 'types',
+        'point_data': {name: array}, 'cell_data': {name: array}}.
+    """
+    with open(filename, 'rb') as f:
+        content = f.read()
+    start = content.find(b'<AppendedData')
+    header = content if start < 0 else content[:start]
+    text = header.decode('latin-1')
+    vtk = _get_attributes(re.search(r'<VTKFile[^>]*>', text).group(0))
+    order = '<' if vtk.get('byte_order', 'LittleEndian') == 'LittleEndian' else '>'
+    size_type = np.dtype(VTK_TYPES[vtk.get('header_type', 'UInt32')]).newbyteorder(order)
+    appended = None
+    if start >= 0:
+        appended = content[content.find(b'_', start) + 1:]
+
+    vtu = {'point_data': {}, 'cell_data': {}}
+    section = None
+    for match in re.finditer(r'<(/?)(PointData|CellData|Points|Cells)\b[^>]*>|<DataArray\b([^>]*)>', text):
+        if match.group(2) is not None:
+            section = None if match.group(1) else match.group(2)
+            continue
+        attributes = _get_attributes(match.group(3))
+        dtype = np.dtype(VTK_TYPES[attributes['type']]).newbyteorder(order)
+        fmt = attributes.get('format', 'ascii')
+        if fmt == 'appended':
+            offset = int(attributes['offset'])
+            nbytes = int(np.frombuffer(appended, dtype=size_type, count=1, offset=offset)[0])
+            data = np.frombuffer(appended, dtype=dtype, count=nbytes // dtype.itemsize,
+                                 offset=offset + size_type.itemsize)
+        else:
+            body = text[match.end():text.find('</DataArray>', match.end())]
+            if fmt == 'binary':
+                raw = base64.b64decode(body.strip())
+                nbytes = int(np.frombuffer(raw, dtype=size_type, count=1)[0])
+                data = np.frombuffer(raw, dtype=dtype, count=nbytes // dtype.itemsize, offset=size_type.itemsize)
+            else:
+                data = np.array(body.split(), dtype=dtype)
+        components = int(attributes.get('NumberOfComponents', 1))
+        if components > 1:
+            data = data.reshape(-1, components)
+        name = attributes.get('Name', '')
+        if section == 'Points':
+            vtu['points'] = data
+        elif section == 'Cells':
+            vtu[name] = data
+        elif section == 'PointData':
+            vtu['point_data'][name.lower()] = data
+        elif section == 'CellData':
+            vtu['cell_data'][name.lower()] = data
+    return vtu
+
+
+def get_vtu_steps(workdir, name='step'):
+    """
+        VTU files of every output step, {step: [files]}, one file per step
+        for serial runs or every partition piece for parallel ones.
+    """
+    index = os.path.join(workdir, 'vtu_pieces.json')
+    if os.path.isfile(index):
+        with open(index, 'rt') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    pieces = get_vtu_pieces(workdir, name)
+    if len(pieces) > 0:
+        return pieces
+    steps = {}
+    for f in glob.glob(os.path.join(workdir, '{0}_t*.vtu'.format(name))):
+        match = re.match(r'.*_t(\d+)\.vtu$', f)
+        if match:
+            steps[int(match.group(1))] = [f]
+    return dict(sorted(steps.items()))
+
+
+def get_cell_areas(vtu):
+    # Area of every 2D cell from its corner nodes (shoelace formula)
+    offsets = np.asarray(vtu['offsets'], dtype=np.int64)
+    first = np.append(0, offsets[:-1])
+    corners = np.array([VTK_CORNERS.get(int(t), 3) for t in vtu['types']])
+    area = np.zeros(offsets.shape[0])
+    p = vtu['points']
+    for k in range(0, np.max(corners)):
+        i = vtu['connectivity'][first + np.minimum(k, corners - 1)]
+        j = vtu['connectivity'][first + np.where(k + 1 < corners, k + 1, 0)]
+        area += np.where(k < corners, p[i, 0] * p[j, 1] - p[j, 0] * p[i, 1], 0.0)
+    return 0.5 * np.abs(area)
+
+
+def get_cell_field(vtu, names):
+    """
+        First field of names found, per cell: cell data as is, point data
+        averaged over the corner nodes of every cell.
+    """
+    for name in names:
+        if name in vtu['cell_data']:
+            return np.asarray(vtu['cell_data'][name])
+        if name in vtu['point_data']:
+            values = np.asarray(vtu['point_data'][name])
+            offsets = np.asarray(vtu['offsets'], dtype=np.int64)
+            first = np.append(0, offsets[:-1])
+            corners = np.array([VTK_CORNERS.get(int(t), 3) for t in vtu['types']])
+            total = 0.0
+            for k in range(0, np.max(corners)):
+                node = vtu['connectivity'][first + np.minimum(k, corners - 1)]
+                weight = (k < corners) / corners
+                total = total + (weight[:, None] if values.ndim > 1 else weight) * values[node]
+            return total
+    return None
+
+
+def read_cell_series(steps, fields, select=None):
+    """
+        Cell fields over every output step, {key: (steps, cells,
+        components)} in single precision for fields {key: names}, plus the
+        area and geometry id of every cell. The pieces of a step are
+        concatenated in partition order, which keeps the cells of every
+        step aligned. select(ids) picks the cells kept from the geometry
+        ids, so that only those are held in memory. Every file is read
+        once whatever the number of fields.
+    """
+    series = {}
+    area = None
+    ids = None
+    keep = None
+    for i, (step, files) in enumerate(sorted(steps.items())):
+        vtus = [read_vtu(f) for f in files]
+        if keep is None:
+            # Same mesh on every step, areas computed on the first one
+            ids = np.concatenate([np.asarray(v['cell_data'].get('geometryids'), dtype=np.int64) for v in vtus])
+            area = np.concatenate([get_cell_areas(v) for v in vtus])
+            keep = np.ones(ids.shape[0], dtype=bool) if select is None else select(ids)
+            area = area[keep]
+            ids = ids[keep]
+        for key, names in fields.items():
+            values = [get_cell_field(v, names) for v in vtus]
+            if any(v is None for v in values):
+                raise ValueError("None of {0} in the fields of step {1}".format(', '.join(names), step))
+            values = np.concatenate([np.atleast_2d(v.T).T for v in values])[keep]
+            if key not in series:
+                series[key] = np.zeros((len(steps), values.shape[0], values.shape[1]), dtype=np.float32)
+            series[key][i] = values
+    return series, area, ids
+
@@ -18,6 +18,7 @@
 # ==========================================================================
 
 from .geometry_gmsh import GeometryGmsh
+from .gmsh_session import open_session, close_session
 
 from .gmsh_outer_stator import GmshOuterStator
 from .gmsh_inner_stator import GmshInnerStator
@@ -33,12 +33,19 @@
 #
 # ==========================================================================
 
+import os
 
+import numpy as np
+
+from emanfes.misc.constants import *
 
 
 class GeometryGmsh:
 
     def __init__(self, simulation, rotating_machine):
+        self.morph_min_quality = simulation.mesh_morph_quality
+        self.workdir = simulation.workdir
+        self.morphed = False
 
         if rotating_machine.stator.mode == 'outer':
             from emanfes.geogmsh import GmshOuterStator
@@ -62,6 +69,7 @@ class GeometryGmsh:
             self.rotor = GmshIPMInnerRotor(simulation, rotating_machine)
 
     def create(self):
+        self.morphed = False
         sf = self.stator.create()
         rf = self.rotor.create()
         return sf and rf
@@ -75,6 +83,62 @@ class GeometryGmsh:
             return 1.0
 
 
+    def morph(self, previous):
+        # Moves the meshes written by a previous design onto this geometry.
+        # Nothing is written unless both stator and rotor can be morphed.
+        from emanfes.mesh import MeshData, MeshMorpher
+        morphed = []
+        for new, old, filename in ((self.stator, previous.stator, "stator.msh2"),
+                                   (self.rotor, previous.rotor, "rotor.msh2")):
+            filename = os.path.join(self.workdir, filename)
+            if not os.path.isfile(filename):
+                return False
+            old_geometry, pitch, copies = old.get_geometry()
+            new_geometry, new_pitch, new_copies = new.get_geometry()
+            if pitch != new_pitch or copies != new_copies:
+                return False
+            morpher = MeshMorpher(old_geometry, new_geometry, pitch, copies, self.morph_min_quality)
+            mesh = MeshData.from_msh2(filename)
+            new_mesh = morpher.morph(mesh)
+            if new_mesh is None:
+                return False
+            morphed.append((mesh, new_mesh, filename))
+
+        self.morphed = True
+        self.displacements = []
+        for mesh, new_mesh, filename in morphed:
+            new_mesh.write_msh2(filename)
+            self.displacements.append((mesh.nodes, new_mesh.nodes - mesh.nodes))
+        return True
+
+    def _get_mesh(self, part, filename):
+        # Last generated (or morphed) mesh of a part
+        from emanfes.mesh import MeshData
+        mesh = getattr(part, 'mesh_data', None)
+        if mesh is None or self.morphed:
+            mesh = MeshData.from_msh2(os.path.join(self.workdir, filename))
+        return mesh
+
+    def get_mesh_statistics(self):
+        from emanfes.mesh import MeshStatistics
+        return {"stator": MeshStatistics(self._get_mesh(self.stator, "stator.msh2")),
+                "rotor": MeshStatistics(self._get_mesh(self.rotor, "rotor.msh2"))}
+
+    def get_coil_side_area(self):
+        # Mean area of the coil sides, every surface of a phase region
+        # being one coil side
+        mesh = self._get_mesh(self.stator, "stator.msh2")
+        connectivity, physical, geometrical = mesh.get_triangles()
+        p = mesh.nodes[connectivity]
+        area = 0.5 * np.abs((p[:, 1, 0] - p[:, 0, 0]) * (p[:, 2, 1] - p[:, 0, 1]) -
+                            (p[:, 2, 0] - p[:, 0, 0]) * (p[:, 1, 1] - p[:, 0, 1]))
+        tags = [mesh.get_physical_tag(name) for name in COIL_REGIONS]
+        in_coils = np.isin(physical, [t for t in tags if t is not None])
+        sides = np.unique(geometrical[in_coils])
+        if len(sides) == 0:
+            return None
+        return np.sum(area[in_coils]) / len(sides)
+
     def mesh(self):
         pass
 
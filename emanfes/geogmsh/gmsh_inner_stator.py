@@ -33,12 +33,19 @@
 #
 # ==========================================================================
 
+import logging
+import os
+
 import gmsh
 
+from emanfes.geogmsh.gmsh_session import MeshOptions, open_session
+from emanfes.mesh import MeshData
 from emanfes.misc.constants import *
 
+logger = logging.getLogger(__name__)
+
 
-class GmshInnerStator:
+class GmshInnerStator(MeshOptions):
 
     def __init__(self, simulation, rotating_machine):
         self.Sir = rotating_machine.stator.inner_radius
@@ -102,10 +109,27 @@ class GmshInnerStator:
 
         self.pp = rotating_machine.rotor.pp
         self.nCopies = int(self.Ns / GCD(self.Ns, 2 * self.pp))
+        self._set_mesh_options(simulation)
+        self.mesh_threads = simulation.mesh_threads
+        self.workdir = simulation.workdir
+        self.verbose = simulation.verbose
+        self.write_mesh = simulation.mesh_write
 
     def get_fractions_drawn(self):
         return int(self.Ns / self.nCopies)
 
+    def get_geometry(self):
+        geometry = [(self.slot_opening_points, self.slot_opening_lines),
+                    (self.slot_wedge_points, self.slot_wedge_lines),
+                    (self.coil_area_points, self.coil_area_lines),
+                    (self.backiron_points, self.backiron_lines),
+                    (self.tooth_points, self.tooth_lines),
+                    (self.toothtip_points, self.toothtip_lines),
+                    (self.stator_airgap_points, self.stator_airgap_lines),
+                    (self.sliding_airgap_points, self.sliding_airgap_lines)]
+        geometry.extend([(conductor[0], conductor[1]) for conductor in self.conductors_list])
+        return geometry, 2 * PI / self.Ns, self.nCopies
+
     def _get_mesh_size(self, points, div=1.0):
         if points is None:
             return 0
@@ -177,7 +201,7 @@ class GmshInnerStator:
             elif len(lp) == 2:
                 p1 = lp[0]
                 p2 = lp[1]
-                print(p1, p2, l)
+                logger.debug("Line %d: %d -> %d", l, p1, p2)
                 model.geo.addLine(p1, p2, l)
             elif len(lp) == 3:
                 p1 = lp[0]
@@ -398,10 +422,10 @@ class GmshInnerStator:
 
 
     def create(self):
-        gmsh.initialize('', False)
-        gmsh.option.setNumber("General.Terminal", 1)
+        open_session(self.mesh_threads)
+        gmsh.option.setNumber("General.Terminal", 1 if self.verbose else 0)
         gmsh.option.setNumber("Geometry.AutoCoherence", 0)
-        gmsh.option.setNumber("Mesh.Algorithm", 5)
+        self._apply_mesh_options()
         model = gmsh.model
         factory = model.geo
         model.add("stator")
@@ -524,19 +548,19 @@ class GmshInnerStator:
         self._copy_and_rotate_surfaces(sliding_airgap_surface, sliding_airgap_surface_mirror, self.nCopies, slot_pitch,
                                        213, "SLIDING_AIRGAPS", model)
 
-        print("Coil surfaces")
-        print(coil_surfaces)
-        print("Coil area surface")
-        print(coil_area_surface)
-        print("Coil area surface mirror")
-        print(coil_area_surface_mirror)
+        logger.debug("Coil surfaces: %s", coil_surfaces)
+        logger.debug("Coil area surface: %s", coil_area_surface)
+        logger.debug("Coil area surface mirror: %s", coil_area_surface_mirror)
 
         factory.synchronize()
+        self._set_recombination(model)
         #gmsh.fltk.run()
         model.mesh.generate(2)
+        self.mesh_data = MeshData.from_gmsh(model)
         #gmsh.fltk.run()
-        gmsh.write("stator.msh2")
-        gmsh.finalize()
+        if self.write_mesh:
+            gmsh.write(os.path.join(self.workdir, "stator.msh2"))
+        model.remove()
 
         return True
 
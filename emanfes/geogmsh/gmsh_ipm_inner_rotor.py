@@ -33,12 +33,19 @@
 #
 # ==========================================================================
 
+import logging
+import os
+
 import gmsh
 
+from emanfes.geogmsh.gmsh_session import MeshOptions, open_session
+from emanfes.mesh import MeshData
 from emanfes.misc.constants import *
 
+logger = logging.getLogger(__name__)
+
 
-class GmshIPMInnerRotor:
+class GmshIPMInnerRotor(MeshOptions):
 
     def __init__(self, simulation, rotating_machine):
         self.Sir = rotating_machine.stator.inner_radius
@@ -52,6 +59,11 @@ class GmshIPMInnerRotor:
 
         self.magnets_per_pole = rotating_machine.rotor.magnets[0].magnets_per_pole
         self.nCopies = int( 2 * self.pp / GCD(self.Ns, 2 * self.pp) )
+        self._set_mesh_options(simulation)
+        self.mesh_threads = simulation.mesh_threads
+        self.workdir = simulation.workdir
+        self.verbose = simulation.verbose
+        self.write_mesh = simulation.mesh_write
 
         self.shaft_points, self.shaft_lines = rotating_machine.rotor.get_shaft_geometry()
         self.shaft_mesh_size = self._get_mesh_size(self.shaft_points, div=2.0)
@@ -88,6 +100,14 @@ class GmshIPMInnerRotor:
     def get_fractions_drawn(self):
         return int(2 * self.pp / self.nCopies)
 
+    def get_geometry(self):
+        geometry = [(self.shaft_points, self.shaft_lines),
+                    (self.magnet_points, self.magnet_lines),
+                    (self.rotor_core_points, self.rotor_core_lines),
+                    (self.rotor_airgap_points, self.rotor_airgap_lines)]
+        geometry.extend(zip(self.pocket_points, self.pocket_lines))
+        return geometry, PI / self.pp, self.nCopies
+
     def _get_mesh_size(self, points, div=1.0):
         x_max = -1e20
         x_min = 1e20
@@ -265,10 +285,10 @@ class GmshIPMInnerRotor:
 
 
     def create(self):
-        gmsh.initialize('', False)
-        gmsh.option.setNumber("General.Terminal", 1)
+        open_session(self.mesh_threads)
+        gmsh.option.setNumber("General.Terminal", 1 if self.verbose else 0)
         gmsh.option.setNumber("Geometry.AutoCoherence", 0)
-        gmsh.option.setNumber("Mesh.Algorithm", 5)
+        self._apply_mesh_options()
         model = gmsh.model
         factory = model.geo
         model.add("rotor")
@@ -308,7 +328,7 @@ class GmshIPMInnerRotor:
         pole_pitch = PI / self.pp
 
         self._get_master_slave_boundary(self.rotor_master_boundary, GCD(self.Ns, 2 * self.pp), [101,102], ["ROTOR_MASTER_BOUNDARY","ROTOR_SLAVE_BOUNDARY"], model)
-        print(self.rotor_sliding_boundary)
+        logger.debug("Rotor sliding boundary: %s", self.rotor_sliding_boundary)
         self._get_boundary(self.rotor_sliding_boundary, self.nCopies, pole_pitch, 103, "ROTOR_SLIDING_BOUNDARY", model)
 
         # # Delete duplicated instances before building surfaces
@@ -350,11 +370,14 @@ class GmshIPMInnerRotor:
 
 
         factory.synchronize()
+        self._set_recombination(model)
         #gmsh.fltk.run()
         model.mesh.generate(2)
+        self.mesh_data = MeshData.from_gmsh(model)
         #gmsh.fltk.run()
-        gmsh.write("rotor.msh2")
-        gmsh.finalize()
+        if self.write_mesh:
+            gmsh.write(os.path.join(self.workdir, "rotor.msh2"))
+        model.remove()
 
         return True
 
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Gmsh session kept alive for the lifetime of the process, and the
+    mesh options shared by the stator and rotor builders.
+"""
+
+# ==========================================================================
+# Program:   gmsh_session.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Reuses one Gmsh session per process
+#
+# ==========================================================================
+
+import atexit
+
+import gmsh
+
+_initialized = False
+
+
+def open_session(threads=1):
+    # Initialises Gmsh once per process and only clears the models on the
+    # following calls
+    global _initialized
+    if not _initialized:
+        gmsh.initialize('', False)
+        atexit.register(close_session)
+        _initialized = True
+    else:
+        gmsh.clear()
+    gmsh.option.setNumber("General.NumThreads", threads)
+    gmsh.option.setNumber("Mesh.MaxNumThreads2D", threads)
+
+
+def close_session():
+    global _initialized
+    if _initialized:
+        gmsh.finalize()
+        _initialized = False
+
+
+def get_recombine_regions(recombine):
+    # True recombines every surface; a region name or a list of them only
+    # those physical groups; anything false none
+    if recombine is True or not recombine:
+        return bool(recombine)
+    if isinstance(recombine, str):
+        return (recombine,)
+    return tuple(recombine)
+
+
+class MeshOptions:
+    """
+        Mesh algorithm, recombination and size factor of the simulation,
+        applied the same way by every part builder.
+    """
+
+    def _set_mesh_options(self, simulation):
+        self.mesh_algorithm = simulation.mesh_algorithm
+        self.mesh_recombine = get_recombine_regions(simulation.mesh_recombine)
+        self.mesh_size_factor = simulation.mesh_size_factor
+
+    def _apply_mesh_options(self):
+        gmsh.option.setNumber("Mesh.Algorithm", self.mesh_algorithm)
+        gmsh.option.setNumber("Mesh.CharacteristicLengthFactor", self.mesh_size_factor)
+
+    def _set_recombination(self, model):
+        if self.mesh_recombine is True:
+            gmsh.option.setNumber("Mesh.RecombineAll", 1)
+            return
+        gmsh.option.setNumber("Mesh.RecombineAll", 0)
+        if not self.mesh_recombine:
+            return
+        for dim, tag in model.getPhysicalGroups(2):
+            if model.getPhysicalName(dim, tag) in self.mesh_recombine:
+                for surface in model.getEntitiesForPhysicalGroup(dim, tag):
+                    model.mesh.setRecombine(dim, surface)
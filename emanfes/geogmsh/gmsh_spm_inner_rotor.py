@@ -33,12 +33,19 @@
 #
 # ==========================================================================
 
+import logging
+import os
+
 import gmsh
 
+from emanfes.geogmsh.gmsh_session import MeshOptions, open_session
+from emanfes.mesh import MeshData
 from emanfes.misc.constants import *
 
+logger = logging.getLogger(__name__)
+
 
-class GmshSPMInnerRotor:
+class GmshSPMInnerRotor(MeshOptions):
 
     def __init__(self, simulation, rotating_machine):
         self.Sir = rotating_machine.stator.inner_radius
@@ -47,6 +54,11 @@ class GmshSPMInnerRotor:
         self.Ns = rotating_machine.stator.slots_number
         self.pp = rotating_machine.rotor.pp
         self.nCopies = int( 2 * self.pp / GCD(self.Ns, 2 * self.pp) )
+        self._set_mesh_options(simulation)
+        self.mesh_threads = simulation.mesh_threads
+        self.workdir = simulation.workdir
+        self.verbose = simulation.verbose
+        self.write_mesh = simulation.mesh_write
 
         self.shaft_points, self.shaft_lines = rotating_machine.rotor.get_shaft_geometry()
         self.shaft_mesh_size = self._get_mesh_size(self.shaft_points, div=2.0)
@@ -78,6 +90,13 @@ class GmshSPMInnerRotor:
     def get_fractions_drawn(self):
         return int(2 * self.pp / self.nCopies)
 
+    def get_geometry(self):
+        geometry = [(self.shaft_points, self.shaft_lines),
+                    (self.magnet_points, self.magnet_lines),
+                    (self.rotor_core_points, self.rotor_core_lines),
+                    (self.rotor_airgap_points, self.rotor_airgap_lines)]
+        return geometry, PI / self.pp, self.nCopies
+
     def _get_mesh_size(self, points, div=1.0):
         x_max = -1e20
         x_min = 1e20
@@ -201,10 +220,10 @@ class GmshSPMInnerRotor:
 
 
     def create(self):
-        gmsh.initialize('', False)
-        gmsh.option.setNumber("General.Terminal", 1)
+        open_session(self.mesh_threads)
+        gmsh.option.setNumber("General.Terminal", 1 if self.verbose else 0)
         gmsh.option.setNumber("Geometry.AutoCoherence", 0)
-        gmsh.option.setNumber("Mesh.Algorithm", 5)
+        self._apply_mesh_options()
         model = gmsh.model
         factory = model.geo
         model.add("rotor")
@@ -252,11 +271,14 @@ class GmshSPMInnerRotor:
 
 
         factory.synchronize()
+        self._set_recombination(model)
         #gmsh.fltk.run()
         model.mesh.generate(2)
-        gmsh.write("rotor.msh2")
+        self.mesh_data = MeshData.from_gmsh(model)
+        if self.write_mesh:
+            gmsh.write(os.path.join(self.workdir, "rotor.msh2"))
         #gmsh.fltk.run()
-        gmsh.finalize()
+        model.remove()
 
         return True
 
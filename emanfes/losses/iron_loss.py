@@ -0,0 +1,82 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Iron losses of the steel regions from their flux density waveforms.
+"""
+
+# ==========================================================================
+# Program:   iron_loss.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Harmonic Steinmetz/Bertotti losses
+#
+# ==========================================================================
+
+import numpy as np
+
+# Steel bodies whose losses are reported
+STATOR_IRON_REGIONS = ('BACKIRONS', 'TEETH', 'TOOTHTIPS')
+ROTOR_IRON_REGIONS = ('ROTORCORES',)
+# Loss terms and the power of the frequency each one scales with, the
+# hysteresis one for the usual alpha = 1
+IRON_LOSS_COMPONENTS = ('hysteresis', 'eddy', 'excess')
+IRON_LOSS_EXPONENTS = (1.0, 2.0, 1.5)
+
+
+def get_loss_density(b, frequency, coefficients, chunk=10000, elements=None, periods=1, components=False):
+    """
+        Loss density [W/kg] of the elements (all by default) from their
+        flux density b (steps, elements, components) sampled over whole
+        periods of the electrical frequency [Hz]. Every component is an
+        alternating field; its harmonics come from one FFT along the time
+        axis, done over chunks of elements to bound the memory. With
+        components, the (hysteresis, eddy current, excess) densities are
+        returned as rows of a (3, elements) array.
+    """
+    if elements is None:
+        elements = np.arange(0, b.shape[1])
+    steps = b.shape[0]
+    k = np.arange(0, steps // 2 + 1)
+    f = k * frequency / periods
+    # Single sided amplitudes, the Nyquist term is not doubled
+    scale = np.where((k == 0) | (2 * k == steps), 1.0, 2.0) / steps
+    hysteresis = coefficients['kh'] * f ** coefficients['alpha']
+    loss = np.zeros((3, elements.shape[0]))
+    for i in range(0, elements.shape[0], chunk):
+        B = scale[:, None, None] * np.abs(np.fft.rfft(b[:, elements[i:i + chunk]], axis=0))
+        B[0] = 0.0
+        fB = f[:, None, None] * B
+        loss[0, i:i + chunk] = np.sum(hysteresis[:, None, None] * B ** coefficients['beta'], axis=(0, 2))
+        loss[1, i:i + chunk] = np.sum(coefficients['kc'] * fB ** 2, axis=(0, 2))
+        loss[2, i:i + chunk] = np.sum(coefficients['ke'] * fB ** 1.5, axis=(0, 2))
+    return loss if components else np.sum(loss, axis=0)
+
+
+def get_region_losses(loss_density, area, regions, depth, coefficients):
+    """
+        Losses [W] of every region over the depth, regions being
+        {name: element mask}.
+    """
+    mass = coefficients['density'] * depth * area
+    return {name: float(np.sum(loss_density[mask] * mass[mask])) for name, mask in regions.items()}
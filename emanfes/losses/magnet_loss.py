@@ -0,0 +1,58 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Eddy current losses of the magnets from their vector potential.
+"""
+
+# ==========================================================================
+# Program:   magnet_loss.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Resistance limited magnet losses
+#
+# ==========================================================================
+
+import numpy as np
+
+from emanfes.misc.spectral import get_time_derivative
+
+
+def get_magnet_losses(a, area, magnet, magnets, time_step, step_angle, conductivity, depth):
+    """
+        Mean eddy current loss [W] of every magnet over the steps from
+        the element potentials a (steps, elements) in the rotor frame,
+        sampled every time_step [s] or step_angle electrical degrees.
+        magnet is the index in [0, magnets) of every element. Currents are
+        resistance limited, J = -sigma * (dA/dt - mean(dA/dt)), the mean
+        over each magnet cancelling its net current; the loss is the
+        integral of J^2 / sigma.
+    """
+    dadt = get_time_derivative(a, time_step, step_angle, axis=0)
+    group = np.zeros((area.shape[0], magnets))
+    group[np.arange(0, area.shape[0]), magnet] = area
+    size = np.sum(group, axis=0)
+    mean = (dadt @ group) / np.where(size > 0, size, 1.0)
+    deviation = dadt - mean[:, magnet]
+    loss = conductivity * depth * ((deviation ** 2) @ group)
+    return np.mean(loss, axis=0)
@@ -0,0 +1,212 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Torque versus load and torque versus speed curves.
+"""
+
+# ==========================================================================
+# Program:   curves.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Batched curves streamed into Result
+#
+# ==========================================================================
+
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from emanfes.maps.flux_map import _solve_point
+from emanfes.misc.constants import *
+
+logger = logging.getLogger(__name__)
+
+
+class CurveJob:
+    """
+        Operating points of a curve solved concurrently on one shared mesh.
+        result is filled point by point as the solves complete (missing
+        points are NaN), so partial curves can be read while the rest is
+        still running. callback(job, index) is called after every point.
+    """
+
+    def __init__(self, machine_settings, analysis_settings, operating_points, workers=None, workdir=None,
+                 cache_file=None, callback=None):
+        from emanfes.results import Result
+        self.machine_settings = machine_settings
+        self.analysis_settings = analysis_settings
+        self.operating_points = operating_points
+        self.workers = workers or multiprocessing.cpu_count()
+        self.temporary = workdir is None
+        self.root = tempfile.mkdtemp(prefix='emanfes_curve_') if self.temporary else workdir
+        self.cache_file = cache_file
+        self.callback = callback
+        self.result = Result()
+        self.values = np.full((len(operating_points), 4), np.nan)
+        self.completed = 0
+        self.failed = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self._thread = None
+        self._finished = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.operating_points)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        self._finished.wait(timeout)
+        return self.result
+
+    def done(self):
+        return self._finished.is_set()
+
+    def _update(self):
+        # Fills the Result arrays from the points solved so far
+        pass
+
+    def _run(self):
+        from emanfes.api import run
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            mesh_dir = os.path.join(self.root, 'mesh')
+            outcome = run(self.machine_settings, self.analysis_settings, workdir=mesh_dir, stages=('mesh',),
+                          keep_files=True)
+            if not outcome.success:
+                self.error = outcome.error
+                logger.error("Shared mesh failed: %s", outcome.error)
+                return
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(_solve_point, self.machine_settings, self.analysis_settings, op,
+                                           os.path.join(self.root, 'point_{0:04d}'.format(i)), self.cache_file,
+                                           mesh_dir): i
+                           for i, op in enumerate(self.operating_points)}
+                for future in concurrent.futures.as_completed(futures):
+                    i = futures[future]
+                    values, error = future.result()
+                    with self.lock:
+                        if values is None:
+                            logger.error("Operating point %s failed: %s", self.operating_points[i], error)
+                            self.failed += 1
+                        else:
+                            psi_d, psi_q, torque = values
+                            self.values[i] = (np.mean(psi_d), np.mean(psi_q), np.mean(torque), np.ptp(torque))
+                            self.completed += 1
+                            self._update()
+                    if self.callback is not None:
+                        self.callback(self, i)
+        except Exception as err:
+            self.error = "{0}: {1}".format(type(err).__name__, err)
+            logger.error("Curve failed: %s", self.error)
+        finally:
+            if self.temporary:
+                shutil.rmtree(self.root, ignore_errors=True)
+            self._finished.set()
+
+
+class TorqueVsLoad(CurveJob):
+    # Mean torque and ripple from no load up to max_current at a fixed angle
+
+    def __init__(self, machine_settings, analysis_settings, **kwargs):
+        from emanfes.analysis import Simulation
+        from emanfes.api import _unwrap
+        sim = Simulation(_unwrap(analysis_settings, 'analysis'))
+        self.current = np.linspace(0.0, sim.torque_vs_load_max_current, sim.torque_vs_load_steps + 1)
+        operating_points = [{'current': float(i), 'gamma': sim.torque_vs_load_gamma} for i in self.current]
+        CurveJob.__init__(self, machine_settings, analysis_settings, operating_points, **kwargs)
+        self.result.torque_vs_load_current = self.current
+        self._update()
+
+    def _update(self):
+        self.result.torque_vs_load_torque = self.values[:, 2].copy()
+        self.result.torque_vs_load_ripple = self.values[:, 3].copy()
+
+
+class TorqueVsSpeed(CurveJob):
+    """
+        Maximum torque envelope. The machine is solved at max_current for
+        current angles from init_gamma to -90 degrees (init_gamma only
+        without flux weakening), which does not depend on speed. At each
+        speed the best angle within the voltage limit is kept and the
+        torque is capped by max_power.
+    """
+
+    def __init__(self, machine_settings, analysis_settings, **kwargs):
+        from emanfes.analysis import Simulation
+        from emanfes.api import _create_machine, _unwrap
+        sim = Simulation(_unwrap(analysis_settings, 'analysis'))
+        self.pp = _create_machine(_unwrap(machine_settings, 'machine')).rotor.pp
+        self.max_current = sim.torque_vs_speed_max_current
+        self.max_voltage = sim.torque_vs_speed_max_voltage
+        self.max_power = sim.torque_vs_speed_max_power
+        self.phase_resistance = sim.phase_resistance
+        self.speed = np.linspace(sim.torque_vs_speed_max_speed / sim.torque_vs_speed_steps,
+                                 sim.torque_vs_speed_max_speed, sim.torque_vs_speed_steps)
+        if sim.torque_vs_speed_with_FW:
+            self.gamma = np.linspace(sim.torque_vs_speed_init_gamma, -90.0, sim.torque_vs_speed_gamma_steps)
+        else:
+            self.gamma = np.array([sim.torque_vs_speed_init_gamma])
+        operating_points = [{'current': self.max_current, 'gamma': float(g)} for g in self.gamma]
+        CurveJob.__init__(self, machine_settings, analysis_settings, operating_points, **kwargs)
+        self.result.torque_vs_speed_speed = self.speed
+        self._update()
+
+    def _update(self):
+        psi_d, psi_q, torque = self.values[:, 0], self.values[:, 1], self.values[:, 2]
+        id = self.max_current * np.sin(self.gamma * DEG2RAD)
+        iq = self.max_current * np.cos(self.gamma * DEG2RAD)
+        wm = self.speed * 2.0 * PI / 60.0
+        we = self.pp * wm[:, None]
+        voltage = np.hypot(self.phase_resistance * id - we * psi_q, self.phase_resistance * iq + we * psi_d)
+        candidate = np.where(voltage <= self.max_voltage, torque[None, :], -np.inf)
+        if self.max_power:
+            candidate = np.minimum(candidate, self.max_power / wm[:, None])
+        candidate[np.isnan(candidate)] = -np.inf
+        best = np.argmax(candidate, axis=1)
+        envelope = candidate[np.arange(len(self.speed)), best]
+        feasible = np.isfinite(envelope)
+        self.result.torque_vs_speed_torque = np.where(feasible, envelope, np.nan)
+        self.result.torque_vs_speed_gamma = np.where(feasible, self.gamma[best], np.nan)
+        self.result.torque_vs_speed_power = self.result.torque_vs_speed_torque * wm
+
+
+def run_torque_vs_load(machine_settings, analysis_settings, wait=True, **kwargs):
+    job = TorqueVsLoad(machine_settings, analysis_settings, **kwargs).start()
+    return job.wait() if wait else job
+
+
+def run_torque_vs_speed(machine_settings, analysis_settings, wait=True, **kwargs):
+    job = TorqueVsSpeed(machine_settings, analysis_settings, **kwargs).start()
+    return job.wait() if wait else job
@@ -0,0 +1,169 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Efficiency maps from a flux linkage map.
+"""
+
+# ==========================================================================
+# Program:   efficiency_map.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Voltage and current limited optimum
+#
+# ==========================================================================
+
+import logging
+import os
+
+import numpy as np
+
+from emanfes.losses import IRON_LOSS_EXPONENTS
+from emanfes.maps.flux_map import FluxMap, build_flux_map
+from emanfes.misc.constants import *
+
+logger = logging.getLogger(__name__)
+
+
+def compute_efficiency_map(flux_map, pp, max_speed, max_current, max_voltage, max_power=None,
+                           phase_resistance=0.0, flux_weakening=True, speed_points=50, torque_points=50,
+                           dense_points=201):
+    """
+        Minimum loss operating point of every (torque, speed) cell.
+
+        The flux map is resampled on a dense (id, iq) grid and, for all the
+        speeds at once, the cells within the current limit, the peak phase
+        voltage limit (steady state dq equations) and the power limit are
+        kept. Every feasible cell is binned to its nearest torque level and
+        the cell with the lowest copper plus iron loss wins the bin, the
+        iron loss terms of the map being scaled to every speed.
+        Without flux weakening only the id column closest to zero is used.
+        Returns a dictionary with (torque_points, speed_points) arrays.
+        A map without iron losses and no phase resistance has no loss
+        at all and raises ValueError.
+    """
+    has_iron_loss = flux_map.iron_loss is not None and bool(flux_map.loss_frequency)
+    if not has_iron_loss:
+        if phase_resistance <= 0:
+            raise ValueError("Efficiency map needs losses: the flux map has no iron losses "
+                             "and the phase resistance is zero")
+        logger.warning("Flux map without iron losses, the efficiency map only counts copper losses")
+    id, iq, psi_d, psi_q, torque = flux_map.dense(dense_points, dense_points)
+    ID, IQ = np.meshgrid(id, iq, indexing='ij')
+    ID, IQ, psi_d, psi_q, torque = (a.ravel() for a in (ID, IQ, psi_d, psi_q, torque))
+    copper = 1.5 * phase_resistance * (ID ** 2 + IQ ** 2)
+
+    allowed = (ID ** 2 + IQ ** 2 <= max_current ** 2) & (torque >= 0) & np.isfinite(torque)
+    if not flux_weakening:
+        allowed &= ID == id[np.argmin(np.abs(id))]
+
+    speed = np.linspace(max_speed / speed_points, max_speed, speed_points)
+    wm = speed * 2.0 * PI / 60.0
+    we = pp * wm
+    vd = phase_resistance * ID[None, :] - we[:, None] * psi_q[None, :]
+    vq = phase_resistance * IQ[None, :] + we[:, None] * psi_d[None, :]
+    feasible = allowed[None, :] & (vd ** 2 + vq ** 2 <= max_voltage ** 2)
+    if max_power:
+        feasible &= torque[None, :] * wm[:, None] <= max_power
+
+    loss = np.broadcast_to(copper[None, :], (speed_points, copper.shape[0]))
+    if has_iron_loss:
+        ratio = we / (2.0 * PI) / flux_map.loss_frequency
+        for component, exponent in zip(flux_map.get_iron_loss(ID, IQ), IRON_LOSS_EXPONENTS):
+            loss = loss + component[None, :] * ratio[:, None] ** exponent
+
+    max_torque = np.where(feasible, torque[None, :], -np.inf).max(axis=1)
+    max_torque[~np.isfinite(max_torque)] = np.nan
+    torque_levels = np.linspace(0.0, np.nanmax(max_torque) if np.any(np.isfinite(max_torque)) else 0.0,
+                                torque_points)
+    step = torque_levels[1] - torque_levels[0] if torque_points > 1 and torque_levels[-1] > 0 else 1.0
+    level = np.rint(torque / step).astype(np.int64)
+    level[~np.isfinite(torque)] = -1
+
+    # Best cell per (speed, torque level): sort by key then loss, keep the first
+    cells = ID.size
+    key = np.arange(speed_points)[:, None] * torque_points + level[None, :]
+    valid = feasible & (level[None, :] >= 0) & (level[None, :] < torque_points)
+    candidates = np.flatnonzero(valid.ravel())
+    order = np.lexsort((loss.ravel()[candidates], key.ravel()[candidates]))
+    keys, first = np.unique(key.ravel()[candidates][order], return_index=True)
+    best = candidates[order[first]]
+    s, c = best // cells, best % cells
+    t = keys % torque_points
+
+    efficiency = np.full((torque_points, speed_points), np.nan)
+    best_loss = np.full((torque_points, speed_points), np.nan)
+    best_id = np.full((torque_points, speed_points), np.nan)
+    best_iq = np.full((torque_points, speed_points), np.nan)
+    mechanical = torque[c] * wm[s]
+    total_loss = loss[s, c]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency[t, s] = np.where(mechanical > 0, mechanical / (mechanical + total_loss), 0.0)
+    best_loss[t, s] = total_loss
+    best_id[t, s] = ID[c]
+    best_iq[t, s] = IQ[c]
+    return {'speed': speed, 'torque': torque_levels, 'efficiency': efficiency, 'loss': best_loss,
+            'id': best_id, 'iq': best_iq, 'max_torque': max_torque}
+
+
+def run_efficiency_map(machine_settings, analysis_settings, workdir=None, workers=None, cache_file=None,
+                       flux_map=None):
+    """
+        Efficiency map analysis. The flux map is taken from flux_map, from
+        the 'efficiency_map' flux_map_file when it exists, or built with a
+        bounded grid x grid FE solves, grid without flux weakening (and
+        saved to flux_map_file).
+    """
+    from emanfes.analysis import Simulation
+    from emanfes.api import _create_machine, _unwrap
+    from emanfes.results import Result
+
+    sim = Simulation(_unwrap(analysis_settings, 'analysis'))
+    machine = _create_machine(_unwrap(machine_settings, 'machine'))
+    if flux_map is None and sim.efficiency_map_file is not None and os.path.isfile(sim.efficiency_map_file):
+        flux_map = FluxMap.load(sim.efficiency_map_file)
+    if flux_map is None:
+        current = sim.torque_vs_speed_max_current
+        # Without flux weakening only the id = 0 column is solved
+        id = np.linspace(-current, 0.0, sim.efficiency_map_grid) if sim.torque_vs_speed_with_FW else np.zeros(1)
+        iq = np.linspace(0.0, current, sim.efficiency_map_grid)
+        flux_map = build_flux_map(machine_settings, analysis_settings, id, iq, sim.efficiency_map_positions,
+                                  workers=workers, workdir=workdir, cache_file=cache_file)
+        if sim.efficiency_map_file is not None:
+            flux_map.save(sim.efficiency_map_file)
+
+    em = compute_efficiency_map(flux_map, machine.rotor.pp, sim.torque_vs_speed_max_speed,
+                                sim.torque_vs_speed_max_current, sim.torque_vs_speed_max_voltage,
+                                sim.torque_vs_speed_max_power, sim.phase_resistance,
+                                sim.torque_vs_speed_with_FW, sim.efficiency_map_speeds,
+                                sim.efficiency_map_torques, sim.efficiency_map_dense)
+    res = Result()
+    res.stator_phase_resistance = sim.phase_resistance
+    res.efficiency_map_speed = em['speed']
+    res.efficiency_map_torque = em['torque']
+    res.efficiency_map = em['efficiency']
+    res.efficiency_map_loss = em['loss']
+    res.efficiency_map_id = em['id']
+    res.efficiency_map_iq = em['iq']
+    res.efficiency_map_max_torque = em['max_torque']
+    return res
@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Flux linkage maps over the (id, iq) plane.
+"""
+
+# ==========================================================================
+# Program:   flux_map.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              psi_d, psi_q and torque maps
+#
+# ==========================================================================
+
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from emanfes.losses import IRON_LOSS_COMPONENTS, IRON_LOSS_EXPONENTS
+from emanfes.misc.constants import *
+from emanfes.postprocessing.emf import abc_to_dq
+
+logger = logging.getLogger(__name__)
+
+
+def dq_currents_to_operating_point(id, iq):
+    # Peak current and current angle as used by the solvers,
+    # ia = Is sin(theta_e + gamma) so that iq = Is cos(gamma), id = Is sin(gamma)
+    return {'current': float(np.hypot(id, iq)), 'gamma': float(np.arctan2(id, iq) * RAD2DEG)}
+
+
+class FluxMap:
+    """
+        psi_d, psi_q and torque on an (id, iq) grid at several rotor
+        positions, arrays of shape (len(id), len(iq), len(theta_e)). The
+        interpolators work on the values averaged over the positions.
+    """
+
+    def __init__(self, id, iq, theta_e, psi_d, psi_q, torque, iron_loss=None, loss_frequency=None):
+        self.id = np.asarray(id, dtype=float)
+        self.iq = np.asarray(iq, dtype=float)
+        self.theta_e = np.asarray(theta_e, dtype=float)
+        self.psi_d_grid = np.asarray(psi_d, dtype=float)
+        self.psi_q_grid = np.asarray(psi_q, dtype=float)
+        self.torque_grid = np.asarray(torque, dtype=float)
+        # Optional (hysteresis, eddy, excess) iron loss grids at
+        # loss_frequency [Hz], each of shape (len(id), len(iq))
+        self.iron_loss = None if iron_loss is None else np.asarray(iron_loss, dtype=float)
+        self.loss_frequency = loss_frequency
+        self.psi_d_mean = np.nanmean(self.psi_d_grid, axis=2)
+        self.psi_q_mean = np.nanmean(self.psi_q_grid, axis=2)
+        self.torque_mean = np.nanmean(self.torque_grid, axis=2)
+        method = 'cubic' if min(len(self.id), len(self.iq)) >= 4 else 'linear'
+        self._interpolators = {name: RegularGridInterpolator(*self._get_grid(values), method=method,
+                                                             bounds_error=False, fill_value=None)
+                               for name, values in (('psi_d', self.psi_d_mean), ('psi_q', self.psi_q_mean),
+                                                    ('torque', self.torque_mean))}
+
+    def _get_grid(self, values):
+        # Interpolation axes and values; a single id column (maps without
+        # flux weakening) is taken as constant along id
+        if len(self.id) > 1:
+            return (self.id, self.iq), values
+        return (np.array([self.id[0] - 1.0, self.id[0]]), self.iq), np.concatenate((values, values))
+
+    def _evaluate(self, name, id, iq):
+        id, iq = np.broadcast_arrays(np.asarray(id, dtype=float), np.asarray(iq, dtype=float))
+        values = self._interpolators[name](np.stack((id.ravel(), iq.ravel()), axis=-1))
+        return values.reshape(id.shape)
+
+    def psi_d(self, id, iq):
+        return self._evaluate('psi_d', id, iq)
+
+    def psi_q(self, id, iq):
+        return self._evaluate('psi_q', id, iq)
+
+    def torque(self, id, iq):
+        return self._evaluate('torque', id, iq)
+
+    def dense(self, n_id=101, n_iq=101):
+        # Maps resampled on a fine grid, for lookups without interpolation
+        id = np.linspace(self.id[0], self.id[-1], n_id if len(self.id) > 1 else 1)
+        iq = np.linspace(self.iq[0], self.iq[-1], n_iq)
+        ID, IQ = np.meshgrid(id, iq, indexing='ij')
+        return id, iq, self.psi_d(ID, IQ), self.psi_q(ID, IQ), self.torque(ID, IQ)
+
+    def get_iron_loss(self, id, iq):
+        # (hysteresis, eddy, excess) iron losses at loss_frequency, scaling
+        # with the powers IRON_LOSS_EXPONENTS of the frequency
+        id, iq = np.broadcast_arrays(np.asarray(id, dtype=float), np.asarray(iq, dtype=float))
+        if self.iron_loss is None:
+            return tuple(np.zeros(id.shape) for k in IRON_LOSS_COMPONENTS)
+        points = np.stack((id.ravel(), iq.ravel()), axis=-1)
+        return tuple(RegularGridInterpolator(*self._get_grid(grid), bounds_error=False,
+                                             fill_value=None)(points).reshape(id.shape)
+                     for grid in self.iron_loss)
+
+    def save(self, filename):
+        extra = {}
+        if self.iron_loss is not None:
+            extra = {'iron_loss': self.iron_loss, 'loss_frequency': self.loss_frequency}
+        np.savez_compressed(filename, id=self.id, iq=self.iq, theta_e=self.theta_e,
+                            psi_d=self.psi_d_grid, psi_q=self.psi_q_grid, torque=self.torque_grid, **extra)
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        if 'iron_loss' in data:
+            return cls(data['id'], data['iq'], data['theta_e'], data['psi_d'], data['psi_q'], data['torque'],
+                       data['iron_loss'], float(data['loss_frequency']))
+        return cls(data['id'], data['iq'], data['theta_e'], data['psi_d'], data['psi_q'], data['torque'])
+
+    def to_dict(self):
+        return {'id': self.id, 'iq': self.iq, 'theta_e': self.theta_e, 'psi_d': self.psi_d_grid,
+                'psi_q': self.psi_q_grid, 'torque': self.torque_grid}
+
+
+def _solve_point(machine_settings, analysis_settings, operating_point, workdir, cache_file, mesh_from=None,
+                 losses=False):
+    from emanfes.api import run
+    from emanfes.results import ResultCache
+    cache = ResultCache(cache_file) if cache_file is not None else None
+    try:
+        outcome = run(machine_settings, analysis_settings, workdir=workdir, keep_files=False,
+                      operating_point=operating_point, cache=cache, mesh_from=mesh_from)
+    finally:
+        if cache is not None:
+            cache.close()
+    if not outcome.success:
+        return None, outcome.error
+    res = outcome.result
+    if operating_point['current'] == 0:
+        theta_e, flux_linkage = res.nl_flux_linkage_x, res.nl_flux_linkage_y
+        torque = res.cogging_torque_y
+    else:
+        theta_e, flux_linkage = res.ol_flux_linkage_x, res.ol_flux_linkage_y
+        torque = res.torque_ripple_y
+    if len(flux_linkage) == 0:
+        return None, 'no flux linkage in the results'
+    psi_d, psi_q = abc_to_dq(theta_e, flux_linkage)
+    if not losses:
+        return (psi_d, psi_q, np.asarray(torque)), None
+    # Iron loss terms and the frequency they were computed at, NaN when
+    # the solve gave none
+    loss = np.array([res.iron_loss_components.get(k, np.nan) if res.iron_loss_components else np.nan
+                     for k in IRON_LOSS_COMPONENTS])
+    return (psi_d, psi_q, np.asarray(torque), (loss, res.iron_loss_frequency)), None
+
+
+def build_flux_map(machine_settings, analysis_settings, id, iq, positions=4, span=60.0, workers=None,
+                   workdir=None, cache_file=None, losses=True):
+    """
+        Solves every (id, iq) pair of the grid and returns the FluxMap.
+        Each solve steps the rotor over positions electrical angles within
+        span degrees (60 covers the six pulse ripple of the dq quantities)
+        and runs in its own process, up to workers at the same time. With
+        losses, the load losses are requested and the steps are extended
+        to one whole electrical period, as the iron losses need, keeping
+        the step angle; the map then holds the iron loss terms at the
+        load speed of the analysis settings.
+    """
+    id = np.asarray(id, dtype=float)
+    iq = np.asarray(iq, dtype=float)
+    step_angle = span / positions
+    if losses:
+        positions = max(positions, int(round(360.0 / step_angle)))
+        step_angle = 360.0 / positions
+    theta_e = np.arange(0, positions) * step_angle
+    shape = (len(id), len(iq), positions)
+    psi_d = np.full(shape, np.nan)
+    psi_q = np.full(shape, np.nan)
+    torque = np.full(shape, np.nan)
+    iron_loss = np.full((len(IRON_LOSS_COMPONENTS), len(id), len(iq)), np.nan)
+    loss_frequency = None
+
+    temporary = workdir is None
+    root = tempfile.mkdtemp(prefix='emanfes_fluxmap_') if temporary else workdir
+    workers = workers or multiprocessing.cpu_count()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for i in range(0, len(id)):
+                for j in range(0, len(iq)):
+                    op = dq_currents_to_operating_point(id[i], iq[j])
+                    op['time'] = {'steps': positions, 'step_angle': step_angle}
+                    if losses:
+                        op['losses'] = True
+                    point_dir = os.path.join(root, 'id{0:03d}_iq{1:03d}'.format(i, j))
+                    futures[executor.submit(_solve_point, machine_settings, analysis_settings, op,
+                                            point_dir, cache_file, None, losses)] = (i, j)
+            for future in concurrent.futures.as_completed(futures):
+                i, j = futures[future]
+                values, error = future.result()
+                if values is None:
+                    logger.error("Flux map point id=%g iq=%g failed: %s", id[i], iq[j], error)
+                    continue
+                n = min(positions, len(values[0]))
+                psi_d[i, j, :n], psi_q[i, j, :n], torque[i, j, :n] = (v[:n] for v in values[:3])
+                if losses:
+                    iron_loss[:, i, j], frequency = values[3]
+                    if frequency:
+                        loss_frequency = float(frequency)
+    finally:
+        if temporary:
+            shutil.rmtree(root, ignore_errors=True)
+    if not losses:
+        return FluxMap(id, iq, theta_e, psi_d, psi_q, torque)
+    if loss_frequency is None or np.all(np.isnan(iron_loss)):
+        logger.warning("Flux map built without iron losses, no solve computed them")
+        return FluxMap(id, iq, theta_e, psi_d, psi_q, torque)
+    if np.any(np.isnan(iron_loss)):
+        logger.warning("Iron losses missing at %d of the %d flux map points",
+                       np.sum(np.isnan(iron_loss[0])), iron_loss[0].size)
+    return FluxMap(id, iq, theta_e, psi_d, psi_q, torque, iron_loss, loss_frequency)
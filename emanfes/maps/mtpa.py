@@ -0,0 +1,184 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    MTPA and flux weakening current angle search.
+"""
+
+# ==========================================================================
+# Program:   mtpa.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Bounded Brent search per current level
+#
+# ==========================================================================
+
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy.optimize import brentq, minimize_scalar
+
+from emanfes.maps.flux_map import _solve_point
+from emanfes.misc.constants import *
+
+logger = logging.getLogger(__name__)
+
+
+class _AngleEvaluator:
+    # FE solves at one current level, memoised on the current angle
+
+    def __init__(self, machine_settings, analysis_settings, current, positions, span, workdir, cache_file):
+        self.machine_settings = machine_settings
+        self.analysis_settings = analysis_settings
+        self.current = current
+        self.positions = positions
+        self.span = span
+        self.workdir = workdir
+        self.cache_file = cache_file
+        self.values = {}
+
+    def __call__(self, gamma):
+        gamma = float(gamma)
+        if gamma not in self.values:
+            op = {'current': self.current, 'gamma': gamma,
+                  'time': {'steps': self.positions, 'step_angle': self.span / self.positions}}
+            point_dir = os.path.join(self.workdir, 'gamma_{0:03d}'.format(len(self.values)))
+            values, error = _solve_point(self.machine_settings, self.analysis_settings, op, point_dir,
+                                         self.cache_file)
+            if values is None:
+                raise RuntimeError("current {0} A, gamma {1} deg: {2}".format(self.current, gamma, error))
+            psi_d, psi_q, torque = (float(np.mean(v)) for v in values)
+            self.values[gamma] = (torque, psi_d, psi_q)
+        return self.values[gamma]
+
+    @property
+    def calls(self):
+        return len(self.values)
+
+
+def _search_level(machine_settings, analysis_settings, current, bounds, tolerance, positions, span,
+                  speeds, pp, max_voltage, phase_resistance, workdir, cache_file):
+    os.makedirs(workdir, exist_ok=True)
+    evaluate = _AngleEvaluator(machine_settings, analysis_settings, current, positions, span, workdir, cache_file)
+
+    # Brent's method (golden section with parabolic steps) on the bracket
+    search = minimize_scalar(lambda g: -evaluate(g)[0], bounds=bounds, method='bounded',
+                             options={'xatol': tolerance})
+    gamma = float(search.x)
+    torque = evaluate(gamma)[0]
+    # The optimum may sit on a bound, which the bounded search never evaluates
+    for bound in bounds:
+        if abs(gamma - bound) < 2.0 * tolerance and evaluate(bound)[0] > torque:
+            gamma, torque = float(bound), evaluate(bound)[0]
+
+    fw_gamma = []
+    fw_torque = []
+    for speed in speeds:
+        we = pp * speed * 2.0 * PI / 60.0
+
+        def excess_voltage(g):
+            _, psi_d, psi_q = evaluate(g)
+            id = current * np.sin(g * DEG2RAD)
+            iq = current * np.cos(g * DEG2RAD)
+            return np.hypot(phase_resistance * id - we * psi_q, phase_resistance * iq + we * psi_d) - max_voltage
+
+        limit = min(bounds)
+        if excess_voltage(gamma) <= 0:
+            # The MTPA point is within the voltage limit at this speed
+            fw_gamma.append(gamma)
+            fw_torque.append(torque)
+        elif excess_voltage(limit) > 0:
+            fw_gamma.append(np.nan)
+            fw_torque.append(np.nan)
+        else:
+            g = brentq(excess_voltage, limit, gamma, xtol=tolerance)
+            fw_gamma.append(g)
+            fw_torque.append(evaluate(g)[0])
+    return gamma, torque, fw_gamma, fw_torque, evaluate.calls
+
+
+def run_mtpa(machine_settings, analysis_settings, currents=None, speeds=None, workers=None, workdir=None,
+             cache_file=None):
+    """
+        Torque maximising current angle for every current level and, with
+        torque_vs_speed flux_weakening, the angle meeting the voltage limit
+        at each speed (the load speed by default). Current levels are
+        searched in parallel, each one with a bounded Brent search on the
+        mean FE torque. Returns a Result with the angles, torques and the
+        number of FE solves used.
+    """
+    from emanfes.analysis import Simulation
+    from emanfes.api import _create_machine, _unwrap
+    from emanfes.results import Result
+
+    sim = Simulation(_unwrap(analysis_settings, 'analysis'))
+    if currents is None:
+        currents = np.linspace(sim.torque_vs_load_max_current / sim.mtpa_levels, sim.torque_vs_load_max_current,
+                               sim.mtpa_levels)
+    currents = np.atleast_1d(np.asarray(currents, dtype=float))
+    if sim.torque_vs_speed_with_FW:
+        speeds = np.atleast_1d(np.asarray(speeds if speeds is not None else [sim.load_speed], dtype=float))
+        pp = _create_machine(_unwrap(machine_settings, 'machine')).rotor.pp
+    else:
+        speeds = np.zeros(0)
+        pp = 0
+
+    temporary = workdir is None
+    root = tempfile.mkdtemp(prefix='emanfes_mtpa_') if temporary else workdir
+    res = Result()
+    res.mtpa_current = currents
+    res.mtpa_gamma = np.full(len(currents), np.nan)
+    res.mtpa_torque = np.full(len(currents), np.nan)
+    res.fw_speed = speeds
+    res.fw_gamma = np.full((len(currents), len(speeds)), np.nan)
+    res.fw_torque = np.full((len(currents), len(speeds)), np.nan)
+    res.fe_calls = 0
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers or multiprocessing.cpu_count()) as executor:
+            futures = {executor.submit(_search_level, machine_settings, analysis_settings, current,
+                                       sim.mtpa_gamma_bounds, sim.mtpa_tolerance, sim.mtpa_positions, 60.0,
+                                       speeds, pp, sim.torque_vs_speed_max_voltage, sim.phase_resistance,
+                                       os.path.join(root, 'level_{0:03d}'.format(i)), cache_file): i
+                       for i, current in enumerate(currents)}
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                try:
+                    gamma, torque, fw_gamma, fw_torque, calls = future.result()
+                except Exception as err:
+                    logger.error("MTPA search at %g A failed: %s", currents[i], err)
+                    continue
+                res.mtpa_gamma[i] = gamma
+                res.mtpa_torque[i] = torque
+                res.fw_gamma[i] = fw_gamma
+                res.fw_torque[i] = fw_torque
+                res.fe_calls += calls
+    finally:
+        if temporary:
+            shutil.rmtree(root, ignore_errors=True)
+    logger.info("MTPA search used %d FE solves for %d current levels", res.fe_calls, len(currents))
+    return res
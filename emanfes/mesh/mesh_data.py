@@ -0,0 +1,216 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Mesh arrays shared by the mesh tools.
+"""
+
+# ==========================================================================
+# Program:   mesh_data.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Reads and writes Gmsh msh2 files
+#
+# ==========================================================================
+
+import numpy as np
+
+# Number of nodes and dimension of the Gmsh element types used by emanfes
+GMSH_ELEMENT_NODES = {1: 2, 2: 3, 3: 4, 8: 3, 9: 6, 10: 9, 15: 1, 16: 8}
+GMSH_ELEMENT_DIM = {1: 1, 2: 2, 3: 2, 8: 1, 9: 2, 10: 2, 15: 0, 16: 2}
+
+
+class MeshData:
+
+    def __init__(self, nodes, node_tags, elements, physical_names):
+        # nodes: (N, 3) coordinates, node_tags: (N,) Gmsh node tags
+        # elements: {type: (tags, physical, geometrical, connectivity)} where
+        #           connectivity holds row indices into nodes
+        # physical_names: {(dim, tag): name}
+        self.nodes = nodes
+        self.node_tags = node_tags
+        self.elements = elements
+        self.physical_names = physical_names
+
+    @classmethod
+    def from_msh2(cls, filename):
+        with open(filename, 'rt') as f:
+            lines = f.read().splitlines()
+
+        physical_names = {}
+        i = 0
+        while i < len(lines):
+            section = lines[i].strip()
+            if section == '$PhysicalNames':
+                n = int(lines[i + 1])
+                for line in lines[i + 2:i + 2 + n]:
+                    fields = line.split(None, 2)
+                    physical_names[(int(fields[0]), int(fields[1]))] = fields[2].strip('"')
+                i += n + 3
+            elif section == '$Nodes':
+                n = int(lines[i + 1])
+                data = np.array(' '.join(lines[i + 2:i + 2 + n]).split(), dtype=float).reshape(n, 4)
+                node_tags = data[:, 0].astype(np.int64)
+                nodes = data[:, 1:]
+                i += n + 3
+            elif section == '$Elements':
+                n = int(lines[i + 1])
+                rows = {}
+                for line in lines[i + 2:i + 2 + n]:
+                    fields = [int(v) for v in line.split()]
+                    rows.setdefault((fields[1], fields[2]), []).append(fields)
+                i += n + 3
+            else:
+                i += 1
+
+        index = np.zeros(node_tags.max() + 1, dtype=np.int64)
+        index[node_tags] = np.arange(node_tags.shape[0])
+        elements = {}
+        for (etype, ntags), block in rows.items():
+            block = np.array(block, dtype=np.int64)
+            tags = block[:, 0]
+            physical = block[:, 3] if ntags > 0 else np.zeros(tags.shape[0], dtype=np.int64)
+            geometrical = block[:, 4] if ntags > 1 else np.zeros(tags.shape[0], dtype=np.int64)
+            connectivity = index[block[:, 3 + ntags:]]
+            if etype in elements:
+                old = elements[etype]
+                tags = np.concatenate((old[0], tags))
+                physical = np.concatenate((old[1], physical))
+                geometrical = np.concatenate((old[2], geometrical))
+                connectivity = np.concatenate((old[3], connectivity))
+            elements[etype] = (tags, physical, geometrical, connectivity)
+
+        return cls(nodes, node_tags, elements, physical_names)
+
+    @classmethod
+    def from_gmsh(cls, model):
+        # Mesh of the current Gmsh model restricted to its physical groups,
+        # which is what gets written to the msh2 files
+        node_tags, coords, _ = model.mesh.getNodes()
+        node_tags = np.asarray(node_tags, dtype=np.int64)
+        nodes = np.asarray(coords, dtype=float).reshape(-1, 3)
+        index = np.zeros(node_tags.max() + 1, dtype=np.int64)
+        index[node_tags] = np.arange(node_tags.shape[0])
+
+        physical_names = {}
+        blocks = {}
+        for dim, tag in model.getPhysicalGroups():
+            physical_names[(dim, tag)] = model.getPhysicalName(dim, tag)
+            for entity in model.getEntitiesForPhysicalGroup(dim, tag):
+                types, tags, entity_nodes = model.mesh.getElements(dim, entity)
+                for etype, etags, enodes in zip(types, tags, entity_nodes):
+                    etags = np.asarray(etags, dtype=np.int64)
+                    connectivity = index[np.asarray(enodes, dtype=np.int64).reshape(etags.shape[0], -1)]
+                    blocks.setdefault(etype, []).append((etags, np.full(etags.shape[0], tag, dtype=np.int64),
+                                                         np.full(etags.shape[0], entity, dtype=np.int64),
+                                                         connectivity))
+        elements = {}
+        for etype, block in blocks.items():
+            elements[etype] = tuple(np.concatenate(a) for a in zip(*block))
+        return cls(nodes, node_tags, elements, physical_names)
+
+    def write_msh2(self, filename):
+        with open(filename, 'wt') as f:
+            f.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n")
+            f.write("$PhysicalNames\n{0}\n".format(len(self.physical_names)))
+            for (dim, tag), name in sorted(self.physical_names.items()):
+                f.write("{0} {1} \"{2}\"\n".format(dim, tag, name))
+            f.write("$EndPhysicalNames\n")
+            f.write("$Nodes\n{0}\n".format(self.node_tags.shape[0]))
+            for tag, (x, y, z) in zip(self.node_tags, self.nodes):
+                f.write("{0} {1:.16g} {2:.16g} {3:.16g}\n".format(tag, x, y, z))
+            f.write("$EndNodes\n")
+            rows = []
+            for etype, (tags, physical, geometrical, connectivity) in self.elements.items():
+                for i in range(0, tags.shape[0]):
+                    rows.append((tags[i], "{0} {1} 2 {2} {3} {4}\n".format(
+                        tags[i], etype, physical[i], geometrical[i],
+                        ' '.join(str(t) for t in self.node_tags[connectivity[i]]))))
+            rows.sort(key=lambda row: row[0])
+            f.write("$Elements\n{0}\n".format(len(rows)))
+            f.writelines(row[1] for row in rows)
+            f.write("$EndElements\n")
+
+    def copy(self, nodes=None):
+        if nodes is None:
+            nodes = self.nodes.copy()
+        return MeshData(nodes, self.node_tags, self.elements, self.physical_names)
+
+    def get_physical_tag(self, name, dim=2):
+        for (d, tag), n in self.physical_names.items():
+            if d == dim and n == name:
+                return tag
+        return None
+
+    def get_triangles(self):
+        # All surface elements as linear triangles, quadrangles are split
+        # along their first diagonal.
+        # Returns (connectivity, physical, geometrical).
+        connectivity = []
+        physical = []
+        geometrical = []
+        for etype, (tags, phys, geom, conn) in self.elements.items():
+            if GMSH_ELEMENT_DIM[etype] != 2:
+                continue
+            if etype in (2, 9):
+                connectivity.append(conn[:, :3])
+                physical.append(phys)
+                geometrical.append(geom)
+            else:
+                connectivity.append(conn[:, [0, 1, 2]])
+                connectivity.append(conn[:, [0, 2, 3]])
+                physical.extend([phys, phys])
+                geometrical.extend([geom, geom])
+        if len(connectivity) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return np.zeros((0, 3), dtype=np.int64), empty, empty
+        return np.concatenate(connectivity), np.concatenate(physical), np.concatenate(geometrical)
+
+    def get_edges(self, dim=2):
+        # Unique node pairs of the element edges of the given dimension
+        edges = []
+        for etype, (tags, phys, geom, conn) in self.elements.items():
+            if GMSH_ELEMENT_DIM[etype] != dim:
+                continue
+            corners = conn[:, :4] if etype in (3, 10, 16) else conn[:, :GMSH_ELEMENT_DIM[etype] + 1]
+            n = corners.shape[1]
+            for i in range(0, n if n > 2 else 1):
+                edges.append(np.stack((corners[:, i], corners[:, (i + 1) % n]), axis=-1))
+        if len(edges) == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.unique(np.sort(np.concatenate(edges), axis=1), axis=0)
+
+    def get_physical_nodes(self, name, dim=1):
+        # Corner nodes of the elements of a named physical group
+        tag = self.get_physical_tag(name, dim)
+        if tag is None:
+            return np.zeros(0, dtype=np.int64)
+        nodes = []
+        for etype, (tags, phys, geom, conn) in self.elements.items():
+            if GMSH_ELEMENT_DIM[etype] != dim:
+                continue
+            corners = conn[:, :4] if etype in (3, 10, 16) else conn[:, :dim + 1]
+            nodes.append(corners[phys == tag].ravel())
+        if len(nodes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(nodes))
@@ -0,0 +1,214 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Morphs an existing mesh onto a slightly modified geometry.
+"""
+
+# ==========================================================================
+# Program:   mesh_morphing.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Boundary projection and Laplacian smoothing
+#
+# ==========================================================================
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import factorized
+
+from emanfes.mesh.mesh_statistics import get_element_quality
+from emanfes.misc.constants import *
+
+
+class MeshMorpher:
+
+    def __init__(self, old_geometry, new_geometry, pitch, copies, min_quality=MORPH_MIN_QUALITY):
+        # old_geometry, new_geometry: lists of (points, lines) as returned by
+        # the get_*_geometry() methods for the drawn base fraction
+        self.pitch = pitch
+        self.copies = copies
+        self.min_quality = min_quality
+        self.quality = 0.0
+        self.old_segments, self.new_segments = self._get_segments(old_geometry, new_geometry)
+
+    def _merge(self, geometry):
+        points = {}
+        lines = {}
+        for p, l in geometry:
+            if p is not None:
+                for k, v in p.items():
+                    points[int(k)] = np.array(v[:2], dtype=float)
+            if l is not None:
+                for k, v in l.items():
+                    lines[int(k)] = [int(t) for t in v]
+        return points, lines
+
+    def _get_segments(self, old_geometry, new_geometry):
+        old_points, old_lines = self._merge(old_geometry)
+        new_points, new_lines = self._merge(new_geometry)
+        if old_lines != new_lines or set(old_points) != set(new_points):
+            # Topology changed, only a remesh can follow
+            return None, None
+
+        segments = []
+        for points in (old_points, new_points):
+            start = []
+            end = []
+            center = []
+            for tag in sorted(old_lines):
+                lp = old_lines[tag]
+                if len(lp) == 2:
+                    start.append(points[lp[0]])
+                    end.append(points[lp[1]])
+                    center.append([np.nan, np.nan])
+                elif len(lp) == 3:
+                    start.append(points[lp[0]])
+                    center.append(points[lp[1]])
+                    end.append(points[lp[2]])
+            segments.append(self._replicate(np.array(start), np.array(end), np.array(center)))
+        return segments
+
+    def _replicate(self, start, end, center):
+        # Same mirror and copy pattern used by the Gmsh builders; one extra
+        # copy on each side covers master/slave boundaries
+        copies = []
+        for mirror in (1.0, -1.0):
+            for k in range(-1, self.copies + 1):
+                c = np.cos(k * self.pitch)
+                s = np.sin(k * self.pitch)
+                rotation = np.array([[c, -s], [s, c]]) @ np.diag([1.0, mirror])
+                copies.append((start @ rotation.T, end @ rotation.T, center @ rotation.T))
+        return tuple(np.concatenate(a) for a in zip(*copies))
+
+    def _project(self, points, segments, tol):
+        # Closest segment and curve parameter of every point
+        start, end, center = segments
+        is_arc = ~np.isnan(center[:, 0])
+        best = np.full(points.shape[0], np.inf)
+        index = np.zeros(points.shape[0], dtype=np.int64)
+        param = np.zeros(points.shape[0])
+        chunk = 1024
+        for i in range(0, points.shape[0], chunk):
+            p = points[i:i + chunk, None, :]
+
+            d = end - start
+            t_line = np.clip(np.sum((p - start) * d, axis=-1) / np.maximum(np.sum(d * d, axis=-1), 1e-300), 0.0, 1.0)
+            dist_line = np.linalg.norm(p - (start + t_line[..., None] * d), axis=-1)
+
+            radius = np.linalg.norm(start - center, axis=-1)
+            phi_s = np.arctan2(start[:, 1] - center[:, 1], start[:, 0] - center[:, 0])
+            phi_e = np.arctan2(end[:, 1] - center[:, 1], end[:, 0] - center[:, 0])
+            sweep = np.angle(np.exp(1j * (phi_e - phi_s)))
+            phi_p = np.arctan2(p[..., 1] - center[:, 1], p[..., 0] - center[:, 0])
+            t_arc = np.angle(np.exp(1j * (phi_p - phi_s))) / np.where(sweep == 0, 1.0, sweep)
+            on_arc = (t_arc >= -1e-9) & (t_arc <= 1.0 + 1e-9)
+            dist_arc = np.where(on_arc, np.abs(np.linalg.norm(p - center, axis=-1) - radius), np.inf)
+
+            dist = np.where(is_arc, dist_arc, dist_line)
+            t = np.where(is_arc, np.clip(t_arc, 0.0, 1.0), t_line)
+            j = np.argmin(dist, axis=1)
+            rows = np.arange(j.shape[0])
+            best[i:i + chunk] = dist[rows, j]
+            index[i:i + chunk] = j
+            param[i:i + chunk] = t[rows, j]
+        return index, param, best <= tol
+
+    def _evaluate(self, index, param, segments):
+        start, end, center = segments
+        s = start[index]
+        e = end[index]
+        c = center[index]
+        t = param[:, None]
+        position = s + t * (e - s)
+        is_arc = ~np.isnan(c[:, 0])
+        if np.any(is_arc):
+            s = s[is_arc]
+            e = e[is_arc]
+            c = c[is_arc]
+            t = param[is_arc]
+            radius = (1.0 - t) * np.linalg.norm(s - c, axis=-1) + t * np.linalg.norm(e - c, axis=-1)
+            phi_s = np.arctan2(s[:, 1] - c[:, 1], s[:, 0] - c[:, 0])
+            phi_e = np.arctan2(e[:, 1] - c[:, 1], e[:, 0] - c[:, 0])
+            phi = phi_s + t * np.angle(np.exp(1j * (phi_e - phi_s)))
+            position[is_arc] = c + radius[:, None] * np.stack((np.cos(phi), np.sin(phi)), axis=-1)
+        return position
+
+    def _get_constrained_nodes(self, mesh, triangles, geometrical):
+        # Nodes on the outer boundary or between different geometrical surfaces
+        edges = np.concatenate((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+        owner = np.tile(geometrical, 3)
+        edges = np.sort(edges, axis=1)
+        unique, inverse, counts = np.unique(edges, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        owner_min = np.full(unique.shape[0], np.iinfo(np.int64).max)
+        owner_max = np.full(unique.shape[0], np.iinfo(np.int64).min)
+        np.minimum.at(owner_min, inverse, owner)
+        np.maximum.at(owner_max, inverse, owner)
+        boundary = (counts == 1) | (owner_min != owner_max)
+        # Diagonals of split quadrangles are never boundaries
+        constrained = np.zeros(mesh.nodes.shape[0], dtype=bool)
+        constrained[unique[boundary].ravel()] = True
+        for etype, (tags, phys, geom, conn) in mesh.elements.items():
+            if etype in (1, 8, 15):
+                constrained[conn.ravel()] = True
+        return constrained
+
+    def morph(self, mesh):
+        # Returns the morphed MeshData, or None when a remesh is required
+        if self.old_segments is None:
+            return None
+        triangles, physical, geometrical = mesh.get_triangles()
+        xy = mesh.nodes[:, :2]
+        constrained = self._get_constrained_nodes(mesh, triangles, geometrical)
+
+        tol = 1e-6 * np.max(np.linalg.norm(xy, axis=1))
+        index, param, found = self._project(xy[constrained], self.old_segments, tol)
+        if not np.all(found):
+            return None
+        displacement = np.zeros_like(xy)
+        displacement[constrained] = self._evaluate(index, param, self.new_segments) - xy[constrained]
+
+        # Interior nodes follow through a harmonic (graph Laplacian) extension
+        free = ~constrained
+        if np.any(free):
+            edges = mesh.get_edges(2)
+            n = xy.shape[0]
+            adjacency = sparse.coo_matrix((np.ones(2 * edges.shape[0]),
+                                           (np.concatenate((edges[:, 0], edges[:, 1])),
+                                            np.concatenate((edges[:, 1], edges[:, 0])))), shape=(n, n)).tocsr()
+            laplacian = sparse.diags(np.asarray(adjacency.sum(axis=1)).ravel()) - adjacency
+            solve = factorized(laplacian[free][:, free].tocsc())
+            rhs = -laplacian[free][:, constrained] @ displacement[constrained]
+            displacement[free, 0] = solve(rhs[:, 0])
+            displacement[free, 1] = solve(rhs[:, 1])
+
+        nodes = mesh.nodes.copy()
+        nodes[:, :2] += displacement
+
+        old_area, old_quality, old_angle = get_element_quality(mesh.nodes, triangles)
+        new_area, new_quality, new_angle = get_element_quality(nodes, triangles)
+        self.quality = np.min(new_quality) if new_quality.shape[0] > 0 else 0.0
+        if np.any(np.sign(old_area) != np.sign(new_area)) or self.quality < self.min_quality:
+            return None
+        return mesh.copy(nodes)
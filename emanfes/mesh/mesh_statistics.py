@@ -0,0 +1,131 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Mesh size and quality statistics.
+"""
+
+# ==========================================================================
+# Program:   mesh_statistics.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Per physical group statistics
+#
+# ==========================================================================
+
+import numpy as np
+
+from emanfes.mesh.mesh_data import GMSH_ELEMENT_DIM
+
+AIRGAP_REGIONS = ('STATOR_AIRGAPS', 'SLIDING_AIRGAPS', 'ROTOR_AIRGAPS')
+
+
+def get_element_quality(nodes, corners):
+    # Shape quality and angles of elements given by their corner nodes.
+    # Triangles: 4*sqrt(3)*area / sum(edge^2), 1 for the equilateral one.
+    # Quadrangles: smallest sine of the corner angles, 1 for rectangles.
+    # Returns (signed area, quality, smallest angle [deg]).
+    p = nodes[corners][..., :2]
+    n = corners.shape[1]
+    edges = np.roll(p, -1, axis=1) - p
+    area = 0.5 * np.sum(p[:, :, 0] * np.roll(p[:, :, 1], -1, axis=1) -
+                        np.roll(p[:, :, 0], -1, axis=1) * p[:, :, 1], axis=1)
+    incoming = -np.roll(edges, 1, axis=1)
+    cos_angle = np.sum(edges * incoming, axis=-1) / np.maximum(
+        np.linalg.norm(edges, axis=-1) * np.linalg.norm(incoming, axis=-1), 1e-300)
+    angles = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+    if n == 3:
+        quality = 4.0 * np.sqrt(3.0) * np.abs(area) / np.sum(edges ** 2, axis=(1, 2))
+    else:
+        quality = np.min(np.sin(np.radians(angles)), axis=1)
+    return area, quality, np.min(angles, axis=1)
+
+
+class MeshStatistics:
+
+    def __init__(self, mesh):
+        self.nodes = int(mesh.node_tags.shape[0])
+        self.elements = 0
+        self.groups = {}
+        self.airgap_layers = 0
+
+        radius = np.linalg.norm(mesh.nodes[:, :2], axis=1)
+        stats = {}
+        for etype, (tags, physical, geometrical, connectivity) in mesh.elements.items():
+            if GMSH_ELEMENT_DIM[etype] != 2:
+                continue
+            corners = connectivity[:, :4] if etype in (3, 10, 16) else connectivity[:, :3]
+            area, quality, min_angle = get_element_quality(mesh.nodes, corners)
+            extent = np.ptp(radius[corners], axis=1)
+            for group in np.unique(physical):
+                mask = physical == group
+                stats.setdefault(group, []).append((corners[mask], quality[mask], min_angle[mask], extent[mask]))
+
+        for group, blocks in stats.items():
+            corners = np.concatenate([b[0].ravel() for b in blocks])
+            quality = np.concatenate([b[1] for b in blocks])
+            min_angle = np.concatenate([b[2] for b in blocks])
+            extent = np.concatenate([b[3] for b in blocks])
+            name = mesh.physical_names.get((2, group), str(group))
+            group_nodes = np.unique(corners)
+            self.groups[name] = {
+                'elements': int(quality.shape[0]),
+                'nodes': int(group_nodes.shape[0]),
+                'min_quality': float(np.min(quality)),
+                'mean_quality': float(np.mean(quality)),
+                'min_angle': float(np.min(min_angle)),
+            }
+            self.elements += quality.shape[0]
+            if name in AIRGAP_REGIONS:
+                # Radial thickness over the typical radial size of one element
+                thickness = np.ptp(radius[group_nodes])
+                layers = int(round(thickness / np.median(extent))) if np.median(extent) > 0 else 0
+                self.groups[name]['layers'] = layers
+                self.airgap_layers += layers
+
+        if self.elements > 0:
+            self.min_quality = min(g['min_quality'] for g in self.groups.values())
+            self.mean_quality = sum(g['mean_quality'] * g['elements'] for g in self.groups.values()) / self.elements
+            self.min_angle = min(g['min_angle'] for g in self.groups.values())
+        else:
+            self.min_quality = 0.0
+            self.mean_quality = 0.0
+            self.min_angle = 0.0
+
+    def to_dict(self):
+        return {'nodes': self.nodes, 'elements': self.elements,
+                'min_quality': self.min_quality, 'mean_quality': self.mean_quality,
+                'min_angle': self.min_angle, 'airgap_layers': self.airgap_layers,
+                'groups': self.groups}
+
+    def report(self):
+        lines = ['%-20s %9s %9s %9s %9s %9s %7s' % ('group', 'elements', 'nodes', 'min q', 'mean q',
+                                                    'min ang', 'layers')]
+        for name in sorted(self.groups):
+            g = self.groups[name]
+            lines.append('%-20s %9d %9d %9.3f %9.3f %9.2f %7s' % (name, g['elements'], g['nodes'], g['min_quality'],
+                                                                 g['mean_quality'], g['min_angle'],
+                                                                 g.get('layers', '')))
+        lines.append('%-20s %9d %9d %9.3f %9.3f %9.2f %7d' % ('TOTAL', self.elements, self.nodes, self.min_quality,
+                                                             self.mean_quality, self.min_angle, self.airgap_layers))
+        return '\n'.join(lines)
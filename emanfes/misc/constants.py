@@ -18,7 +18,7 @@
 # ==========================================================================
 
 import numpy as np
-import fractions
+import math
 
 EMANFES_VERSION__ = 0.1
 
@@ -34,6 +34,7 @@ DEG2RAD = np.pi / 180.0
 RAD2DEG = 180.0 / np.pi
 PI = np.pi
 EL_STEPS = 90
+MORPH_MIN_QUALITY = 0.1
 THETA_e_DEG = np.linspace(0, 360, EL_STEPS)
 THETA_e_RAD = THETA_e_DEG * DEG2RAD
 PI_2by3 = 2.0 * np.pi / 3.0
@@ -44,6 +45,13 @@ K_QD = (2.0 / 3.0) * np.array(([[np.sin(THETA_e_DEG * DEG2RAD),
                                 np.cos((THETA_e_DEG - 120) * DEG2RAD),
                                 np.cos((THETA_e_DEG + 120) * DEG2RAD)]]))
 
+
+def get_k_qd(theta_e_deg):
+    # Same transform as K_QD at arbitrary electrical angles, shape (2, 3, n)
+    theta = np.atleast_1d(theta_e_deg) * DEG2RAD
+    return (2.0 / 3.0) * np.array([[np.sin(theta), np.sin(theta - PI_2by3), np.sin(theta + PI_2by3)],
+                                   [np.cos(theta), np.cos(theta - PI_2by3), np.cos(theta + PI_2by3)]])
+
 IDX_BODY_NAME = 0
 IDX_BODY_ID = 1
 IDX_BODY_EQ = 2
@@ -97,10 +105,20 @@ BODIES = (  ('SLOT_OPENINGS',   '101',  '1',    '1',    '0',    '0'),
             ('MAGNETS20',       '219',  '1',    '25',   '1',    '1')
           )
 
+# Phase bands of the winding, in the order of their body forces
+COIL_REGIONS = ('A_PLUS', 'A_MINUS', 'B_PLUS', 'B_MINUS', 'C_PLUS', 'C_MINUS',
+                'D_PLUS', 'D_MINUS', 'E_PLUS', 'E_MINUS', 'F_PLUS', 'F_MINUS')
+
+# Iron loss coefficients in W/kg of a generic 0.35 mm lamination:
+#   kh * f^alpha * B^beta + kc * (f * B)^2 + ke * (f * B)^1.5
+IRON_LOSS_COEFFICIENTS = {'kh': 0.02, 'alpha': 1.0, 'beta': 2.0, 'kc': 5e-5, 'ke': 5e-4, 'density': 7650.0}
+# Electric conductivity of sintered NdFeB magnets [S/m]
+MAGNET_CONDUCTIVITY = 6.67e5
+
 
 def LCM(a,b):
-    return abs(a * b) / fractions.gcd(a, b) if a and b else 0
+    return abs(a * b) / math.gcd(int(a), int(b)) if a and b else 0
 
 def GCD(a,b):
-    return fractions.gcd(a, b)
+    return math.gcd(int(a), int(b))
 
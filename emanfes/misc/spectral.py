@@ -0,0 +1,74 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    FFT helpers for waveforms sampled over one period.
+"""
+
+# ==========================================================================
+# Program:   spectral.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Spectral time derivative
+#
+# ==========================================================================
+
+import numpy as np
+
+
+def is_periodic(steps, step_angle, tolerance=1e-6):
+    # Whether the steps cover whole electrical periods, last one open
+    turns = steps * step_angle / 360.0
+    return steps > 2 and turns >= 1.0 - tolerance and abs(turns - np.round(turns)) < tolerance
+
+
+def get_spectral_derivative(y, period, axis=-1):
+    """
+        Time derivative of waveforms sampled uniformly over one period
+        [s] along axis, exact for every harmonic below the Nyquist one,
+        which is dropped as its derivative is not defined by the samples.
+    """
+    y = np.asarray(y)
+    n = y.shape[axis]
+    k = np.arange(0, n // 2 + 1)
+    factor = 2j * np.pi * k / period
+    if n % 2 == 0:
+        factor[-1] = 0.0
+    shape = [1] * y.ndim
+    shape[axis] = k.shape[0]
+    return np.fft.irfft(np.fft.rfft(y, axis=axis) * factor.reshape(shape), n=n, axis=axis)
+
+
+def get_time_derivative(y, time_step, step_angle, axis=-1):
+    """
+        Time derivative of waveforms sampled every time_step [s], or
+        step_angle electrical degrees, along axis: spectral when the
+        samples cover whole periods, finite differences otherwise.
+    """
+    y = np.asarray(y)
+    steps = y.shape[axis]
+    if is_periodic(steps, step_angle):
+        return get_spectral_derivative(y, steps * time_step, axis=axis)
+    if steps > 1:
+        return np.gradient(y, time_step, axis=axis)
+    return np.zeros(y.shape)
@@ -0,0 +1,188 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    First order triangle kernels of the 2D magnetic vector potential
+    formulation.
+"""
+
+# ==========================================================================
+# Program:   fem.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Vectorised P1 assembly and constraints
+#  - 10/19/26:  0.1.1              Reluctivity curves and reusable sparsity
+#
+# ==========================================================================
+
+import numpy as np
+from scipy import sparse
+
+from emanfes.misc.constants import MU0
+
+
+def get_gradients(nodes, triangles):
+    # Shape function gradients (E, 3) along x and y, and element areas
+    p = nodes[triangles]
+    x = p[:, :, 0]
+    y = p[:, :, 1]
+    b = np.stack((y[:, 1] - y[:, 2], y[:, 2] - y[:, 0], y[:, 0] - y[:, 1]), axis=-1)
+    c = np.stack((x[:, 2] - x[:, 1], x[:, 0] - x[:, 2], x[:, 1] - x[:, 0]), axis=-1)
+    det = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+    return b / det[:, None], c / det[:, None], 0.5 * np.abs(det)
+
+
+def get_element_matrices(gx, gy, area):
+    # area * grad(Ni) . grad(Nj) of every element, (E, 3, 3)
+    return area[:, None, None] * (gx[:, :, None] * gx[:, None, :] + gy[:, :, None] * gy[:, None, :])
+
+
+class SparsePattern:
+    """
+        CSR structure of the element matrices, computed once so that
+        reassembling a stiffness or Jacobian only sums the new values.
+    """
+
+    def __init__(self, triangles, n):
+        self.n = n
+        rows = np.repeat(triangles, 3, axis=1).ravel()
+        cols = np.tile(triangles, (1, 3)).ravel()
+        keys, self.inverse = np.unique(rows * n + cols, return_inverse=True)
+        self.indices = keys % n
+        self.indptr = np.searchsorted(keys // n, np.arange(0, n + 1))
+
+    def assemble(self, values):
+        data = np.bincount(self.inverse, weights=values.ravel(), minlength=self.indices.shape[0])
+        return sparse.csr_matrix((data, self.indices, self.indptr), shape=(self.n, self.n))
+
+
+class ReluctivityCurve:
+    """
+        Reluctivity nu(B^2) of a B-H curve (rows B and H, as the H-B
+        Curve tables of Elmer) as a monotone cubic, extended above the
+        last point with the slope of the vacuum.
+    """
+
+    def __init__(self, BH):
+        from scipy.interpolate import PchipInterpolator
+        B = np.asarray(BH[0], dtype=float)
+        H = np.asarray(BH[1], dtype=float)
+        positive = B > 0
+        B, index = np.unique(B[positive], return_index=True)
+        H = H[positive][index]
+        nu = H / B
+        self.b_max = B[-1]
+        self.h_max = H[-1]
+        self.spline = PchipInterpolator(np.append(0.0, B ** 2), np.append(nu[0], nu))
+        self.derivative = self.spline.derivative()
+        # Unsaturated steel starts at its initial H/B, below the reluctivity
+        # of the vacuum, and no steel reaches tens of tesla: swapped rows fail
+        if not np.isclose(self.spline(0.0), nu[0]) or nu[0] * MU0 > 1.0 or self.b_max > 10.0:
+            raise ValueError("B-H curve up to {0:g} T starting at nu = {1:g} m/H, expected rows B and H".format(
+                self.b_max, float(self.spline(0.0))))
+
+    def __call__(self, b2):
+        # nu and d(nu)/d(B^2)
+        inside = b2 <= self.b_max ** 2
+        b2_in = np.minimum(b2, self.b_max ** 2)
+        b = np.sqrt(np.maximum(b2, self.b_max ** 2))
+        h = self.h_max + (b - self.b_max) / MU0
+        nu = np.where(inside, self.spline(b2_in), h / b)
+        dnu = np.where(inside, self.derivative(b2_in), (1.0 / MU0 - h / b) / (2.0 * b * b))
+        return nu, dnu
+
+
+def assemble_current(triangles, area, j, n):
+    # Load vector of a uniform current density per element
+    return np.bincount(triangles.ravel(), weights=np.repeat(j * area / 3.0, 3), minlength=n)
+
+
+def assemble_remanence(triangles, gx, gy, area, nu, brx, bry, n):
+    # Load vector of nu * Br . curl(Ni), curl(N) = (dN/dy, -dN/dx)
+    f = (nu * area)[:, None] * (brx[:, None] * gy - bry[:, None] * gx)
+    return np.bincount(triangles.ravel(), weights=f.ravel(), minlength=n)
+
+
+def get_flux_density(triangles, gx, gy, a):
+    # Constant B = (dA/dy, -dA/dx) of every element
+    ae = a[triangles]
+    return np.sum(gy * ae, axis=1), -np.sum(gx * ae, axis=1)
+
+
+def locate_points(points, nodes, triangles, tol=1e-9, chunk=256):
+    # Element containing every point and its barycentric coordinates,
+    # element -1 when the point lies outside the mesh
+    p = nodes[triangles]
+    v0 = p[:, 0, :2]
+    d1 = p[:, 1, :2] - v0
+    d2 = p[:, 2, :2] - v0
+    det = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    element = np.full(points.shape[0], -1, dtype=np.int64)
+    weights = np.zeros((points.shape[0], 3))
+    for i in range(0, points.shape[0], chunk):
+        q = points[i:i + chunk, None, :2] - v0
+        l1 = (q[..., 0] * d2[:, 1] - q[..., 1] * d2[:, 0]) / det
+        l2 = (d1[:, 0] * q[..., 1] - d1[:, 1] * q[..., 0]) / det
+        inside = (l1 >= -tol) & (l2 >= -tol) & (l1 + l2 <= 1.0 + tol)
+        found = np.any(inside, axis=1)
+        first = np.argmax(inside, axis=1)
+        rows = np.arange(q.shape[0])
+        element[i:i + chunk] = np.where(found, first, -1)
+        weights[i:i + chunk] = np.stack((1.0 - l1[rows, first] - l2[rows, first],
+                                         l1[rows, first], l2[rows, first]), axis=-1)
+    return element, weights
+
+
+def get_linear_weights(x, x_query):
+    # Indices and weights of piecewise linear interpolation on sorted x,
+    # extrapolating the end segments
+    i = np.clip(np.searchsorted(x, x_query, side='right') - 1, 0, x.shape[0] - 2)
+    w = (x_query - x[i]) / np.where(x[i + 1] > x[i], x[i + 1] - x[i], 1.0)
+    return i, i + 1, np.clip(w, 0.0, 1.0)
+
+
+def get_constraint_matrix(n, dependent, sources, weights, fixed, max_depth=20):
+    """
+        Maps the free unknowns onto every node. dependent nodes are linear
+        combinations of their sources, which may be dependent themselves
+        (slave corners on sliding boundaries); fixed nodes are zero.
+        Returns the (n, free) sparse matrix and the free node indices.
+    """
+    is_dependent = np.zeros(n, dtype=bool)
+    is_dependent[dependent] = True
+    independent = np.flatnonzero(~is_dependent)
+    rows = np.concatenate((np.repeat(dependent, sources.shape[1]), independent))
+    cols = np.concatenate((sources.ravel(), independent))
+    values = np.concatenate((weights.ravel(), np.ones(independent.shape[0])))
+    step = sparse.csr_matrix((values, (rows, cols)), shape=(n, n))
+    matrix = step
+    for i in range(0, max_depth):
+        if matrix[:, dependent].count_nonzero() == 0:
+            break
+        matrix = step @ matrix
+    else:
+        raise ValueError("Cyclic node constraints")
+    is_free = ~is_dependent
+    is_free[fixed] = False
+    free = np.flatnonzero(is_free)
+    return matrix.tocsc()[:, free].tocsr(), free
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Frozen permeability separation of the magnet and current fluxes of a
+    native nonlinear solve.
+"""
+
+# ==========================================================================
+# Program:   frozen_permeability.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Linear re-solves at the frozen reluctivity
+#
+# ==========================================================================
+
+import concurrent.futures
+import multiprocessing
+
+import numpy as np
+from scipy.sparse.linalg import splu
+
+
+class FrozenPermeability:
+    """
+        Every rotor position of the solver is solved again with the
+        reluctivity of its converged nonlinear solution, once with the
+        magnets alone and once per phase with one ampere in that phase.
+        The secant reluctivity makes the problem linear and the parts add
+        up to the nonlinear potentials. Mesh, element matrices and
+        constraints are those of the solver; each position is one
+        factorisation for all its loads.
+    """
+
+    def __init__(self, solver, reluctivity):
+        self.solver = solver
+        # (steps, elements) reluctivity stored by the nonlinear solve
+        self.reluctivity = reluctivity
+        density = (solver.conductors_per_coil / solver.parallel_paths) / solver.conductor_area
+        # Magnets are linear, their remanence load holds with the frozen
+        # reluctivity. Loads as columns: magnets, then one per phase.
+        self.loads = np.column_stack((solver.remanence, density * solver.phase_loads.T))
+        self.scale = (solver.conductors_per_coil / solver.parallel_paths * solver.stack_length *
+                      solver.fractions / solver.conductor_area)
+
+    def solve_step(self, step):
+        """
+            Flux linkages (phases, 1 + phases) at a rotor position: of the
+            magnets alone in the first column, per ampere of every phase
+            in the next ones.
+        """
+        solver = self.solver
+        T, free = solver.get_constraints(step)
+        stiffness = solver.pattern.assemble(self.reluctivity[step][:, None, None] * solver.element_matrices)
+        lu = splu((T.T @ stiffness @ T).tocsc())
+        a = T @ lu.solve(T.T @ self.loads)
+        return self.scale * (solver.phase_integrals @ a)
+
+    def solve(self, workers=None):
+        """
+            Magnet flux linkages (phases, steps) and inductance matrices
+            (steps, phases, phases) of every position, solved in parallel
+            threads sharing the solver data.
+        """
+        steps = self.reluctivity.shape[0]
+        workers = workers or multiprocessing.cpu_count()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            flux = np.array(list(executor.map(self.solve_step, range(0, steps))))
+        return flux[:, :, 0].T, flux[:, :, 1:]
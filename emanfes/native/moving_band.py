@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Multi position solves of a linear native model through the sliding
+    interface.
+"""
+
+# ==========================================================================
+# Program:   moving_band.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Schur complement on the sliding interface
+#
+# ==========================================================================
+
+import numpy as np
+from scipy import linalg, sparse
+from scipy.sparse.linalg import splu
+
+from emanfes.native.fem import get_constraint_matrix
+
+
+class MovingBand:
+    """
+        Only the coupling of the rotor sliding nodes to the stator arc
+        depends on the rotor position. Stator and rotor are condensed once
+        onto their interface nodes (dense Schur complements of the
+        factorised interiors), so every position costs a dense solve on
+        the stator arc plus two back substitutions.
+    """
+
+    def __init__(self, solver, stiffness, chunk=64):
+        self.solver = solver
+        n = solver.n
+        # Constraints that do not move: Dirichlet and master/slave ties.
+        # Rotor sliding nodes are unknowns here, tied to the arc per position.
+        self.T, free = get_constraint_matrix(n, solver.periodic_nodes, solver.periodic_sources,
+                                             solver.periodic_weights, solver.fixed)
+        self.free = free
+        K = (self.T.T @ stiffness @ self.T).tocsr()
+
+        arc = np.unique(solver.stator_arc)
+        self.arc = np.searchsorted(free, arc[np.isin(arc, free)])
+        self.sliding = np.searchsorted(free, solver.rotor_sliding)
+        is_stator = free < solver.stator_nodes
+        interface = np.zeros(free.shape[0], dtype=bool)
+        interface[self.arc] = True
+        interface[self.sliding] = True
+        self.stator_interior = np.flatnonzero(is_stator & ~interface)
+        self.rotor_interior = np.flatnonzero(~is_stator & ~interface)
+
+        self.stator = self._condense(K, self.stator_interior, self.arc, chunk)
+        self.rotor = self._condense(K, self.rotor_interior, self.sliding, chunk)
+
+    def _condense(self, K, interior, boundary, chunk):
+        # Factorised interior, couplings and Schur complement on the boundary
+        K_ii = K[interior][:, interior].tocsc()
+        K_ib = K[interior][:, boundary].tocsc()
+        K_bi = K[boundary][:, interior].tocsr()
+        lu = splu(K_ii)
+        schur = K[boundary][:, boundary].toarray()
+        for j in range(0, boundary.shape[0], chunk):
+            schur[:, j:j + chunk] -= K_bi @ lu.solve(K_ib[:, j:j + chunk].toarray())
+        return {'interior': interior, 'boundary': boundary, 'lu': lu, 'K_ib': K_ib, 'K_bi': K_bi,
+                'schur': schur}
+
+    def _get_coupling(self, rotation):
+        # Rotor sliding unknowns as combinations of the stator arc ones
+        sources, weights = self.solver._get_sliding_constraints(rotation)
+        rows = np.repeat(np.arange(sources.shape[0]), sources.shape[1])
+        W = sparse.csr_matrix((weights.ravel(), (rows, sources.ravel())),
+                              shape=(sources.shape[0], self.solver.n)) @ self.T
+        return W.tocsc()[:, self.arc].tocsr()
+
+    def _reduce(self, part, f):
+        # Load condensed on the boundary and interior solution without it
+        u = part['lu'].solve(f[part['interior']])
+        return f[part['boundary']] - part['K_bi'] @ u, u
+
+    def solve(self, rotation, f):
+        """
+            Nodal potentials for the rotor at rotation [rad] under the
+            nodal load f.
+        """
+        f = self.T.T @ f
+        W = self._get_coupling(rotation)
+        g_s, u_s = self._reduce(self.stator, f)
+        g_r, u_r = self._reduce(self.rotor, f)
+        # W has two entries per row, keep it sparse on both sides
+        WS = W.T @ self.rotor['schur']
+        S = self.stator['schur'] + (W.T @ WS.T).T
+        x_arc = linalg.solve(S, g_s + W.T @ g_r, assume_a='sym')
+        x_sliding = W @ x_arc
+
+        x = np.zeros(self.free.shape[0])
+        x[self.arc] = x_arc
+        x[self.sliding] = x_sliding
+        x[self.stator_interior] = u_s - self.stator['lu'].solve(self.stator['K_ib'] @ x_arc)
+        x[self.rotor_interior] = u_r - self.rotor['lu'].solve(self.rotor['K_ib'] @ x_sliding)
+        return self.T @ x
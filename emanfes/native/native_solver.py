@@ -0,0 +1,532 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Creates the native magnetostatic solver.
+"""
+
+# ==========================================================================
+# Program:   native_solver.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Linear in-process solver on the Gmsh mesh
+#  - 10/19/26:  0.1.1              Newton iterations on the B-H curves
+#  - 10/19/26:  0.1.1              Linear positions through the moving band
+#
+# ==========================================================================
+
+import logging
+
+import numpy as np
+from scipy.sparse.linalg import splu
+
+from emanfes.geogmsh import GeometryGmsh
+from emanfes.misc.constants import *
+from emanfes.native.fem import (ReluctivityCurve, SparsePattern, assemble_current, assemble_remanence,
+                                get_constraint_matrix, get_element_matrices, get_flux_density, get_gradients,
+                                get_linear_weights, locate_points)
+from emanfes.native.frozen_permeability import FrozenPermeability
+from emanfes.native.moving_band import MovingBand
+
+logger = logging.getLogger(__name__)
+
+# Material of every body, as numbered in BODIES
+BODY_MATERIALS = {item[IDX_BODY_NAME]: int(item[IDX_BODY_MAT]) for item in BODIES}
+STATOR_STEEL = 3
+ROTOR_STEEL = 4
+PM_FIRST = 6
+# Stator bodies where the air gap field is sampled
+AIRGAP_BODIES = ('STATOR_AIRGAPS', 'SLIDING_AIRGAPS', 'SLOT_OPENINGS')
+
+
+def get_linear_permeability(BH):
+    # Largest relative permeability of a B-H curve (rows B and H), as
+    # written in the H-B Curve tables of Elmer
+    B = BH[0]
+    H = BH[1]
+    return np.max(B[H > 0] / (MU0 * H[H > 0]))
+
+
+class NativeSolver:
+    """
+        Magnetostatic A formulation on first order triangles solved with
+        scipy, straight from the Gmsh meshes kept in memory. Steels follow
+        their B-H curves through Newton iterations, or stay linear with
+        their unsaturated permeability when native.nonlinear is false.
+        Periodic and sliding interfaces are tied by interpolation of the
+        nodal potentials.
+    """
+
+    def __init__(self, simulation, rotating_machine):
+        # Meshes stay in memory
+        simulation.mesh_write = False
+        self.gmsh_model = GeometryGmsh(simulation, rotating_machine)
+        self.pp = rotating_machine.rotor.pp
+        self.wm = simulation.load_speed
+        self.br_pm = rotating_machine.rotor.magnets[0].material.Br
+        self.mur_pm = rotating_machine.rotor.magnets[0].material.mur
+        if rotating_machine.get_machine_type() == "SPM":
+            if rotating_machine.rotor.mode == 'inner':
+                self.r_ag1 = rotating_machine.rotor.outer_radius + rotating_machine.rotor.magnets[0].length
+                self.r_ag2 = rotating_machine.stator.inner_radius
+            else:
+                self.r_ag1 = rotating_machine.stator.outer_radius
+                self.r_ag2 = rotating_machine.rotor.inner_radius - rotating_machine.rotor.magnets[0].length
+        else:
+            if rotating_machine.rotor.mode == 'inner':
+                self.r_ag1 = rotating_machine.rotor.outer_radius
+                self.r_ag2 = rotating_machine.stator.inner_radius
+            else:
+                self.r_ag2 = rotating_machine.rotor.inner_radius
+                self.r_ag1 = rotating_machine.stator.outer_radius
+
+        self.r_middle_ag = (self.r_ag1 + self.r_ag2) / 2.0
+        self.stack_length = (rotating_machine.rotor.stack_length + rotating_machine.stator.stack_length) / 2.0
+        self.stator_axis = rotating_machine.stator.winding.get_armature_a_axis()
+        self.conductor_area = 1.0
+        self.conductors_per_coil = 20
+        self.parallel_paths = 3
+
+        self.load_current = simulation.load_current if simulation.solve_load else 0.0
+        self.load_gamma = simulation.load_gamma
+
+        Fe = (self.wm * self.pp) / 60.0
+        T = 1.0 / Fe
+        self.step_angle = simulation.step_angle
+        self.time_step = T * self.step_angle / 360.0
+        self.steps = simulation.time_steps
+        self.fractions = self.gmsh_model.get_fractions_drawn()
+        self.magnets_per_pole = rotating_machine.rotor.magnets[0].magnets_per_pole
+        self.magnets_drawn = self.magnets_per_pole * int(2 * self.pp / self.fractions)
+        self.magnets_magnetisation = rotating_machine.rotor.magnets[0].magnetisation
+        self.is_even = self.magnets_drawn % 2 == 0
+        self.magnetisation_angle = []
+        for i in range(0, self.magnets_drawn):
+            self.magnetisation_angle.append(
+                rotating_machine.rotor.magnets[0].mag_angle[i % self.magnets_per_pole])
+
+        self.stator_steel_BH = np.array(rotating_machine.stator.material.BH)
+        self.rotor_steel_BH = np.array(rotating_machine.rotor.material.BH)
+        self.stator_mur = get_linear_permeability(self.stator_steel_BH)
+        self.rotor_mur = get_linear_permeability(self.rotor_steel_BH)
+        self.nonlinear = simulation.native_nonlinear
+        self.tolerance = simulation.native_tolerance
+        self.max_iterations = simulation.native_max_iterations
+        self.frozen_permeability = simulation.native_frozen_permeability
+        self.workers = simulation.native_workers
+        self.workdir = simulation.workdir
+        self.nonlinear_iterations = None
+        self.coils = []
+        self.mesh_statistics = {}
+        self.error = None
+
+    def create(self):
+        return self.gmsh_model.create()
+
+    def get_mesh_statistics(self):
+        return self.gmsh_model.get_mesh_statistics()
+
+    def get_stage_outputs(self, stage):
+        return []
+
+    def _get_part(self, mesh, offset):
+        # Linear triangles of a part renumbered over the nodes they use
+        triangles, physical, geometrical = mesh.get_triangles()
+        used = np.unique(triangles)
+        index = np.full(mesh.nodes.shape[0], -1, dtype=np.int64)
+        index[used] = offset + np.arange(used.shape[0])
+        names = np.array([mesh.physical_names.get((2, t), '') for t in physical])
+        return {'mesh': mesh, 'index': index, 'nodes': mesh.nodes[used, :2],
+                'triangles': index[triangles], 'names': names}
+
+    def _get_boundary_nodes(self, part, name):
+        nodes = part['index'][part['mesh'].get_physical_nodes(name)]
+        return nodes[nodes >= 0]
+
+    def _get_sector_start(self, angles):
+        # First angle of a sector arc, after the largest gap between nodes
+        if self.fractions == 1:
+            return 0.0
+        a = np.sort(np.mod(angles, 2.0 * PI))
+        gaps = np.diff(np.append(a, a[0] + 2.0 * PI))
+        return a[(np.argmax(gaps) + 1) % a.shape[0]]
+
+    def _get_arc(self, nodes, coordinates):
+        # Nodes of an arc sorted by angle from the start of the sector
+        angles = np.arctan2(coordinates[nodes, 1], coordinates[nodes, 0])
+        start = self._get_sector_start(angles)
+        alpha = np.mod(angles - start + 1e-9, 2.0 * PI) - 1e-9
+        order = np.argsort(alpha)
+        nodes = nodes[order]
+        alpha = alpha[order]
+        if self.fractions == 1:
+            nodes = np.append(nodes, nodes[0])
+            alpha = np.append(alpha, alpha[0] + 2.0 * PI)
+        return nodes, alpha, start
+
+    def _get_periodic_constraints(self, part, coordinates, fixed):
+        # Slave nodes follow the master node at the same radius, one sector back
+        master = self._get_boundary_nodes(part, part['prefix'] + '_MASTER_BOUNDARY')
+        slave = self._get_boundary_nodes(part, part['prefix'] + '_SLAVE_BOUNDARY')
+        slave = slave[~np.isin(slave, np.concatenate((master, fixed)))]
+        if master.shape[0] < 2 or slave.shape[0] == 0:
+            return slave[:0], np.zeros((0, 2), dtype=np.int64), np.zeros((0, 2))
+        r_master = np.linalg.norm(coordinates[master], axis=1)
+        order = np.argsort(r_master)
+        i0, i1, w = get_linear_weights(r_master[order], np.linalg.norm(coordinates[slave], axis=1))
+        sign = 1.0 if self.is_even else -1.0
+        sources = np.stack((master[order][i0], master[order][i1]), axis=-1)
+        return slave, sources, sign * np.stack((1.0 - w, w), axis=-1)
+
+    def mesh(self):
+        stator_mesh = getattr(self.gmsh_model.stator, 'mesh_data', None)
+        rotor_mesh = getattr(self.gmsh_model.rotor, 'mesh_data', None)
+        if stator_mesh is None or rotor_mesh is None:
+            self.error = "Native solver needs the meshes of create()"
+            logger.error(self.error)
+            return False
+        self.mesh_statistics = {k: v.to_dict() for k, v in self.get_mesh_statistics().items()}
+
+        stator = self._get_part(stator_mesh, 0)
+        rotor = self._get_part(rotor_mesh, stator['nodes'].shape[0])
+        stator['prefix'] = 'STATOR'
+        rotor['prefix'] = 'ROTOR'
+        self.stator_nodes = stator['nodes'].shape[0]
+        self.n = self.stator_nodes + rotor['nodes'].shape[0]
+        coordinates = np.concatenate((stator['nodes'], rotor['nodes']))
+        self.coordinates = coordinates
+        self.triangles = np.concatenate((stator['triangles'], rotor['triangles']))
+        self.names = np.concatenate((stator['names'], rotor['names']))
+        self.stator_elements = stator['triangles'].shape[0]
+        self.gx, self.gy, self.area = get_gradients(coordinates, self.triangles)
+
+        # Reluctivity and sources in the local frame of every part
+        material = np.array([BODY_MATERIALS.get(name, 1) for name in self.names])
+        mur = np.ones(material.shape[0])
+        mur[material == STATOR_STEEL] = self.stator_mur
+        mur[material == ROTOR_STEEL] = self.rotor_mur
+        mur[material >= PM_FIRST] = self.mur_pm
+        self.nu = 1.0 / (MU0 * mur)
+        self.element_matrices = get_element_matrices(self.gx, self.gy, self.area)
+        self.pattern = SparsePattern(self.triangles, self.n)
+        self.stiffness = self.pattern.assemble(self.nu[:, None, None] * self.element_matrices)
+        self.steels = [(material == STATOR_STEEL, ReluctivityCurve(self.stator_steel_BH)),
+                       (material == ROTOR_STEEL, ReluctivityCurve(self.rotor_steel_BH))]
+        self.remanence = self._get_remanence()
+
+        self.coils = [k for k in COIL_REGIONS if np.any(self.names == k)]
+        coil_side_area = self.gmsh_model.get_coil_side_area()
+        if coil_side_area:
+            self.conductor_area = coil_side_area
+        self.phase_loads = []
+        self.phase_integrals = []
+        for phase in ('A', 'B', 'C', 'D', 'E', 'F'):
+            if phase + '_PLUS' not in self.coils and phase + '_MINUS' not in self.coils:
+                break
+            sign = (self.names == phase + '_PLUS').astype(float) - (self.names == phase + '_MINUS')
+            self.phase_loads.append(assemble_current(self.triangles, self.area, sign, self.n))
+            # Integral of A over the plus bands minus the minus ones
+            self.phase_integrals.append(np.bincount(self.triangles.ravel(), weights=np.repeat(sign * self.area / 3.0, 3),
+                                                    minlength=self.n))
+        self.phase_loads = np.array(self.phase_loads).reshape(-1, self.n)
+        self.phase_integrals = np.array(self.phase_integrals).reshape(-1, self.n)
+
+        # Constraints fixed for every rotor position
+        self.fixed = np.concatenate((self._get_boundary_nodes(stator, 'OUTER_STATOR_BOUNDARY'),
+                                     self._get_boundary_nodes(rotor, 'OUTER_ROTOR_BOUNDARY')))
+        periodic = [self._get_periodic_constraints(part, coordinates, self.fixed) for part in (stator, rotor)]
+        self.periodic_nodes = np.concatenate([p[0] for p in periodic])
+        self.periodic_sources = np.concatenate([p[1] for p in periodic])
+        self.periodic_weights = np.concatenate([p[2] for p in periodic])
+
+        self.stator_arc, self.stator_arc_alpha, self.stator_arc_start = self._get_arc(
+            self._get_boundary_nodes(stator, 'STATOR_SLIDING_BOUNDARY'), coordinates)
+        sliding = self._get_boundary_nodes(rotor, 'ROTOR_SLIDING_BOUNDARY')
+        self.rotor_sliding = sliding[~np.isin(sliding, np.concatenate((self.periodic_nodes, self.fixed)))]
+        if self.stator_arc.shape[0] < 2 or self.rotor_sliding.shape[0] == 0:
+            self.error = "Sliding boundaries missing in the mesh"
+            logger.error(self.error)
+            return False
+
+        self._set_airgap_samples(stator)
+        self._set_torque_elements()
+        return True
+
+    def _get_remanence(self):
+        # Magnet load vector in the rotor frame
+        brx = np.zeros(self.names.shape[0])
+        bry = np.zeros(self.names.shape[0])
+        centroid = np.mean(self.coordinates[self.triangles], axis=1)
+        for m in range(1, self.magnets_drawn + 1):
+            in_magnet = self.names == "MAGNETS%d" % m
+            if not np.any(in_magnet):
+                continue
+            k = int((m - 1) / self.magnets_per_pole)
+            if self.magnets_magnetisation in ("parallel", "perpendicular"):
+                direction = np.full(np.count_nonzero(in_magnet),
+                                    k * PI / self.pp + k * PI + self.magnetisation_angle[m - 1] * DEG2RAD)
+            elif self.magnets_magnetisation == "radial":
+                direction = np.arctan2(centroid[in_magnet, 1], centroid[in_magnet, 0]) + (m - 1) * PI
+            else:
+                continue
+            brx[in_magnet] = self.br_pm * np.cos(direction)
+            bry[in_magnet] = self.br_pm * np.sin(direction)
+        return assemble_remanence(self.triangles, self.gx, self.gy, self.area, self.nu, brx, bry, self.n)
+
+    def _set_airgap_samples(self, stator):
+        # Points on the stator air gap arc, located once in the stator mesh
+        arc = self._get_boundary_nodes(stator, 'STATOR_AIRGAP_ARC_BOUNDARY')
+        arc_nodes, alpha, start = self._get_arc(arc, self.coordinates)
+        radius = np.mean(np.linalg.norm(self.coordinates[arc], axis=1))
+        self.airgap_theta = start + np.linspace(alpha[0], alpha[-1], num=int(720 / self.fractions))
+        points = radius * np.stack((np.cos(self.airgap_theta), np.sin(self.airgap_theta)), axis=-1)
+        candidates = np.flatnonzero(np.isin(self.names[:self.stator_elements], AIRGAP_BODIES))
+        element, weights = locate_points(points, self.coordinates, self.triangles[candidates])
+        if np.any(element < 0):
+            logger.warning("%d air gap points outside the stator mesh", np.count_nonzero(element < 0))
+        self.airgap_elements = np.where(element >= 0, candidates[np.maximum(element, 0)], -1)
+
+    def _set_torque_elements(self):
+        # Rotor air gap annulus of the Arkkio torque
+        self.torque_elements = np.flatnonzero(self.names == 'ROTOR_AIRGAPS')
+        self.torque_elements = self.torque_elements[self.torque_elements >= self.stator_elements]
+        r = np.linalg.norm(self.coordinates[self.triangles[self.torque_elements]], axis=-1)
+        self.torque_r1 = np.min(r)
+        self.torque_r2 = np.max(r)
+
+    def _get_sliding_constraints(self, rotation):
+        # Rotor sliding nodes interpolated on the stator arc, mapped into
+        # the drawn sector with the sign of the (anti)periodicity
+        sector = 2.0 * PI / self.fractions
+        p = self.coordinates[self.rotor_sliding]
+        beta = np.mod(np.arctan2(p[:, 1], p[:, 0]) + rotation - self.stator_arc_start, 2.0 * PI)
+        shift = np.floor(beta / sector + 1e-12)
+        beta = beta - shift * sector
+        sign = np.where(np.mod(shift, 2) == 0, 1.0, 1.0 if self.is_even else -1.0)
+        i0, i1, w = get_linear_weights(self.stator_arc_alpha, beta)
+        sources = np.stack((self.stator_arc[i0], self.stator_arc[i1]), axis=-1)
+        return sources, sign[:, None] * np.stack((1.0 - w, w), axis=-1)
+
+    def get_rotor_angle(self, step):
+        # Rotor position of a time step [rad], as moved by RigidMeshMapper
+        return (self.stator_axis + step * self.step_angle / self.pp) * DEG2RAD
+
+    def get_phase_currents(self, step):
+        theta_e = step * self.step_angle * DEG2RAD
+        shift = np.arange(0, self.phase_loads.shape[0]) * 2.0 * PI / 3.0
+        return self.load_current * np.sin(theta_e - shift + self.load_gamma * DEG2RAD)
+
+    def get_load(self, step):
+        density = (self.conductors_per_coil / self.parallel_paths) / self.conductor_area
+        return self.remanence + density * (self.get_phase_currents(step) @ self.phase_loads)
+
+    def get_constraints(self, step):
+        sources, weights = self._get_sliding_constraints(self.get_rotor_angle(step))
+        return get_constraint_matrix(self.n, np.concatenate((self.periodic_nodes, self.rotor_sliding)),
+                                     np.concatenate((self.periodic_sources, sources)),
+                                     np.concatenate((self.periodic_weights, weights)), self.fixed)
+
+    def _get_reluctivity(self, a):
+        # Element matrices times the potentials, reluctivity and its
+        # derivative on B^2 at the current solution
+        ae = a[self.triangles]
+        ma = np.einsum('eij,ej->ei', self.element_matrices, ae)
+        b2 = np.einsum('ei,ei->e', ae, ma) / self.area
+        nu = self.nu.copy()
+        dnu = np.zeros(nu.shape[0])
+        for mask, curve in self.steels:
+            nu[mask], dnu[mask] = curve(b2[mask])
+        return ma, nu, dnu
+
+    def _get_residual(self, T, f, a):
+        ma, nu, dnu = self._get_reluctivity(T @ a)
+        r = np.bincount(self.triangles.ravel(), weights=(nu[:, None] * ma).ravel(), minlength=self.n)
+        return T.T @ (r - f), ma, nu, dnu
+
+    def _get_jacobian(self, T, ma, nu, dnu):
+        values = (nu[:, None, None] * self.element_matrices +
+                  (2.0 * dnu / self.area)[:, None, None] * ma[:, :, None] * ma[:, None, :])
+        return splu((T.T @ self.pattern.assemble(values) @ T).tocsc())
+
+    def _solve_newton(self, T, f, a):
+        """
+            Newton iterations with backtracking line search. The factorised
+            Jacobian is kept while the residual keeps falling fast and only
+            refreshed when convergence slows down or the line search fails.
+        """
+        R, ma, nu, dnu = self._get_residual(T, f, a)
+        reference = max(np.linalg.norm(T.T @ f), np.linalg.norm(R), 1e-30)
+        lu = None
+        fresh = False
+        for iteration in range(1, self.max_iterations + 1):
+            if lu is None:
+                lu = self._get_jacobian(T, ma, nu, dnu)
+                fresh = True
+            delta = lu.solve(-R)
+            norm = np.linalg.norm(R)
+            alpha = 1.0
+            for i in range(0, 10):
+                R_new, ma_new, nu_new, dnu_new = self._get_residual(T, f, a + alpha * delta)
+                if np.linalg.norm(R_new) <= (1.0 - 1e-4 * alpha) * norm:
+                    break
+                alpha *= 0.5
+            else:
+                if not fresh:
+                    # Outdated Jacobian, retry from the same point
+                    lu = None
+                    continue
+            a = a + alpha * delta
+            R, ma, nu, dnu = R_new, ma_new, nu_new, dnu_new
+            self.nonlinear_iterations += 1
+            if (np.linalg.norm(R) <= self.tolerance * reference or
+                    alpha * np.linalg.norm(delta) <= self.tolerance * np.linalg.norm(a)):
+                return a
+            if np.linalg.norm(R) > 0.25 * norm:
+                lu = None
+            fresh = False
+        logger.warning("Newton iterations not converged, residual %g", np.linalg.norm(R) / reference)
+        return a
+
+    def solve(self):
+        self.potentials = np.zeros((self.steps, self.n))
+        self.nonlinear_iterations = 0 if self.nonlinear else None
+        # Reluctivity of every position, kept for the frozen permeability
+        self.reluctivity = np.tile(self.nu, (self.steps, 1)) if self.frozen_permeability else None
+        previous = np.zeros(self.n)
+        try:
+            if not self.nonlinear:
+                # Stator and rotor factorised once for every position
+                band = MovingBand(self, self.stiffness)
+            for step in range(0, self.steps):
+                if self.nonlinear:
+                    # Starts from the previous rotor position
+                    T, free = self.get_constraints(step)
+                    self.potentials[step] = T @ self._solve_newton(T, self.get_load(step), previous[free])
+                    if self.frozen_permeability:
+                        self.reluctivity[step] = self._get_reluctivity(self.potentials[step])[1]
+                else:
+                    self.potentials[step] = band.solve(self.get_rotor_angle(step), self.get_load(step))
+                previous = self.potentials[step]
+        except (ValueError, RuntimeError) as err:
+            self.error = "Native solver failed: {0}".format(err)
+            logger.error(self.error)
+            return False
+        return True
+
+    def get_flux_density(self, step):
+        # Element flux density in the global frame
+        bx, by = get_flux_density(self.triangles, self.gx, self.gy, self.potentials[step])
+        rotation = self.get_rotor_angle(step)
+        rotor = np.arange(self.triangles.shape[0]) >= self.stator_elements
+        c = np.where(rotor, np.cos(rotation), 1.0)
+        s = np.where(rotor, np.sin(rotation), 0.0)
+        return c * bx - s * by, s * bx + c * by
+
+    def get_torque(self, step):
+        # Arkkio torque over the rotor air gap annulus
+        e = self.torque_elements
+        bx, by = get_flux_density(self.triangles[e], self.gx[e], self.gy[e], self.potentials[step])
+        centroid = np.mean(self.coordinates[self.triangles[e]], axis=1)
+        r = np.linalg.norm(centroid, axis=1)
+        theta = np.arctan2(centroid[:, 1], centroid[:, 0])
+        br = bx * np.cos(theta) + by * np.sin(theta)
+        bt = -bx * np.sin(theta) + by * np.cos(theta)
+        return (self.fractions * self.stack_length / (MU0 * (self.torque_r2 - self.torque_r1)) *
+                np.sum(r * br * bt * self.area[e]))
+
+    def post_processing(self):
+        from emanfes.results import Result
+        res = Result()
+        res.mesh_statistics = self.mesh_statistics
+
+        x_axis = np.linspace(0, self.time_step * self.steps, self.steps)
+        res.cogging_torque_x = x_axis
+        res.cogging_torque_y = np.array([self.get_torque(step) for step in range(0, self.steps)])
+        if self.load_current != 0:
+            res.torque_ripple_x = x_axis
+            res.torque_ripple_y = res.cogging_torque_y
+
+        if self.phase_integrals.shape[0] > 0:
+            turns = self.conductors_per_coil / self.parallel_paths
+            flux_linkage = (turns * self.stack_length * self.fractions / self.conductor_area *
+                            (self.phase_integrals @ self.potentials.T))
+            theta_e = np.arange(0, self.steps) * self.step_angle
+            if self.load_current == 0:
+                res.nl_flux_linkage_x = theta_e
+                res.nl_flux_linkage_y = flux_linkage
+            else:
+                res.ol_flux_linkage_x = theta_e
+                res.ol_flux_linkage_y = flux_linkage
+                res.phase_current_x = theta_e
+                res.phase_current_y = np.array([self.get_phase_currents(step) for step in range(0, self.steps)]).T
+
+        found = self.airgap_elements >= 0
+        e = np.maximum(self.airgap_elements, 0)
+        Br = np.zeros((self.steps, e.shape[0]))
+        Bt = np.zeros((self.steps, e.shape[0]))
+        c = np.cos(self.airgap_theta)
+        s = np.sin(self.airgap_theta)
+        for step in range(0, self.steps):
+            bx, by = get_flux_density(self.triangles[e], self.gx[e], self.gy[e], self.potentials[step])
+            Br[step] = np.where(found, bx * c + by * s, 0.0)
+            Bt[step] = np.where(found, -bx * s + by * c, 0.0)
+
+        # Trapezoidal rule, as the Elmer post processing
+        d_theta = self.airgap_theta[1] - self.airgap_theta[0]
+        f = Br * Bt
+        res.cogging_torque_mst_x = x_axis
+        res.cogging_torque_mst_y = ((self.stack_length * (self.r_middle_ag ** 2) / MU0) * self.fractions *
+                                    d_theta * (np.sum(f, axis=1) - 0.5 * (f[:, 0] + f[:, -1])))
+        res.nl_Bg_r = Br
+        res.nl_Bg_t = Bt
+        res.nl_Bg_theta = self.airgap_theta
+        if self.frozen_permeability and self.phase_integrals.shape[0] == 3:
+            self._set_frozen_results(res)
+        return res
+
+    def _set_frozen_results(self, res):
+        # Magnet flux, inductances and torque components at the frozen
+        # reluctivity of the solved positions
+        from emanfes.postprocessing import abc_to_dq, get_dq_inductance_matrix, get_dq_torque
+        try:
+            magnet_flux, inductance = FrozenPermeability(self, self.reluctivity).solve(self.workers)
+        except (ValueError, RuntimeError) as err:
+            logger.warning("Frozen permeability not solved: %s", err)
+            return
+        theta_e = np.arange(0, self.steps) * self.step_angle
+        psi_d, psi_q = abc_to_dq(theta_e, magnet_flux)
+        Ld, Lq = get_dq_inductance_matrix(inductance, theta_e)
+        currents = np.array([self.get_phase_currents(step) for step in range(0, self.steps)]).T
+        i_d, i_q = abc_to_dq(theta_e, currents)
+        res.fp_magnet_flux_linkage_x = theta_e
+        res.fp_magnet_flux_linkage_y = magnet_flux
+        res.fp_inductance = np.mean(inductance, axis=0)
+        res.fp_Ld_y = Ld
+        res.fp_Lq_y = Lq
+        res.fp_pm_torque_y = get_dq_torque(psi_d, psi_q, i_d, i_q, self.pp)
+        res.fp_reluctance_torque_y = get_dq_torque(Ld * i_d, Lq * i_q, i_d, i_q, self.pp)
+        res.magnet_flux = float(np.mean(psi_d))
+        res.Lmd = float(np.mean(Ld))
+        res.Lmq = float(np.mean(Lq))
+        res.self_inductance = float(np.mean(np.diagonal(res.fp_inductance)))
+        res.mutual_inductance = float(np.mean(res.fp_inductance[~np.eye(3, dtype=bool)]))
@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Phase flux linkages, back emf and dq quantities of the windings.
+"""
+
+# ==========================================================================
+# Program:   emf.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Flux linkage, back emf and dq fluxes
+#
+# ==========================================================================
+
+import numpy as np
+
+from emanfes.misc.constants import get_k_qd
+from emanfes.misc.spectral import get_time_derivative
+
+PHASES = ('A', 'B', 'C', 'D', 'E', 'F')
+
+
+def get_phase_signs(coils):
+    """
+        (phases, coils) matrix with +1 on the PLUS and -1 on the MINUS
+        band of every phase, for the phases found in the coil names.
+    """
+    phases = [p for p in PHASES if p + '_PLUS' in coils or p + '_MINUS' in coils]
+    signs = np.zeros((len(phases), len(coils)))
+    for i, p in enumerate(phases):
+        for j, k in enumerate(coils):
+            if k == p + '_PLUS':
+                signs[i, j] = 1.0
+            elif k == p + '_MINUS':
+                signs[i, j] = -1.0
+    return signs
+
+
+def get_phase_flux_linkage(integrals, coils, scale):
+    # Flux linkages (phases, steps) from the integrals of A (coils, steps)
+    # over the coil regions; scale is turns * depth / conductor area
+    return scale * (get_phase_signs(coils) @ np.atleast_2d(integrals))
+
+
+def get_back_emf(flux_linkage, time_step, step_angle):
+    """
+        Back emf (phases, steps) of the flux linkages sampled every
+        time_step [s], or step_angle electrical degrees. Steps covering
+        whole periods are differentiated in the frequency domain, any
+        other waveform by finite differences.
+    """
+    return get_time_derivative(np.atleast_2d(flux_linkage), time_step, step_angle, axis=-1)
+
+
+def abc_to_dq(theta_e_deg, abc):
+    # abc: (3, n) phase quantities at the electrical angles theta_e_deg,
+    # returns (d, q) arrays using the K_QD transform
+    k = get_k_qd(theta_e_deg)
+    qd = np.einsum('ijn,jn->in', k, np.asarray(abc)[:3])
+    return qd[1], qd[0]
+
+
+def get_magnet_flux(flux_linkage, theta_e_deg):
+    # Magnet flux linkage, mean d axis flux at no load
+    psi_d, psi_q = abc_to_dq(theta_e_deg, flux_linkage)
+    return float(np.mean(psi_d))
+
+
+def get_dq_inductances(flux_linkage, currents, theta_e_deg, magnet_flux=None, tolerance=1e-6):
+    """
+        Apparent d and q axis inductances of a loaded solve from the mean
+        dq flux linkages and currents over the positions. Ld needs the
+        magnet flux of the machine; either one is None when its axis
+        carries no current.
+    """
+    psi_d, psi_q = abc_to_dq(theta_e_deg, flux_linkage)
+    i_d, i_q = abc_to_dq(theta_e_deg, currents)
+    psi_d, psi_q, i_d, i_q = np.mean(psi_d), np.mean(psi_q), np.mean(i_d), np.mean(i_q)
+    current = max(np.hypot(i_d, i_q), tolerance)
+    Ld = None
+    if magnet_flux is not None and abs(i_d) > tolerance * current:
+        Ld = float((psi_d - magnet_flux) / i_d)
+    Lq = float(psi_q / i_q) if abs(i_q) > tolerance * current else None
+    return Ld, Lq
+
+
+def get_dq_inductance_matrix(inductance, theta_e_deg):
+    """
+        d and q axis inductances (steps,) of the phase inductance matrices
+        (steps, 3, 3) at the electrical angles theta_e_deg, through K_QD
+        and its inverse 3/2 * K_QD^T.
+    """
+    k = get_k_qd(theta_e_deg)
+    ldq = np.einsum('ijn,njk,lkn->nil', k, np.asarray(inductance)[:, :3, :3], 1.5 * k)
+    return ldq[:, 1, 1], ldq[:, 0, 0]
+
+
+def get_dq_torque(psi_d, psi_q, i_d, i_q, pp):
+    # Electromagnetic torque of the dq fluxes and currents
+    return 1.5 * pp * (np.asarray(psi_d) * i_q - np.asarray(psi_q) * i_d)
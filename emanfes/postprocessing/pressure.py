@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Radial Maxwell pressure of the air gap and its space-time harmonics.
+"""
+
+# ==========================================================================
+# Program:   pressure.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Space-time pressure harmonics
+#
+# ==========================================================================
+
+import numpy as np
+
+from emanfes.misc.constants import MU0, PI
+
+
+def get_radial_pressure(Br, Bt):
+    # Radial Maxwell pressure [Pa], positive pulling the stator inwards
+    return (np.asarray(Br) ** 2 - np.asarray(Bt) ** 2) / (2.0 * MU0)
+
+
+def get_pressure_harmonics(pressure, theta, time_step, harmonics=10):
+    """
+        Largest space-time harmonics of the pressure (steps, angles)
+        sampled at the angles theta [rad] over one sector and every
+        time_step [s] over one period. Returns (harmonics, 3) rows of
+        spatial order r, frequency f [Hz] and amplitude [Pa] of the waves
+        A * cos(2*pi*f*t - r*theta + phi), r > 0 turning forwards. The
+        last angle closes the sector and is left out of the transform.
+    """
+    p = np.asarray(pressure)[:, :-1]
+    d_theta = theta[1] - theta[0]
+    steps, angles = p.shape
+    P = np.fft.fft2(p) / (steps * angles)
+    frequency = np.fft.fftfreq(steps, d=time_step)
+    order = 0.0 - np.round(2.0 * PI * np.fft.fftfreq(angles, d=d_theta))
+    f, r = np.meshgrid(frequency, order, indexing='ij')
+    # Every wave appears at (f, r) and (-f, -r); the positive frequency
+    # half keeps one of them, and the positive orders of the static ones
+    keep = (f > 0) | ((f == 0) & (r >= 0))
+    amplitude = np.where((f == 0) & (r == 0), 1.0, 2.0) * np.abs(P)
+    index = np.flatnonzero(keep.ravel())
+    index = index[np.argsort(amplitude.ravel()[index])[::-1][:harmonics]]
+    return np.stack((r.ravel()[index], f.ravel()[index], amplitude.ravel()[index]), axis=-1)
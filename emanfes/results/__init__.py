@@ -17,4 +17,5 @@
 # limitations under the License.
 # ==========================================================================
 
-from .results import Result
\ No newline at end of file
+from .results import Result
+from .result_cache import ResultCache, get_cache_key
\ No newline at end of file
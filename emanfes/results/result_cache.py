@@ -0,0 +1,165 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Persistent cache of results per operating point.
+"""
+
+# ==========================================================================
+# Program:   result_cache.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              SQLite result cache with LRU eviction
+#
+# ==========================================================================
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+
+from emanfes.misc.constants import *
+from emanfes.misc.serialization import to_json
+
+logger = logging.getLogger(__name__)
+
+# Simulation fields that do not change the solution. Restarted solves
+# are not stored, so the restart file only selects cold start entries
+IGNORED_FIELDS = ('workdir', 'verbose', 'mesh_threads', 'mesh_write', 'mpi_ranks', 'mpi_launcher',
+                  'save_restart', 'restart_file', 'restart_position', 'losses_chunk', 'native_workers',
+                  'solve_efficiency_map', 'phase_resistance')
+# Settings of analyses built on top of single solves
+IGNORED_PREFIXES = ('inductance_', 'torque_vs_', 'efficiency_map_', 'mtpa_')
+
+_elmer_version = None
+
+
+def get_elmer_version():
+    global _elmer_version
+    if _elmer_version is None:
+        try:
+            process = subprocess.run(['ElmerSolver', '-v'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                     cwd=tempfile.gettempdir(), timeout=30)
+            lines = [l for l in process.stdout.decode(errors='replace').splitlines() if 'Version' in l]
+            _elmer_version = lines[0].strip() if lines else 'unknown'
+        except (OSError, subprocess.SubprocessError):
+            _elmer_version = 'unknown'
+    return _elmer_version
+
+
+def get_cache_key(machine_settings, simulation):
+    """
+        Canonical hash of the machine (geometry, winding and materials as
+        given in its settings) and of every Simulation field affecting the
+        solution, so equal operating points share the key whatever analysis
+        requested them.
+    """
+    fields = {k: v for k, v in vars(simulation).items()
+              if k not in IGNORED_FIELDS and not k.startswith(IGNORED_PREFIXES)}
+    canonical = json.dumps({'machine': to_json(machine_settings), 'simulation': to_json(fields)},
+                           sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+        Results stored compressed in a SQLite file. Least recently used
+        entries are evicted above max_entries or max_bytes, and the whole
+        cache is dropped when the emanfes or Elmer version changes.
+    """
+
+    def __init__(self, filename, max_entries=10000, max_bytes=1 << 30, versions=None):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.versions = versions or {'emanfes': str(EMANFES_VERSION__), 'elmer': get_elmer_version()}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(filename, timeout=60, check_same_thread=False)
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, data BLOB, "
+                            "size INTEGER, accessed REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            row = self.db.execute("SELECT value FROM meta WHERE name = 'versions'").fetchone()
+            versions = json.dumps(self.versions, sort_keys=True)
+            if row is None or row[0] != versions:
+                if row is not None:
+                    logger.info("Result cache invalidated, versions changed to %s", versions)
+                self.db.execute("DELETE FROM results")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('versions', ?)", (versions,))
+
+    def get_key(self, machine_settings, simulation):
+        return get_cache_key(machine_settings, simulation)
+
+    def get(self, key):
+        from emanfes.results import Result
+        with self.lock, self.db:
+            row = self.db.execute("SELECT data FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return Result.from_dict(json.loads(zlib.decompress(row[0]).decode()))
+
+    def put(self, key, result):
+        data = zlib.compress(json.dumps(to_json(result.to_dict())).encode())
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                            (key, data, len(data), time.time()))
+            self._evict()
+
+    def _evict(self):
+        count, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        removed = 0
+        for key, entry_size in self.db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+            count -= 1
+            size -= entry_size
+            removed += 1
+        logger.debug("Result cache evicted %d entries", removed)
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM results")
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.db.close()
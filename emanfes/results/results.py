@@ -64,9 +64,61 @@ class Result:
     Lmd = 0.0
     Lmq = 0.0
     magnet_flux = 0.0
+    fp_magnet_flux_linkage_x = []
+    fp_magnet_flux_linkage_y = []
+    fp_inductance = []
+    fp_Ld_y = []
+    fp_Lq_y = []
+    fp_pm_torque_y = []
+    fp_reluctance_torque_y = []
     pressure_radial_nl = []
     pressure_radial_ol = []
+    pressure_harmonics_nl = []
+    pressure_harmonics_ol = []
+    iron_loss = {}
+    iron_loss_total = 0.0
+    iron_loss_components = {}
+    iron_loss_frequency = 0.0
+    magnet_loss = {}
+    magnet_loss_total = 0.0
+    mesh_statistics = {}
+    efficiency_map_speed = []
+    efficiency_map_torque = []
+    efficiency_map = []
+    efficiency_map_loss = []
+    efficiency_map_id = []
+    efficiency_map_iq = []
+    efficiency_map_max_torque = []
+    mtpa_current = []
+    mtpa_gamma = []
+    mtpa_torque = []
+    fw_speed = []
+    fw_gamma = []
+    fw_torque = []
+    fe_calls = 0
+    torque_vs_load_current = []
+    torque_vs_load_torque = []
+    torque_vs_load_ripple = []
+    torque_vs_speed_speed = []
+    torque_vs_speed_torque = []
+    torque_vs_speed_power = []
+    torque_vs_speed_gamma = []
 
     def __init__(self):
             pass
 
+    def to_dict(self):
+        # Every result field, including the class defaults not yet computed
+        return {k: getattr(self, k) for k in dir(self)
+                if not k.startswith('_') and not callable(getattr(self, k))}
+
+    @classmethod
+    def from_dict(cls, d):
+        import numpy as np
+        res = cls()
+        for k, v in d.items():
+            if k.startswith('_') or not hasattr(cls, k):
+                continue
+            setattr(res, k, np.array(v) if isinstance(v, list) else v)
+        return res
+
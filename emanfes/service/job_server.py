@@ -0,0 +1,318 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Long-running analysis server with a local JSON job API.
+"""
+
+# ==========================================================================
+# Program:   job_server.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              HTTP/Unix socket job API on warm workers
+#
+# ==========================================================================
+
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from emanfes.misc.serialization import to_json
+
+logger = logging.getLogger(__name__)
+
+# Modules imported once by the fork server, every job starts with them loaded
+PRELOAD_MODULES = ['numpy', 'scipy', 'scipy.sparse', 'scipy.interpolate', 'gmsh',
+                   'uffema.machines', 'emanfes.api', 'emanfes.analysis', 'emanfes.elmer',
+                   'emanfes.geogmsh', 'emanfes.results']
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+def _run_job(machine, analysis, workdir, conn):
+    from emanfes.api import run
+    try:
+        outcome = run(machine, analysis, workdir=workdir, keep_files=True)
+        conn.send(to_json(outcome.to_dict()))
+    except Exception as err:
+        conn.send({'success': False, 'stage': None, 'error': "{0}: {1}".format(type(err).__name__, err)})
+    finally:
+        conn.close()
+
+
+class Job:
+
+    def __init__(self, machine, analysis):
+        self.id = uuid.uuid4().hex
+        self.machine = machine
+        self.analysis = analysis
+        self.status = QUEUED
+        self.output = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.process = None
+        self.events = []
+
+    def to_dict(self, with_output=True):
+        d = {'id': self.id, 'status': self.status, 'created': self.created,
+             'started': self.started, 'finished': self.finished}
+        if with_output and self.output is not None:
+            d['output'] = self.output
+        return d
+
+
+class JobServer:
+
+    def __init__(self, root, concurrency=None, keep_files=False):
+        self.root = os.path.abspath(root)
+        self.concurrency = concurrency or multiprocessing.cpu_count()
+        self.keep_files = keep_files
+        self.jobs = collections.OrderedDict()
+        self.queue = collections.deque()
+        self.running = 0
+        self.lock = threading.Condition()
+        self.closed = False
+
+        methods = multiprocessing.get_all_start_methods()
+        if 'forkserver' in methods:
+            self.context = multiprocessing.get_context('forkserver')
+            self.context.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            self.context = multiprocessing.get_context('spawn')
+        os.makedirs(os.path.join(self.root, 'jobs'), exist_ok=True)
+
+        self.scheduler = threading.Thread(target=self._schedule, daemon=True)
+        self.scheduler.start()
+
+    def _set_status(self, job, status):
+        # Must be called holding the lock
+        job.status = status
+        job.events.append(job.to_dict(with_output=status in FINISHED))
+        self.lock.notify_all()
+
+    def submit(self, machine, analysis):
+        job = Job(machine, analysis)
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Job server is closed")
+            self.jobs[job.id] = job
+            self.queue.append(job)
+            self._set_status(job, QUEUED)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            return [job.to_dict(with_output=False) for job in self.jobs.values()]
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            if job.status == QUEUED:
+                self.queue.remove(job)
+                job.finished = time.time()
+                self._set_status(job, CANCELLED)
+                return job
+            job.status = CANCELLED
+            process = job.process
+        if process is not None:
+            process.terminate()
+        return job
+
+    def events(self, job_id, since=0, timeout=None):
+        # Blocks until the job has events after 'since' or is finished; a
+        # closed server has no more events to give, it ends every stream
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None, True
+            self.lock.wait_for(lambda: len(job.events) > since or self.closed, timeout)
+            finished = len(job.events) > 0 and job.events[-1]['status'] in FINISHED
+            return job.events[since:], finished or self.closed
+
+    def _schedule(self):
+        while True:
+            with self.lock:
+                self.lock.wait_for(lambda: self.closed or (self.queue and self.running < self.concurrency))
+                if self.closed:
+                    return
+                job = self.queue.popleft()
+                self.running += 1
+                workdir = os.path.join(self.root, 'jobs', job.id)
+                receiver, sender = self.context.Pipe(duplex=False)
+                job.process = self.context.Process(target=_run_job,
+                                                   args=(job.machine, job.analysis, workdir, sender))
+                job.process.start()
+                sender.close()
+                job.started = time.time()
+                self._set_status(job, RUNNING)
+            threading.Thread(target=self._wait, args=(job, receiver, workdir), daemon=True).start()
+
+    def _wait(self, job, receiver, workdir):
+        try:
+            output = receiver.recv()
+        except EOFError:
+            output = None
+        receiver.close()
+        job.process.join()
+        exitcode = job.process.exitcode
+        with self.lock:
+            self.running -= 1
+            job.finished = time.time()
+            job.process = None
+            if job.status == CANCELLED:
+                self._set_status(job, CANCELLED)
+            elif output is None:
+                job.output = {'success': False, 'error': 'worker exited with code {0}'.format(exitcode)}
+                self._set_status(job, FAILED)
+            else:
+                job.output = output
+                self._set_status(job, DONE if output.get('success') else FAILED)
+        if not self.keep_files:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def close(self):
+        # Queued jobs will never start, they end cancelled
+        with self.lock:
+            self.closed = True
+            while self.queue:
+                job = self.queue.popleft()
+                job.finished = time.time()
+                self._set_status(job, CANCELLED)
+            jobs = [job for job in self.jobs.values() if job.status == RUNNING]
+            self.lock.notify_all()
+        for job in jobs:
+            self.cancel(job.id)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    # POST /jobs              {"machine": {...}, "analysis": {...}}
+    # GET /jobs               status of every job
+    # GET /jobs/<id>          status and output of one job
+    # GET /jobs/<id>/events   newline separated JSON status updates until done
+    # DELETE /jobs/<id>       cancels a queued or running job
+
+    protocol_version = 'HTTP/1.0'
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def address_string(self):
+        return str(self.client_address[0]) if self.client_address else 'local'
+
+    def _send(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if len(parts) == 0 or parts[0] != 'jobs':
+            return None, None
+        return (parts[1] if len(parts) > 1 else None), (parts[2] if len(parts) > 2 else None)
+
+    def do_POST(self):
+        job_id, action = self._route()
+        if job_id is not None or action is not None:
+            return self._send(404, {'error': 'not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length).decode())
+            machine = body['machine']
+            analysis = body['analysis']
+        except (ValueError, KeyError, TypeError) as err:
+            return self._send(400, {'error': 'invalid job: {0}'.format(err)})
+        try:
+            job = self.server.jobs.submit(machine, analysis)
+        except RuntimeError as err:
+            return self._send(503, {'error': str(err)})
+        self._send(202, job.to_dict())
+
+    def do_GET(self):
+        job_id, action = self._route()
+        jobs = self.server.jobs
+        if job_id is None:
+            return self._send(200, jobs.list())
+        job = jobs.get(job_id)
+        if job is None:
+            return self._send(404, {'error': 'unknown job'})
+        if action is None:
+            return self._send(200, job.to_dict())
+        if action != 'events':
+            return self._send(404, {'error': 'not found'})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        since = 0
+        finished = False
+        while not finished:
+            events, finished = jobs.events(job_id, since, timeout=30.0)
+            since += len(events)
+            for event in events:
+                self.wfile.write((json.dumps(event) + '\n').encode())
+            self.wfile.flush()
+
+    def do_DELETE(self):
+        job_id, action = self._route()
+        job = self.server.jobs.cancel(job_id) if job_id is not None else None
+        if job is None:
+            return self._send(404, {'error': 'unknown job'})
+        self._send(200, job.to_dict(with_output=False))
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def create_http_server(jobs, host='127.0.0.1', port=8765, socket_path=None):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, JobRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.jobs = jobs
+    return server
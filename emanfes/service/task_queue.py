@@ -0,0 +1,277 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Job queue on a shared directory for workers on several nodes.
+"""
+
+# ==========================================================================
+# Program:   task_queue.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Directory queue with leases
+#
+# ==========================================================================
+
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+from emanfes.misc.serialization import to_json
+
+logger = logging.getLogger(__name__)
+
+# Tasks move between these directories with atomic renames:
+#   pending -> leased -> done | failed, expired leases go through tmp
+#   back to pending
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+RESULTS = 'results'
+TMP = 'tmp'
+# Suffix of the expired leases claimed by a requeuer in tmp/
+CLAIM = '.claim'
+
+
+class Task:
+
+    def __init__(self, id, machine, analysis, operating_point=None, attempts=0):
+        self.id = id
+        self.machine = machine
+        self.analysis = analysis
+        self.operating_point = operating_point
+        self.attempts = attempts
+
+    def to_dict(self):
+        return {'id': self.id, 'machine': self.machine, 'analysis': self.analysis,
+                'operating_point': self.operating_point, 'attempts': self.attempts}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['id'], d['machine'], d['analysis'], d.get('operating_point'), d.get('attempts', 0))
+
+
+class TaskQueue:
+    """
+        Queue kept in a directory shared by every worker (e.g. over NFS).
+        A worker claims a task by renaming it from pending/ to leased/, only
+        one rename can succeed. The lease is the modification time of the
+        leased file, refreshed while the task runs; leases older than
+        lease_time are put back in pending/ until max_attempts is reached.
+        Lease ages are measured against the clock of the file server, read
+        from a file touched for the purpose, never the local one.
+    """
+
+    def __init__(self, root, lease_time=600.0, max_attempts=3):
+        self.root = os.path.abspath(root)
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        for name in (PENDING, LEASED, DONE, FAILED, RESULTS, TMP):
+            os.makedirs(os.path.join(self.root, name), exist_ok=True)
+
+    def _path(self, state, task_id):
+        return os.path.join(self.root, state, task_id + '.json')
+
+    def _write(self, path, data):
+        # Written aside and renamed so readers never see partial files
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.root, TMP), suffix='.json')
+        with os.fdopen(fd, 'wt') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _get_server_time(self):
+        # Modification time the shared file system gives to a fresh touch,
+        # on the same clock as the lease renewals
+        path = os.path.join(self.root, TMP, 'clock_{0}_{1}'.format(socket.gethostname(), os.getpid()))
+        with open(path, 'a'):
+            os.utime(path)
+        return os.stat(path).st_mtime
+
+    def submit(self, machine, analysis, operating_point=None):
+        # Ids sort in submission order
+        task_id = '{0:020d}_{1}'.format(time.time_ns(), uuid.uuid4().hex[:8])
+        task = Task(task_id, machine, analysis, operating_point)
+        self._write(self._path(PENDING, task_id), task.to_dict())
+        return task_id
+
+    def submit_sweep(self, machine, analysis, operating_points):
+        return [self.submit(machine, analysis, op) for op in operating_points]
+
+    def claim(self):
+        self.requeue_expired()
+        for name in sorted(os.listdir(os.path.join(self.root, PENDING))):
+            task_id = name[:-5]
+            leased = self._path(LEASED, task_id)
+            try:
+                os.rename(self._path(PENDING, task_id), leased)
+            except FileNotFoundError:
+                continue
+            # Rename keeps the old mtime, the lease starts now
+            os.utime(leased)
+            with open(leased, 'rt') as f:
+                return Task.from_dict(json.load(f))
+        return None
+
+    def renew(self, task):
+        # A requeuer may hold the file for a moment to check its lease
+        for attempt in range(0, 3):
+            try:
+                os.utime(self._path(LEASED, task.id))
+                return True
+            except FileNotFoundError:
+                time.sleep(0.1)
+        # Lease expired and the task was handed to another worker
+        return False
+
+    def complete(self, task, output):
+        self._write(self._path(RESULTS, task.id), {'task': task.to_dict(), 'output': output})
+        state = DONE if output.get('success') else FAILED
+        try:
+            os.rename(self._path(LEASED, task.id), self._path(state, task.id))
+        except FileNotFoundError:
+            logger.warning("Task %s completed after its lease expired", task.id)
+
+    def requeue_expired(self):
+        """
+            Puts the tasks of expired leases back in pending/, or in
+            failed/ after max_attempts. An expired lease is first claimed
+            by renaming it into tmp/ under a unique name, which only one
+            requeuer can do; its age is checked again there, so a renewal
+            landing in between keeps the lease. The claimed file is then
+            updated and renamed to pending/ or failed/. Claims named with
+            a server time older than lease_time were left behind by a
+            requeuer that died, they go back to leased/ to expire again.
+        """
+        leased_dir = os.path.join(self.root, LEASED)
+        tmp_dir = os.path.join(self.root, TMP)
+        claims = [n for n in os.listdir(tmp_dir) if n.endswith(CLAIM)]
+        if len(claims) == 0 and len(os.listdir(leased_dir)) == 0:
+            return 0
+        now = self._get_server_time()
+        for name in claims:
+            task_id, claim_time = name.split('.')[:2]
+            if now - int(claim_time) < self.lease_time:
+                continue
+            try:
+                os.rename(os.path.join(tmp_dir, name), self._path(LEASED, task_id))
+            except FileNotFoundError:
+                continue
+        requeued = 0
+        for name in os.listdir(leased_dir):
+            path = os.path.join(leased_dir, name)
+            claimed = os.path.join(tmp_dir, '{0}.{1:d}.{2}{3}'.format(name[:-5], int(now), uuid.uuid4().hex,
+                                                                      CLAIM))
+            try:
+                if now - os.stat(path).st_mtime < self.lease_time:
+                    continue
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            # Renames keep the mtime, a renewal before the claim shows here
+            if now - os.stat(claimed).st_mtime < self.lease_time:
+                os.rename(claimed, path)
+                continue
+            try:
+                with open(claimed, 'rt') as f:
+                    task = Task.from_dict(json.load(f))
+            except ValueError:
+                logger.error("Leased task file %s is unreadable, moved to failed", name)
+                os.rename(claimed, os.path.join(self.root, FAILED, name))
+                continue
+            task.attempts += 1
+            failed = task.attempts >= self.max_attempts
+            self._write(claimed, task.to_dict())
+            if failed:
+                logger.warning("Task %s failed after %d expired leases", task.id, task.attempts)
+                output = {'success': False, 'error': 'lease expired {0} times'.format(task.attempts)}
+                self._write(self._path(RESULTS, task.id), {'task': task.to_dict(), 'output': output})
+            else:
+                logger.info("Requeuing task %s with expired lease", task.id)
+                requeued += 1
+            os.rename(claimed, self._path(FAILED if failed else PENDING, task.id))
+        return requeued
+
+    def status(self):
+        return {state: len(os.listdir(os.path.join(self.root, state)))
+                for state in (PENDING, LEASED, DONE, FAILED)}
+
+    def results(self):
+        results_dir = os.path.join(self.root, RESULTS)
+        for name in sorted(os.listdir(results_dir)):
+            with open(os.path.join(results_dir, name), 'rt') as f:
+                yield json.load(f)
+
+
+def run_worker(root, scratch=None, lease_time=600.0, poll_interval=5.0, stop_when_empty=False,
+               keep_files=False):
+    """
+        Pulls tasks from the queue at root and runs them until stopped.
+        Every task is solved in its own directory under scratch (a local
+        temporary directory by default) and the lease is renewed while
+        it runs.
+    """
+    from emanfes.api import run
+
+    queue = TaskQueue(root, lease_time)
+    worker = '{0}-{1}'.format(socket.gethostname(), os.getpid())
+    scratch = scratch or tempfile.mkdtemp(prefix='emanfes_worker_')
+    processed = 0
+    while True:
+        task = queue.claim()
+        if task is None:
+            if stop_when_empty and queue.status()[LEASED] == 0:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        logger.info("Worker %s running task %s", worker, task.id)
+        running = threading.Event()
+        running.set()
+
+        def heartbeat():
+            while running.is_set():
+                if not queue.renew(task):
+                    return
+                time.sleep(lease_time / 3.0)
+
+        renewer = threading.Thread(target=heartbeat, daemon=True)
+        renewer.start()
+        workdir = os.path.join(scratch, task.id)
+        try:
+            outcome = run(task.machine, task.analysis, workdir=workdir, keep_files=keep_files,
+                          operating_point=task.operating_point)
+            output = to_json(outcome.to_dict())
+        except Exception as err:
+            output = {'success': False, 'error': "{0}: {1}".format(type(err).__name__, err)}
+        finally:
+            running.clear()
+        output['worker'] = worker
+        queue.complete(task, output)
+        processed += 1
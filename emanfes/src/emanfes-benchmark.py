@@ -0,0 +1,258 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Benchmarks meshing and solving options on a given machine.
+"""
+
+# ==========================================================================
+# Program:   emanfes-benchmark.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Element type benchmark
+#  - 10/19/26:  0.1.1              Meshing threads benchmark
+#  - 10/19/26:  0.1.1              MPI ranks scaling benchmark
+#
+# ==========================================================================
+
+import copy
+import getopt
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from emanfes.analysis import Analysis, Simulation
+from emanfes.geogmsh import GeometryGmsh, close_session
+from uffema.machines import RotatingMachine
+
+
+# Machine meshed by the threads benchmark when none is given, a 72 slot
+# stator (the 9 slot, 6 pole winding of motor_7 repeated 8 times)
+SLOTS_72_MACHINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'tests', 'motor_72.msf')
+
+# Name and mesh settings of every element configuration compared against
+# the default linear triangles
+ELEMENT_CASES = (
+    ('triangles',           {}),
+    ('quads',               {'algorithm': 8, 'recombine': True}),
+    ('triangles_p2',        {'order': 2, 'size_factor': 2.0}),
+    ('quads_p2',            {'algorithm': 8, 'recombine': True, 'order': 2, 'size_factor': 2.0}),
+)
+
+
+class Usage(Exception):
+    def __init__(self, msg):
+        self.msg = "[Error]: %s" % ( msg )
+
+
+def count_dofs(mesh_dir, order):
+    with open(os.path.join(mesh_dir, 'mesh.header'), 'rt') as f:
+        nodes = int(f.readline().split()[0])
+    if order < 2:
+        return nodes
+    edges = []
+    with open(os.path.join(mesh_dir, 'mesh.elements'), 'rt') as f:
+        for line in f:
+            fields = [int(v) for v in line.split()]
+            element_nodes = fields[3:3 + fields[2] % 100]
+            for i in range(0, len(element_nodes)):
+                edges.append(sorted((element_nodes[i], element_nodes[(i + 1) % len(element_nodes)])))
+    edges = np.unique(np.array(edges), axis=0)
+    # Every additional polynomial order adds one dof per edge
+    return nodes + (order - 1) * edges.shape[0]
+
+
+def run_case(workdir, machine_settings, analysis_settings):
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        machine = RotatingMachine.create(machine_settings['machine'])
+        analysis = Analysis(analysis_settings['analysis'], machine)
+        start = time.time()
+        if not (analysis.create_model() and analysis.mesh_model()):
+            return None
+        mesh_time = time.time() - start
+        start = time.time()
+        if not analysis.solve_model():
+            return None
+        solve_time = time.time() - start
+        res = analysis.post_processing()
+        order = analysis_settings['analysis'].get('mesh', {}).get('order', 1)
+        dofs = count_dofs('machine', order)
+    finally:
+        os.chdir(cwd)
+    return {'dofs': dofs, 'mesh_time': mesh_time, 'solve_time': solve_time,
+            'ripple': np.ptp(res.cogging_torque_y)}
+
+
+def benchmark_elements(dir, machine_settings, analysis_settings):
+    results = []
+    for name, mesh_settings in ELEMENT_CASES:
+        settings = copy.deepcopy(analysis_settings)
+        settings['analysis'].setdefault('mesh', {}).update(mesh_settings)
+        case = run_case(os.path.join(dir, 'bench_' + name), machine_settings, settings)
+        if case is None:
+            print('%s: failed' % name)
+            continue
+        results.append((name, case))
+
+    if len(results) == 0:
+        return False
+    reference = results[0][1]['ripple']
+    print('%-16s %10s %10s %10s %14s %10s' % ('case', 'dofs', 'mesh[s]', 'solve[s]', 'ripple[Nm]', 'error[%]'))
+    for name, case in results:
+        error = 100.0 * abs(case['ripple'] - reference) / reference if reference != 0 else 0.0
+        print('%-16s %10d %10.3f %10.3f %14.6e %10.2f' % (name, case['dofs'], case['mesh_time'],
+                                                          case['solve_time'], case['ripple'], error))
+    return True
+
+
+def benchmark_threads(dir, machine_settings, analysis_settings, repeats=3):
+    machine = RotatingMachine.create(machine_settings['machine'])
+    threads = [1]
+    while threads[-1] * 2 <= multiprocessing.cpu_count():
+        threads.append(threads[-1] * 2)
+
+    workdir = os.path.join(dir, 'bench_threads')
+    os.makedirs(workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        print('Stator with %d slots' % machine.stator.slots_number)
+        print('%8s %14s %14s %14s' % ('threads', 'new session[s]', 'reused[s]', 'speedup'))
+        reference = None
+        for n in threads:
+            settings = copy.deepcopy(analysis_settings)
+            settings['analysis'].setdefault('mesh', {})['threads'] = n
+            stator = GeometryGmsh(Simulation(settings['analysis']), machine).stator
+
+            # Full initialise/finalise on every design, as before
+            cold = []
+            for i in range(0, repeats):
+                close_session()
+                start = time.time()
+                stator.create()
+                cold.append(time.time() - start)
+            # Session kept alive, models cleared between designs
+            warm = []
+            for i in range(0, repeats):
+                start = time.time()
+                stator.create()
+                warm.append(time.time() - start)
+
+            if reference is None:
+                reference = min(cold)
+            print('%8d %14.3f %14.3f %14.2f' % (n, min(cold), min(warm), reference / min(warm)))
+    finally:
+        close_session()
+        os.chdir(cwd)
+    return True
+
+
+def benchmark_ranks(dir, machine_settings, analysis_settings):
+    ranks = [1]
+    while ranks[-1] * 2 <= multiprocessing.cpu_count():
+        ranks.append(ranks[-1] * 2)
+
+    results = []
+    for n in ranks:
+        settings = copy.deepcopy(analysis_settings)
+        settings['analysis'].setdefault('parallel', {})['ranks'] = n
+        case = run_case(os.path.join(dir, 'bench_ranks_%d' % n), machine_settings, settings)
+        if case is None:
+            print('%d ranks: failed' % n)
+            continue
+        results.append((n, case))
+
+    if len(results) == 0:
+        return False
+    reference = results[0][1]
+    print('%8s %10s %10s %10s %12s %12s' % ('ranks', 'dofs', 'solve[s]', 'speedup', 'efficiency', 'ripple[%]'))
+    for n, case in results:
+        speedup = reference['solve_time'] / case['solve_time']
+        error = 100.0 * abs(case['ripple'] - reference['ripple']) / reference['ripple'] if reference['ripple'] != 0 else 0.0
+        print('%8d %10d %10.3f %10.2f %12.2f %12.2f' % (n, case['dofs'], case['solve_time'], speedup,
+                                                         speedup * results[0][0] / n, error))
+    return True
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    try:
+        try:
+            opts, args = getopt.getopt(argv[1:], "hd:m:a:b:", ["help","dir","machine","analysis","benchmark"])
+        except getopt.GetoptError as msg:
+             raise Usage(msg)
+        dir = '.'
+        benchmark = 'elements'
+        machine_file = None
+        for opt, arg in opts:
+            if opt in ("-h", "--help"):
+                print ('emanfes-benchmark.py -d [dir_name] -m [machine_file] -a [analysis_file] -b [elements|threads|ranks]')
+                print ('  threads uses the bundled 72 slot machine when no machine_file is given')
+                sys.exit()
+            elif opt in ("-d", "--dir"):
+                dir = arg
+            elif opt in ("-m", "--machine"):
+                machine_file = arg
+            elif opt in ("-a", "--analysis"):
+                analysis_file = arg
+            elif opt in ("-b", "--benchmark"):
+                benchmark = arg
+
+    except Usage as err:
+        print (err.msg, file=sys.stderr)
+        print("for help use --help", file=sys.stderr)
+        return 2
+
+    dir = os.path.abspath(dir)
+    if machine_file is None:
+        if benchmark != "threads":
+            print ('A machine_file is needed for the %s benchmark' % benchmark, file=sys.stderr)
+            return 2
+        machine_file = SLOTS_72_MACHINE
+    with open(os.path.join(dir, analysis_file)) as f:
+        analysis_settings = json.load(f)
+    with open(os.path.join(dir, machine_file)) as f:
+        machine_settings = json.load(f)
+
+    if benchmark == "elements":
+        return benchmark_elements(dir, machine_settings, analysis_settings)
+    elif benchmark == "threads":
+        return benchmark_threads(dir, machine_settings, analysis_settings)
+    elif benchmark == "ranks":
+        return benchmark_ranks(dir, machine_settings, analysis_settings)
+
+    print ('Unknown benchmark %s' % benchmark, file=sys.stderr)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Submits sweeps to a shared queue directory and runs queue workers.
+"""
+
+# ==========================================================================
+# Program:   emanfes-queue.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Shared directory queue
+#
+# ==========================================================================
+
+import getopt
+import json
+import logging
+import multiprocessing
+import os
+import sys
+
+from emanfes.service import TaskQueue, run_worker
+
+
+class Usage(Exception):
+    def __init__(self, msg):
+        self.msg = "[Error]: %s" % ( msg )
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    try:
+        try:
+            opts, args = getopt.getopt(argv[1:], "hq:c:m:a:o:n:t:s:e", ["help","queue","command","machine",
+                                                                         "analysis","operating_points","workers",
+                                                                         "lease","scratch","exit"])
+        except getopt.GetoptError as msg:
+             raise Usage(msg)
+        command = 'status'
+        workers = 1
+        lease_time = 600.0
+        scratch = None
+        stop_when_empty = False
+        operating_points_file = None
+        for opt, arg in opts:
+            if opt in ("-h", "--help"):
+                print ('emanfes-queue.py -q [queue_dir] -c [submit|work|status|results] -m [machine_file] '
+                       '-a [analysis_file] -o [operating_points_file] -n [workers] -t [lease_seconds] '
+                       '-s [scratch_dir] -e')
+                sys.exit()
+            elif opt in ("-q", "--queue"):
+                queue_dir = arg
+            elif opt in ("-c", "--command"):
+                command = arg
+            elif opt in ("-m", "--machine"):
+                machine_file = arg
+            elif opt in ("-a", "--analysis"):
+                analysis_file = arg
+            elif opt in ("-o", "--operating_points"):
+                operating_points_file = arg
+            elif opt in ("-n", "--workers"):
+                workers = int(arg)
+            elif opt in ("-t", "--lease"):
+                lease_time = float(arg)
+            elif opt in ("-s", "--scratch"):
+                scratch = arg
+            elif opt in ("-e", "--exit"):
+                stop_when_empty = True
+
+    except Usage as err:
+        print (err.msg, file=sys.stderr)
+        print("for help use --help", file=sys.stderr)
+        return 2
+
+    queue = TaskQueue(queue_dir, lease_time)
+    if command == 'submit':
+        with open(machine_file) as f:
+            machine_settings = json.load(f)
+        with open(analysis_file) as f:
+            analysis_settings = json.load(f)
+        # A JSON list of operating points, each one overriding the 'load' section
+        operating_points = [None]
+        if operating_points_file is not None:
+            with open(operating_points_file) as f:
+                operating_points = json.load(f)
+        ids = queue.submit_sweep(machine_settings, analysis_settings, operating_points)
+        print('Submitted %d tasks' % len(ids))
+    elif command == 'work':
+        logging.basicConfig(filename=os.path.join(queue.root, 'worker-%s.log' % os.uname()[1]),
+                            level=logging.INFO,
+                            format='%(asctime)s - [%(name)s] %(levelname)s: %(message)s')
+        args = (queue.root, scratch, lease_time, 5.0, stop_when_empty)
+        if workers == 1:
+            run_worker(*args)
+        else:
+            processes = [multiprocessing.Process(target=run_worker, args=args) for i in range(0, workers)]
+            for p in processes:
+                p.start()
+            for p in processes:
+                p.join()
+    elif command == 'status':
+        for state, count in queue.status().items():
+            print('%-8s %6d' % (state, count))
+    elif command == 'results':
+        print(json.dumps(list(queue.results())))
+    else:
+        print ('Unknown command %s' % command, file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Serves analysis jobs over a local JSON API.
+"""
+
+# ==========================================================================
+# Program:   emanfes-server.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Local job server
+#
+# ==========================================================================
+
+import getopt
+import logging
+import os
+import sys
+
+from emanfes.misc.constants import *
+from emanfes.service import JobServer, create_http_server
+
+
+class Usage(Exception):
+    def __init__(self, msg):
+        self.msg = "[Error]: %s" % ( msg )
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    try:
+        try:
+            opts, args = getopt.getopt(argv[1:], "hd:H:P:u:j:l:k", ["help","dir","host","port","socket","jobs","log","keep"])
+        except getopt.GetoptError as msg:
+             raise Usage(msg)
+        dir = '.'
+        host = '127.0.0.1'
+        port = 8765
+        socket_path = None
+        concurrency = None
+        loglevel = LOG_INFO
+        keep_files = False
+        for opt, arg in opts:
+            if opt in ("-h", "--help"):
+                print ('emanfes-server.py -d [work_dir] -H [host] -P [port] -u [unix_socket] -j [max_jobs] -l [level] -k')
+                sys.exit()
+            elif opt in ("-d", "--dir"):
+                dir = arg
+            elif opt in ("-H", "--host"):
+                host = arg
+            elif opt in ("-P", "--port"):
+                port = int(arg)
+            elif opt in ("-u", "--socket"):
+                socket_path = arg
+            elif opt in ("-j", "--jobs"):
+                concurrency = int(arg)
+            elif opt in ("-l", "--log"):
+                loglevel = int(arg)
+            elif opt in ("-k", "--keep"):
+                keep_files = True
+
+    except Usage as err:
+        print (err.msg, file=sys.stderr)
+        print("for help use --help", file=sys.stderr)
+        return 2
+
+    levels = {LOG_CRITICAL: logging.CRITICAL, LOG_ERROR: logging.ERROR, LOG_WARN: logging.WARNING,
+              LOG_INFO: logging.INFO}
+    logging.basicConfig(filename=os.path.join(dir, 'emanfes-server.log'),
+                        level=levels.get(loglevel, logging.DEBUG),
+                        format='%(asctime)s - [%(name)s] %(levelname)s: %(message)s')
+
+    jobs = JobServer(dir, concurrency, keep_files)
+    server = create_http_server(jobs, host, port, socket_path)
+    address = socket_path if socket_path is not None else 'http://%s:%d' % (host, port)
+    print('Serving on %s with %d concurrent jobs' % (address, jobs.concurrency))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.close()
+        logging.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,6 +30,7 @@
 # Revision History:
 #      Date     Version  Author    Description
 #  - 12/23/17:  0.1.1              Call Elmer Solver
+#  - 10/19/26:  0.1.1              Resume '-e all' from stage manifests
 #
 # ==========================================================================
 
@@ -39,7 +40,7 @@ import logging
 import sys
 import time
 
-from emanfes.analysis import Analysis
+from emanfes.analysis import Analysis, Pipeline
 from emanfes.misc.constants import *
 from uffema.machines import RotatingMachine
 
@@ -57,13 +58,15 @@ def main(argv=None):
         argv = sys.argv
     try:
         try:
-            opts, args = getopt.getopt(argv[1:], "hd:m:a:l:o:ps:e:", ["help","dir","machine","analysis","log","output","plot","save","execute"])
+            opts, args = getopt.getopt(argv[1:], "hd:m:a:l:o:ps:e:rf", ["help","dir","machine","analysis","log","output","plot","save","execute","report","force"])
         except getopt.GetoptError as msg:
              raise Usage(msg)
         loglevel = LOG_ALL
+        report = False
+        resume = True
         for opt, arg in opts:
             if opt in ("-h", "--help"):
-                print ('emanfes.py -d [dir_name] -m [machine_file] -a [analysis_file] -l [level] -o [output_file] -p -s [database_file] -e [execute]')
+                print ('emanfes.py -d [dir_name] -m [machine_file] -a [analysis_file] -l [level] -o [output_file] -p -s [database_file] -e [execute] -r -f')
                 sys.exit()
             elif opt in ("-d", "--dir"):
                 dir = arg
@@ -89,6 +92,10 @@ def main(argv=None):
                     solving = True
                 if arg == "all" or arg == "post_process":
                     postprocessing = True
+            elif opt in ("-r", "--report"):
+                report = True
+            elif opt in ("-f", "--force"):
+                resume = False
 
 
 
@@ -128,13 +135,33 @@ def main(argv=None):
 
     machine = RotatingMachine.create(machine_settings['machine'])
     analysis = Analysis(analysis_settings['analysis'], machine)
-    if meshing:
+    res = None
+    if meshing and solving and postprocessing:
+        # Stages whose inputs and outputs are unchanged since the last run are skipped
+        pipeline = Pipeline(analysis, machine_settings, analysis_settings)
+        res = pipeline.run(resume=resume)
+        if res is False:
+            print('Not Completed')
+            return False
+        if pipeline.skipped:
+            print('Skipped up to date stages: %s' % ', '.join(pipeline.skipped))
+        if report and 'create' in pipeline.executed:
+            for name, statistics in analysis.get_mesh_statistics().items():
+                print('%s mesh' % name.capitalize())
+                print(statistics.report())
+        meshing = False
+        solving = False
+    elif meshing:
         created = analysis.create_model()
         if created:
             meshed = analysis.mesh_model()
             if not meshed:
                 print('Not Meshed')
                 return False
+            if report:
+                for name, statistics in analysis.get_mesh_statistics().items():
+                    print('%s mesh' % name.capitalize())
+                    print(statistics.report())
         else:
             print ('Not Created')
             return False
@@ -145,7 +172,8 @@ def main(argv=None):
             return False
 
     if postprocessing:
-        res = analysis.post_processing()
+        if res is None:
+            res = analysis.post_processing()
 
         if plot:
             import matplotlib.pyplot as plt
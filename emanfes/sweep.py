@@ -0,0 +1,178 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Operating point sweeps warm started from neighbouring solutions.
+"""
+
+# ==========================================================================
+# Program:   sweep.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Nearest neighbour ordering and restarts
+#
+# ==========================================================================
+
+import copy
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from emanfes.api import run
+
+
+def order_operating_points(operating_points):
+    """
+        Visiting order of the operating points along a nearest neighbour
+        path. Every numeric parameter is scaled by its range so current,
+        angle and speed weigh alike, and the path starts at the point
+        nearest to the lower corner (e.g. the lowest current).
+    """
+    n = len(operating_points)
+    if n < 3:
+        return list(range(0, n))
+    keys = sorted({k for op in operating_points for k, v in (op or {}).items()
+                   if isinstance(v, (int, float)) and not isinstance(v, bool)})
+    if len(keys) == 0:
+        return list(range(0, n))
+    x = np.array([[float((op or {}).get(k, 0.0)) for k in keys] for op in operating_points])
+    span = np.ptp(x, axis=0)
+    x = (x - np.min(x, axis=0)) / np.where(span > 0, span, 1.0)
+
+    order = [int(np.argmin(np.sum(x ** 2, axis=1)))]
+    visited = np.zeros(n, dtype=bool)
+    visited[order[0]] = True
+    for i in range(1, n):
+        distance = np.sum((x - x[order[-1]]) ** 2, axis=1)
+        distance[visited] = np.inf
+        order.append(int(np.argmin(distance)))
+        visited[order[-1]] = True
+    return order
+
+
+class SweepResult:
+
+    def __init__(self, operating_points, order):
+        self.operating_points = operating_points
+        self.order = order
+        self.outcomes = [None] * len(operating_points)
+        self.baseline = [None] * len(operating_points)
+        # Points solved from the restart file of the previous one, and
+        # points that left a restart file for the next one
+        self.restarted = [False] * len(operating_points)
+        self.saved = [False] * len(operating_points)
+
+    @property
+    def results(self):
+        return [o.result if o is not None and o.success else None for o in self.outcomes]
+
+    def summary(self):
+        # Totals of the warm started points against cold starts, measured
+        # (baseline runs) or estimated from the points solved from zero
+        def totals(outcomes, points):
+            iterations = [outcomes[i].iterations for i in points
+                          if outcomes[i] is not None and outcomes[i].iterations is not None]
+            times = [outcomes[i].timings.get('solve', 0.0) for i in points if outcomes[i] is not None]
+            return float(np.sum(iterations)) if iterations else None, float(np.sum(times)), len(iterations)
+
+        warm = [i for i in self.order if self.restarted[i]]
+        cold = [i for i in self.order if not self.restarted[i]]
+        s = {'points': len(self.order), 'restarted': len(warm)}
+        s['iterations'], s['solve_time'], counted = totals(self.outcomes, self.order)
+        if any(b is not None for b in self.baseline):
+            s['cold_iterations'], s['cold_solve_time'], _ = totals(self.baseline, self.order)
+        elif len(cold) > 0 and counted > 0:
+            cold_iterations, cold_time, cold_counted = totals(self.outcomes, cold)
+            s['cold_iterations'] = cold_iterations / cold_counted * counted if cold_counted else None
+            s['cold_solve_time'] = cold_time / len(cold) * len(self.order)
+        if s.get('cold_iterations') and s['iterations'] is not None:
+            s['iteration_reduction'] = 1.0 - s['iterations'] / s['cold_iterations']
+        if s.get('cold_solve_time'):
+            s['time_reduction'] = 1.0 - s['solve_time'] / s['cold_solve_time']
+        return s
+
+    def report(self):
+        lines = ['%6s %8s %10s %10s %10s %10s  %s' % ('step', 'restart', 'iter', 'solve[s]',
+                                                     'cold iter', 'cold[s]', 'operating point')]
+        for step, i in enumerate(self.order):
+            o, b = self.outcomes[i], self.baseline[i]
+            lines.append('%6d %8s %10s %10.3f %10s %10s  %s' % (
+                step, 'yes' if self.restarted[i] else 'no',
+                o.iterations if o is not None else '-', o.timings.get('solve', 0.0) if o is not None else 0.0,
+                b.iterations if b is not None else '-',
+                '%.3f' % b.timings.get('solve', 0.0) if b is not None else '-',
+                self.operating_points[i]))
+        s = self.summary()
+        if 'iteration_reduction' in s:
+            lines.append('Nonlinear iterations: %g vs %g cold (%.1f%% fewer)' % (
+                s['iterations'], s['cold_iterations'], 100.0 * s['iteration_reduction']))
+        if 'time_reduction' in s:
+            lines.append('Solve time: %.3fs vs %.3fs cold (%.1f%% less)' % (
+                s['solve_time'], s['cold_solve_time'], 100.0 * s['time_reduction']))
+        return '\n'.join(lines)
+
+
+def run_sweep(machine_settings, analysis_settings, operating_points, workdir=None, restart=True,
+              baseline=False, cache=None):
+    """
+        Solves every operating point in nearest neighbour order, each one
+        starting from the solution of the previous point through Elmer's
+        restart files. With baseline, every point is solved again from zero
+        to measure the saving. Points are solved under workdir/point_<i>
+        (a temporary directory removed afterwards when not given).
+    """
+    temporary = workdir is None
+    root = tempfile.mkdtemp(prefix='emanfes_sweep_') if temporary else workdir
+    sweep = SweepResult(operating_points, order_operating_points(operating_points))
+    previous = None
+    try:
+        for i in sweep.order:
+            op = copy.deepcopy(operating_points[i]) or {}
+            op.setdefault('restart', {})['save'] = restart
+            if restart and previous is not None and os.path.isfile(previous.restart_file):
+                op['restart']['file'] = previous.restart_file
+                sweep.restarted[i] = True
+            point_dir = os.path.join(root, 'point_{0:04d}'.format(i))
+            outcome = run(machine_settings, analysis_settings, workdir=point_dir, keep_files=True,
+                          operating_point=op, cache=cache)
+            sweep.outcomes[i] = outcome
+            sweep.saved[i] = outcome.success and outcome.restart_file is not None
+            if temporary and previous is not None:
+                shutil.rmtree(previous.workdir, ignore_errors=True)
+            previous = outcome if sweep.saved[i] else None
+
+            if baseline:
+                cold = copy.deepcopy(operating_points[i]) or {}
+                cold_dir = os.path.join(root, 'cold_{0:04d}'.format(i))
+                sweep.baseline[i] = run(machine_settings, analysis_settings, workdir=cold_dir,
+                                        keep_files=not temporary, operating_point=cold)
+    finally:
+        if temporary:
+            shutil.rmtree(root, ignore_errors=True)
+            for o in sweep.outcomes + sweep.baseline:
+                if o is not None:
+                    o.workdir = None
+                    o.restart_file = None
+    return sweep
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+# -*- coding: iso-8859-15 -*-
+
+# ==========================================================================
+# Copyright (C) 2016 Dr. Alejandro Pina Ortega
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==========================================================================
+
+"""
+    Races of the shared-directory task queue.
+"""
+
+# ==========================================================================
+# Program:   test_task_queue.py
+# Author:    ajpina
+# Date:      10/19/26
+# Version:   0.1.1
+#
+# Revision History:
+#      Date     Version  Author    Description
+#  - 10/19/26:  0.1.1              Concurrent requeue of expired leases
+#
+# ==========================================================================
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+from emanfes.service.task_queue import FAILED, LEASED, PENDING, TMP, TaskQueue
+
+TASKS = 200
+REQUEUERS = 4
+
+
+def _requeue(root, start, requeued):
+    queue = TaskQueue(root, lease_time=60.0)
+    start.wait()
+    requeued.put(queue.requeue_expired())
+
+
+class TestRequeueExpired(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='emanfes_queue_')
+        self.queue = TaskQueue(self.root, lease_time=60.0)
+        self.ids = self.queue.submit_sweep({}, {}, [{'current': i} for i in range(0, TASKS)])
+        self.tasks = [self.queue.claim() for i in range(0, TASKS)]
+
+    def _expire(self, tasks):
+        old = time.time() - 3600.0
+        for task in tasks:
+            os.utime(os.path.join(self.root, LEASED, task.id + '.json'), (old, old))
+
+    def _race(self):
+        context = multiprocessing.get_context('fork')
+        start = context.Event()
+        requeued = context.Queue()
+        processes = [context.Process(target=_requeue, args=(self.root, start, requeued))
+                     for i in range(0, REQUEUERS)]
+        for p in processes:
+            p.start()
+        start.set()
+        counts = [requeued.get(timeout=60) for p in processes]
+        for p in processes:
+            p.join()
+        return counts
+
+    def _files(self, state):
+        return sorted(n[:-5] for n in os.listdir(os.path.join(self.root, state)))
+
+    def test_expired_leases_requeued_once(self):
+        self._expire(self.tasks)
+        counts = self._race()
+        self.assertEqual(sum(counts), TASKS)
+        self.assertEqual(self._files(PENDING), sorted(self.ids))
+        self.assertEqual(self._files(LEASED), [])
+        self.assertEqual([n for n in os.listdir(os.path.join(self.root, TMP)) if n.endswith('.claim')], [])
+        for task_id in self.ids:
+            with open(os.path.join(self.root, PENDING, task_id + '.json'), 'rt') as f:
+                self.assertEqual(json.load(f)['attempts'], 1)
+
+    def test_live_leases_kept(self):
+        expired, live = self.tasks[:TASKS // 2], self.tasks[TASKS // 2:]
+        self._expire(expired)
+        counts = self._race()
+        self.assertEqual(sum(counts), len(expired))
+        self.assertEqual(self._files(PENDING), sorted(t.id for t in expired))
+        self.assertEqual(self._files(LEASED), sorted(t.id for t in live))
+        for task in live:
+            self.assertTrue(self.queue.renew(task))
+
+    def test_abandoned_claim_recovered(self):
+        self._expire(self.tasks[:1])
+        task_id = self.tasks[0].id
+        claim = '{0}.{1:d}.dead.claim'.format(task_id, int(time.time() - 3600.0))
+        os.rename(os.path.join(self.root, LEASED, task_id + '.json'), os.path.join(self.root, TMP, claim))
+        self.assertEqual(self.queue.requeue_expired(), 1)
+        self.assertEqual(self._files(PENDING), [task_id])
+        self.assertEqual(self._files(FAILED), [])
+
+
+if __name__ == '__main__':
+    unittest.main()